@@ -0,0 +1,208 @@
+"""Benchmark the Registration, Login and GetUser batch clients.
+
+Each client runs in its own process against a local Account API stand-in,
+over generated inputs of the requested sizes. The report has throughput,
+p50/p95/p99 per-request latency, peak RSS and CPU time, and is saved as JSON:
+
+    python bench_clients.py run --sizes 1000 100000 --json bench_results.json
+
+Compare two reports and fail when a metric got worse by more than the
+threshold:
+
+    python bench_clients.py compare baseline.json bench_results.json --threshold 0.10
+"""
+import argparse
+import contextlib
+import csv
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, ".."))
+
+from bookstore import client
+from bookstore.metrics import percentile
+from bookstore.server import LocalBookstoreServer
+
+clients = ["register", "login", "getuser"]
+
+# Password that passes the API's rules
+bench_password = "Bench@Pass1"
+
+# Metrics where a higher value is worse; throughput is the only one where lower is worse
+higher_is_worse = ["p50_ms", "p95_ms", "p99_ms", "peak_rss_mb", "cpu_seconds"]
+
+def process_usage():
+    """Return (peak RSS in MB, CPU seconds) of this process; peak RSS is 0 where it isn't available."""
+    times = os.times()
+    cpu_seconds = times.user + times.system
+    if platform.system() == "Windows":
+        # The resource module is Unix-only
+        return 0.0, cpu_seconds
+    import resource
+
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    rss_divisor = 1024 * 1024 if platform.system() == "Darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / rss_divisor, cpu_seconds
+
+def write_input(client_name, size, path, server, prefix):
+    """Generate the input CSV for one client and seed the server with the accounts it needs."""
+    with open(path, mode="w", newline="") as outfile:
+        csv_writer = csv.writer(outfile)
+        if client_name == "register":
+            csv_writer.writerow(["userName", "password"])
+            for i in range(size):
+                csv_writer.writerow([f"{prefix}{i}", bench_password])
+        elif client_name == "login":
+            csv_writer.writerow(["username", "password"])
+            for i in range(size):
+                server.add_user(f"{prefix}{i}", bench_password)
+                csv_writer.writerow([f"{prefix}{i}", bench_password])
+        else:
+            csv_writer.writerow(["userID", "token"])
+            for i in range(size):
+                user_id = server.add_user(f"{prefix}{i}", bench_password)
+                csv_writer.writerow([user_id, server.make_token(f"{prefix}{i}", bench_password)])
+
+def run_child(client_name, input_path, output_path, concurrency):
+    """Run one batch client in this process and print its metrics as JSON."""
+    for folder in ("Registration", "Login", "GetUser"):
+        sys.path.insert(0, os.path.join(here, "..", folder))
+
+    latencies = []
+    send = client.request
+
+    def timed_request(method, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            return send(method, url, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    client.request = timed_request
+    argv = ["--input", input_path, "--output", output_path, "--rate", "0", "--restart"]
+
+    # Keep the clients' per-user prints out of the metrics output
+    with open(os.devnull, mode="w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        if client_name == "register":
+            import register_users
+            register_users.main(argv)
+        elif client_name == "login":
+            import login_users
+            login_users.main(argv + ["--no-token-cache", "--concurrency", str(concurrency)])
+        else:
+            import getusers
+            getusers.main(argv)
+        wall = time.perf_counter() - start
+
+    peak_rss_mb, cpu_seconds = process_usage()
+    latencies.sort()
+    with open(input_path, mode="r") as infile:
+        rows = sum(1 for _ in infile) - 1
+    print(json.dumps({
+        "rows": rows,
+        "requests": len(latencies),
+        "wall_seconds": wall,
+        "throughput_rps": rows / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "peak_rss_mb": peak_rss_mb,
+        "cpu_seconds": cpu_seconds
+    }))
+
+def run_benchmarks(sizes, client_names, concurrency, latency=0.0):
+    """Benchmark every client at every size and return the results keyed by 'client/size'."""
+    results = {}
+    with LocalBookstoreServer(latency=latency) as server, tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ, BOOKSTORE_BASE_URL=server.base_url,
+                   BOOKSTORE_TOKEN_CACHE=os.path.join(workdir, "tokens.sqlite3"),
+                   BOOKSTORE_REGISTERED_INDEX=os.path.join(workdir, "registered.sqlite3"))
+        for size in sizes:
+            for client_name in client_names:
+                input_path = os.path.join(workdir, f"{client_name}-{size}.csv")
+                output_path = os.path.join(workdir, f"{client_name}-{size}-out.csv")
+                write_input(client_name, size, input_path, server, prefix=f"bench{client_name}{size}x")
+
+                completed = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "_child", client_name,
+                     input_path, output_path, str(concurrency)],
+                    env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=True)
+                metrics = json.loads(completed.stdout)
+                results[f"{client_name}/{size}"] = metrics
+                print(format_row(f"{client_name}/{size}", metrics))
+    return results
+
+def format_row(name, metrics):
+    return (f"{name:<16} {metrics['throughput_rps']:>10.1f} rows/s  "
+            f"p50 {metrics['p50_ms']:>7.2f} ms  p95 {metrics['p95_ms']:>7.2f} ms  p99 {metrics['p99_ms']:>7.2f} ms  "
+            f"rss {metrics['peak_rss_mb']:>7.1f} MB  cpu {metrics['cpu_seconds']:>7.2f} s")
+
+def compare(baseline, current, threshold):
+    """Return a list of regressions between two result dicts."""
+    regressions = []
+    for name, before in baseline.items():
+        after = current.get(name)
+        if after is None:
+            continue
+        if before["throughput_rps"] and after["throughput_rps"] < before["throughput_rps"] * (1 - threshold):
+            regressions.append(f"{name}: throughput_rps {before['throughput_rps']:.1f} -> {after['throughput_rps']:.1f}")
+        for metric in higher_is_worse:
+            if before[metric] and after[metric] > before[metric] * (1 + threshold):
+                regressions.append(f"{name}: {metric} {before[metric]:.2f} -> {after[metric]:.2f}")
+    return regressions
+
+def load_results(path):
+    with open(path, mode="r") as infile:
+        return json.load(infile)["results"]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the batch clients against a local Account API.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=[1000], help="input rows per run, e.g. 1000 100000 1000000")
+    run_parser.add_argument("--clients", nargs="+", choices=clients, default=clients)
+    run_parser.add_argument("--concurrency", type=int, default=20, help="worker count for clients that support it")
+    run_parser.add_argument("--latency", type=float, default=0.0, help="server latency per request in seconds")
+    run_parser.add_argument("--json", default="bench_results.json", help="where to save the results")
+
+    compare_parser = subparsers.add_parser("compare", help="fail when results regress against a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative change, e.g. 0.10 for 10%%")
+
+    child_parser = subparsers.add_parser("_child")
+    child_parser.add_argument("client", choices=clients)
+    child_parser.add_argument("input")
+    child_parser.add_argument("output")
+    child_parser.add_argument("concurrency", type=int)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "_child":
+        run_child(args.client, args.input, args.output, args.concurrency)
+        return 0
+
+    if args.command == "compare":
+        regressions = compare(load_results(args.baseline), load_results(args.current), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if not regressions:
+            print("No regressions.")
+        return 1 if regressions else 0
+
+    results = run_benchmarks(args.sizes, args.clients, args.concurrency, args.latency)
+    with open(args.json, mode="w") as outfile:
+        json.dump({"python": platform.python_version(), "created": time.time(), "results": results}, outfile, indent=2)
+    print(f"Results have been saved to {args.json}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
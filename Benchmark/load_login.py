@@ -0,0 +1,258 @@
+"""Open-loop load test of the login flow (Authorized, then GenerateToken).
+
+Flows start at a target arrival rate whatever the response times, cycling
+through the credentials CSV. The rate follows ramp stages, each one moving
+linearly from the previous rate to its target over its duration (a 0s stage
+jumps straight to its rate):
+
+    python load_login.py --stages 30s:10 60s:50 60s:100 --credentials ../Login/credentials.csv
+
+or, with a single ramp-up to a fixed rate:
+
+    python load_login.py --rate 50 --ramp-up 10 --duration 60
+
+Every flow is timed from when it was due, not from when a worker picked it up,
+so a saturated service shows up as growing latency instead of a quietly lower
+rate. Flows that find --max-inflight flows still running are dropped and
+counted, and flows that start more than `late_after` seconds after they were
+due are counted as late. Retries and the circuit breaker are off, so every
+error is reported as it happened. The report has sent/completed/dropped/late
+flows, achieved flows per second (each flow is two requests), p50/p95/p99
+latency and the error mix (status codes, timeouts, failed logins) for every
+interval.
+"""
+import argparse
+import contextlib
+import csv
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, ".."))
+
+from bookstore import api, client
+from bookstore.metrics import percentile
+
+# Credentials used when none are given
+credentials_csv = os.path.join(here, "..", "Login", "credentials.csv")
+
+# Step in seconds used to integrate the target rate into arrival times
+schedule_step = 0.001
+
+# Seconds a flow may start after its due time before it counts as late
+late_after = 0.05
+
+def parse_duration(text):
+    """Parse 90, 90s, 5m or 1h into seconds."""
+    units = {"s": 1, "m": 60, "h": 3600}
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+def parse_stages(texts):
+    """Parse DURATION:RATE stages, e.g. ["30s:10", "1m:50"]."""
+    stages = []
+    for text in texts:
+        duration, _, rate = text.partition(":")
+        if not rate:
+            raise ValueError(f"Stage {text!r} must look like DURATION:RATE, e.g. 30s:10")
+        stages.append((parse_duration(duration), float(rate)))
+    return stages
+
+def rate_at(stages, offset, start_rate=0.0):
+    """Target rate at offset seconds into the run."""
+    stage_start, previous = 0.0, start_rate
+    for duration, target in stages:
+        if offset < stage_start + duration:
+            return previous + (target - previous) * (offset - stage_start) / duration
+        stage_start, previous = stage_start + duration, target
+    return previous
+
+def arrivals(stages, start_rate=0.0):
+    """Yield the offsets in seconds at which flows are due.
+
+    The nth flow is due once the integral of the target rate reaches n, so a
+    ramp starting from 0 fills in smoothly.
+    """
+    total = sum(duration for duration, _ in stages)
+    offset, expected, due = 0.0, 0.0, 1
+    while offset < total:
+        step = min(schedule_step, total - offset)
+        rate = rate_at(stages, offset + step / 2, start_rate)
+        reached = expected + rate * step
+        while due <= reached:
+            yield offset + step * (due - expected) / (rate * step)
+            due += 1
+        offset, expected = offset + step, reached
+
+def outcome_of(error):
+    import requests
+
+    if isinstance(error, requests.exceptions.Timeout):
+        return "timeout"
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return "connection error"
+    return "error"
+
+def login_flow(row):
+    """Run Authorized then GenerateToken for one credentials row and return the outcome.
+
+    The outcome is "ok", the status code or error of the first call that failed,
+    or "login-failed" when GenerateToken answers 200 without a "Success" status.
+    """
+    for call in (api.authorize, api.generate_token):
+        try:
+            response = call(row.get("username", ""), row.get("password", ""))
+        except client.RequestException as e:
+            return outcome_of(e)
+        if response.status_code != 200:
+            return str(response.status_code)
+    try:
+        status = response.json().get("status")
+    except (ValueError, AttributeError):
+        status = None
+    return "ok" if status == "Success" else "login-failed"
+
+@contextlib.contextmanager
+def raw_requests():
+    """Turn off retries and the circuit breaker for the duration of a load run."""
+    from bookstore import resilience
+
+    policy, breaker = resilience.retry_policy, resilience.breaker
+    resilience.retry_policy = resilience.RetryPolicy(max_attempts=1)
+    resilience.breaker = resilience.CircuitBreaker(failure_threshold=float("inf"))
+    try:
+        yield
+    finally:
+        resilience.retry_policy, resilience.breaker = policy, breaker
+
+def summarize(name, target_rate, sent, dropped, late, latencies, outcomes, seconds):
+    latencies = sorted(latencies)
+    return {
+        "window": name,
+        "target_flows_per_s": target_rate,
+        "sent": sent,
+        "completed": len(latencies),
+        "dropped": dropped,
+        "late": late,
+        "achieved_flows_per_s": len(latencies) / seconds if seconds else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "errors": {outcome: count for outcome, count in sorted(outcomes.items()) if outcome != "ok"}
+    }
+
+def run_load(credentials, stages, start_rate=0.0, max_inflight=100, interval=1.0, flow=login_flow):
+    """Drive flow at the staged arrival rate and return the report."""
+    lock = threading.Lock()
+    sent = Counter()  # window -> flows started
+    dropped = Counter()  # window -> flows not started because max_inflight were running
+    late = Counter()  # window -> flows started more than late_after after they were due
+    latencies = defaultdict(list)  # window -> seconds from due time to completion
+    outcomes = defaultdict(Counter)  # window -> outcome -> count
+    inflight = 0
+    rows = itertools.cycle(credentials)
+
+    def run_one(row, due, window):
+        nonlocal inflight
+        if time.perf_counter() - due > late_after:
+            with lock:
+                late[window] += 1
+        try:
+            result = flow(row)
+        except Exception as e:
+            result = outcome_of(e)
+        elapsed = time.perf_counter() - due
+        with lock:
+            inflight -= 1
+            latencies[window].append(elapsed)
+            outcomes[window][result] += 1
+
+    client.configure(maxsize=max(client.pool_maxsize, max_inflight))
+    start = time.perf_counter()
+    with raw_requests(), ThreadPoolExecutor(max_workers=max_inflight) as executor:
+        for offset in arrivals(stages, start_rate):
+            due = start + offset
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            window = int(offset // interval)
+            with lock:
+                if inflight >= max_inflight:
+                    dropped[window] += 1
+                    continue
+                inflight += 1
+                sent[window] += 1
+            executor.submit(run_one, next(rows), due, window)
+    wall = time.perf_counter() - start
+
+    total = sum(duration for duration, _ in stages)
+    windows = []
+    for window in range(int(total // interval) + (total % interval > 0)):
+        middle = min((window + 0.5) * interval, total)
+        windows.append(summarize(f"{window * interval:g}s", rate_at(stages, middle, start_rate), sent[window],
+                                 dropped[window], late[window], latencies[window], outcomes[window],
+                                 min(interval, total - window * interval)))
+    all_outcomes = sum(outcomes.values(), Counter())
+    summary = summarize("total", None, sum(sent.values()), sum(dropped.values()), sum(late.values()),
+                        list(itertools.chain.from_iterable(latencies.values())), all_outcomes, wall)
+    return {"windows": windows, "summary": summary}
+
+def format_window(window):
+    errors = " ".join(f"{outcome}:{count}" for outcome, count in window["errors"].items()) or "-"
+    target = "" if window["target_flows_per_s"] is None else f"{window['target_flows_per_s']:.1f}"
+    return (f"{window['window']:>8} {target:>8} {window['sent']:>7} {window['completed']:>9} "
+            f"{window['dropped']:>7} {window['late']:>6} {window['achieved_flows_per_s']:>9.1f} "
+            f"{window['p50_ms']:>8.1f} {window['p95_ms']:>8.1f} {window['p99_ms']:>8.1f}  {errors}")
+
+def read_credentials(path):
+    with open(path, mode="r") as infile:
+        return list(csv.DictReader(infile))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Open-loop load test of the Authorized/GenerateToken flow.")
+    parser.add_argument("--credentials", default=credentials_csv, help="credentials CSV (username,password)")
+    parser.add_argument("--stages", nargs="+", help="ramp stages as DURATION:RATE, e.g. 30s:10 1m:50")
+    parser.add_argument("--rate", type=float, default=10.0, help="target flows per second (without --stages)")
+    parser.add_argument("--ramp-up", default="0", help="time to reach --rate (without --stages)")
+    parser.add_argument("--duration", default="60s", help="time to hold --rate (without --stages)")
+    parser.add_argument("--max-inflight", type=int, default=100, help="flows running at once before new ones are dropped")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds per report line")
+    parser.add_argument("--json", help="also save the report here")
+    args = parser.parse_args(argv)
+
+    if args.stages:
+        stages = parse_stages(args.stages)
+    else:
+        ramp_up = parse_duration(args.ramp_up)
+        # A zero-length stage jumps straight to the rate
+        stages = [(ramp_up, args.rate), (parse_duration(args.duration), args.rate)]
+    credentials = read_credentials(args.credentials)
+    if not credentials:
+        parser.error(f"No credentials in {args.credentials}")
+
+    # Arrivals are paced here; the adaptive limiter would close the loop
+    client.set_rate_limiter(None)
+    report = run_load(credentials, stages, max_inflight=args.max_inflight, interval=args.interval)
+
+    # Rates are login flows per second; each flow sends two requests
+    print(f"{'window':>8} {'target':>8} {'sent':>7} {'completed':>9} {'dropped':>7} {'late':>6} {'flows/s':>9} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  errors")
+    for window in report["windows"]:
+        print(format_window(window))
+    print(format_window(report["summary"]))
+    print(f"dropped: more than {args.max_inflight} flows in flight; late: started over {late_after * 1000:g} ms "
+          f"after they were due")
+    if args.json:
+        with open(args.json, mode="w") as outfile:
+            json.dump(report, outfile, indent=2)
+        print(f"Report has been saved to {args.json}")
+
+if __name__ == "__main__":
+    main()
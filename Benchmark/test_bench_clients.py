@@ -0,0 +1,29 @@
+import pytest
+
+import bench_clients
+
+def metrics(**overrides):
+    values = {"throughput_rps": 100.0, "p50_ms": 2.0, "p95_ms": 4.0, "p99_ms": 8.0,
+              "peak_rss_mb": 30.0, "cpu_seconds": 2.0}
+    values.update(overrides)
+    return values
+
+def test_process_usage():
+    peak_rss_mb, cpu_seconds = bench_clients.process_usage()
+    assert peak_rss_mb >= 0 and cpu_seconds > 0
+
+def test_compare_passes_within_threshold():
+    baseline = {"login/1000": metrics()}
+    current = {"login/1000": metrics(throughput_rps=95.0, p99_ms=8.5)}
+    assert bench_clients.compare(baseline, current, threshold=0.10) == []
+
+@pytest.mark.parametrize("overrides, metric", [
+    ({"throughput_rps": 80.0}, "throughput_rps"),
+    ({"p95_ms": 5.0}, "p95_ms"),
+    ({"peak_rss_mb": 40.0}, "peak_rss_mb"),
+])
+def test_compare_reports_regressions(overrides, metric):
+    baseline = {"login/1000": metrics()}
+    current = {"login/1000": metrics(**overrides)}
+    regressions = bench_clients.compare(baseline, current, threshold=0.10)
+    assert len(regressions) == 1 and metric in regressions[0]
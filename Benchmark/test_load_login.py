@@ -0,0 +1,46 @@
+import pytest
+
+import load_login
+
+def test_parse_stages():
+    assert load_login.parse_stages(["30s:10", "2m:50", "15:0"]) == [(30.0, 10.0), (120.0, 50.0), (15.0, 0.0)]
+    with pytest.raises(ValueError):
+        load_login.parse_stages(["30s"])
+
+def test_rate_ramps_linearly_between_stages():
+    stages = [(10, 100), (10, 100), (0, 20), (10, 20)]
+    assert load_login.rate_at(stages, 5) == 50
+    assert load_login.rate_at(stages, 15) == 100
+    assert load_login.rate_at(stages, 25) == 20
+    assert load_login.rate_at(stages, 99) == 20
+
+def test_arrivals_follow_the_target_rate():
+    offsets = list(load_login.arrivals([(0, 50), (2, 50)]))
+    assert len(offsets) == pytest.approx(100, abs=1)
+    assert offsets == sorted(offsets) and offsets[-1] < 2
+    # Ramping from 0 to 50 over 2s averages 25 per second
+    assert len(list(load_login.arrivals([(2, 50)]))) == pytest.approx(50, abs=3)
+
+def test_load_run_against_local_api(local_api):
+    local_api.add_user("loadUser", "Load@Pass1")
+    credentials = [{"username": "loadUser", "password": "Load@Pass1"},
+                   {"username": "missingUser", "password": "Load@Pass1"}]
+    local_api.fail_next(429, 2)
+
+    report = load_login.run_load(credentials, [(0, 40), (1, 40)], max_inflight=10, interval=0.5)
+
+    summary = report["summary"]
+    assert summary["sent"] == summary["completed"] == pytest.approx(40, abs=1)
+    assert summary["errors"]["404"] >= 15
+    assert summary["errors"]["429"] == 2
+    assert [window["window"] for window in report["windows"]] == ["0s", "0.5s"]
+    assert summary["dropped"] == sum(window["dropped"] for window in report["windows"])
+    assert summary["late"] == sum(window["late"] for window in report["windows"])
+
+def test_failed_login_is_not_ok(fake_api):
+    """GenerateToken answers 200 with "status": "Failed" for a wrong password; that flow failed."""
+    row = {"username": "flowUser", "password": "Flow@Pass1"}
+    assert load_login.login_flow(row) == "ok"
+    fake_api.post_mock.side_effect = lambda url, **kwargs: fake_api.response(
+        200, True if url.endswith("/Authorized") else {"token": None, "status": "Failed"})
+    assert load_login.login_flow(row) == "login-failed"
@@ -1,35 +1,59 @@
+import argparse
 import csv
-import requests
-import time
+import hashlib
+import itertools
+import os
+import sys
 import logging
 
+# Make the shared bookstore package importable when run from this folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bookstore import (api, checkpoint, client, engine, jwtcheck, metrics, ratelimit, responsecache, results,
+                       sharding, tokens)
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 
-# URLs
-base_url = "https://bookstore.toolsqa.com/Account/v1/User/"
-
 # File paths
 input_file = "input.csv"
 output_file = "output.csv"
 
-# Headers template
-headers_template = {
-    "Authorization": "Bearer {token}",
-    "Content-Type": "application/json"
-}
+# Output columns
+fieldnames = ["userID", "status_code", "message", "username", "books"]
+
+# GetUser starts at half of ratelimit.default_rate
+start_rate = 0.5
+
+# Number of rows looked up at the same time
+concurrency = engine.default_concurrency
+
+# Check tokens locally and don't send the ones the API is certain to reject
+check_tokens = True
+
+# Shares lookups of the same userID/token pair; set up by main(), None sends every row
+response_cache = None
 
-# Time delay between requests in seconds
-time_delay = 2
+# Answers worth reusing for the same userID/token pair (not server errors or timeouts)
+cacheable_statuses = {200, 400, 401, 404}
 
-def get_user_details(user_id, token):
-    """Fetch user details with the given userID and bearer token."""
-    headers = headers_template.copy()
-    headers["Authorization"] = f"Bearer {token}"
-    response = requests.get(base_url + user_id, headers=headers)
+def get_user_details(user_id, token=None, username=None):
+    """Fetch user details with the given userID and bearer token.
+
+    Without a token, an unexpired one is taken from the shared token cache.
+    """
+    cached = None
+    if not token:
+        cached = tokens.lookup(user_id, username)
+        token = cached["token"] if cached else ""
+
+    response = api.get_user(user_id, token)
     
     if response.status_code != 200:
         logging.error(f"Failed to fetch details for userID {user_id}: {response.status_code} - {response.text}")
+        if cached and response.status_code == 401:
+            # The API no longer accepts this token, so the next login refreshes it
+            tokens.get_cache().invalidate(cached["username"])
     
     return response
 
@@ -45,46 +69,160 @@ def format_books(books):
     
     return '; '.join(formatted_books)
 
-def main():
-    responses = []
+def input_username(row, token):
+    """The user an input row is about: its username column, else the userName claim of its token."""
+    if row.get("username"):
+        return row["username"]
+    try:
+        return jwtcheck.decode(token)[1]["userName"]
+    except jwtcheck.MalformedToken:
+        return ""
+
+def fetch_row(row):
+    """Look up one input row and return its output row, or None if it is incomplete.
+
+    Rows the API didn't answer with a username keep the one from the input, so
+    failed lookups still say whose they were.
+    """
+    result = _fetch_row(row)
+    if result is not None and not result["username"]:
+        result = dict(result, username=input_username(row, row.get("token")))
+    return result
+
+def _fetch_row(row):
+    user_id = row.get("userID")
+    token = row.get("token")
+    username = row.get("username")
+
+    # Rows without a token can still be looked up if the token cache knows the user
+    if not user_id or not (token or tokens.lookup(user_id, username)):
+        logging.warning("Missing userID or token in the input CSV.")
+        return None
+
+    # Malformed, expired or foreign tokens get a 401; use a fresh cached one or skip the request
+    if token and check_tokens:
+        info = jwtcheck.inspect(token, row.get("expires"), username)
+        if info["result"] != jwtcheck.valid:
+            cached = tokens.lookup(user_id, username or info["username"])
+            if cached and cached["token"] != token:
+                logging.info(f"Replacing {info['result']} token for userID {user_id} with a cached one")
+                token = cached["token"]
+            else:
+                logging.warning(f"Not sending {info['result']} token for userID {user_id}: {info['reason']}")
+                return {"userID": user_id, "status_code": "N/A", "message": f"Not sent: {info['reason']}",
+                        "username": "", "books": ""}
 
-    # Read input CSV
-    with open(input_file, mode="r") as infile:
+    if response_cache is None:
+        return fetch_user(user_id, token, username)
+    # Duplicate rows share one request; the key holds a digest rather than the token itself
+    token_key = hashlib.sha256(token.encode()).hexdigest() if token else f"cached:{username or ''}"
+    return response_cache.get_or_load(f"{user_id}:{token_key}", lambda: fetch_user(user_id, token, username),
+                                      lambda result: is_cacheable(result, bool(token)))
+
+def is_cacheable(result, own_token):
+    """Whether a lookup's answer may be reused for duplicate rows.
+
+    A 401 is only reused for rows that sent their own token. Rows without one
+    are keyed by user, and the 401 drops the cached token they used, so the
+    next row should try again with a refreshed one.
+    """
+    if result["status_code"] == 401:
+        return own_token
+    return result["status_code"] in cacheable_statuses
+
+def fetch_user(user_id, token=None, username=None):
+    """Request one user's details and return the output row, with the books formatted."""
+    try:
+        response = get_user_details(user_id, token, username)
+        response_data = response.json() if response.status_code == 200 else {}
+    except (client.RequestException, ValueError) as e:
+        # Timeouts, connection errors and an open circuit are recorded, not fatal
+        logging.error(f"Request failed for userID {user_id}: {e}")
+        return {"userID": user_id, "status_code": "N/A", "message": str(e), "username": "", "books": ""}
+    if response_data.get("username"):
+        # Let later runs find this user's cached token by userID
+        tokens.get_cache().set_user_id(response_data["username"], user_id)
+
+    # Prepare output data
+    return {
+        "userID": user_id,
+        "status_code": response.status_code,
+        "message": response_data.get("message", ""),
+        "username": response_data.get("username", ""),
+        "books": format_books(response_data.get("books", []))  # Format the books
+    }
+
+async def fetch_all(rows, writer, concurrency=concurrency):
+    """Look up rows concurrently and record the results in input order."""
+    async for _, result in engine.run_ordered(fetch_row, rows, concurrency):
+        writer.record(result)
+
+def init_shard(rate, max_rate, token_check, cache_settings):
+    """Set up a shard process the way main() sets up this one."""
+    global check_tokens, response_cache
+    check_tokens = token_check
+    response_cache = responsecache.ResponseCache(*cache_settings) if cache_settings else None
+    client.set_rate_limiter(ratelimit.from_arguments(rate, max_rate))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch user details for every userID/token in a CSV file.")
+    parser.add_argument("--input", default=input_file, help="input CSV (userID,token)")
+    parser.add_argument("--output", default=output_file, help="where to write the user details CSV")
+    parser.add_argument("--concurrency", type=int, default=concurrency,
+                        help="number of rows looked up at the same time")
+    ratelimit.add_arguments(parser, start_rate)
+    parser.add_argument("--restart", action="store_true",
+                        help="ignore any checkpoint and start from the first row")
+    parser.add_argument("--no-token-check", action="store_true",
+                        help="send every token to the API, even malformed or expired ones")
+    parser.add_argument("--cache-size", type=int, default=responsecache.default_maxsize,
+                        help="user details kept in memory for duplicate rows (0 sends every row)")
+    parser.add_argument("--cache-ttl", type=float, default=responsecache.default_ttl,
+                        help="seconds a user's details are reused")
+    parser.add_argument("--cache-file",
+                        help="also keep user details in this SQLite file for the next run")
+    metrics.add_arguments(parser)
+    results.add_arguments(parser)
+    sharding.add_arguments(parser)
+    args = parser.parse_args(argv)
+    import asyncio
+
+    global check_tokens, response_cache
+    check_tokens = not args.no_token_check
+    cache_settings = (args.cache_size, args.cache_ttl, args.cache_file) if args.cache_size else None
+
+    if sharding.is_requested(args):
+        # Each shard process gets an equal part of the starting rate and the ceiling
+        path = sharding.run_from_arguments(args, fetch_row, fieldnames, "userID", args.concurrency,
+                                           init_shard, (args.rate / args.processes, args.max_rate / args.processes,
+                                                        check_tokens, cache_settings),
+                                           endpoint="getuser")
+        logging.info(f"Output saved to {path}")
+        return
+
+    # Keep one pooled connection per worker
+    client.configure(maxsize=max(client.pool_maxsize, args.concurrency))
+    client.set_rate_limiter(ratelimit.from_arguments(args.rate, args.max_rate))
+    response_cache = responsecache.ResponseCache(*cache_settings) if cache_settings else None
+
+    # Stream results to the output CSV, resuming after the last checkpoint
+    with metrics.from_arguments(args), open(args.input, mode="r") as infile, \
+            checkpoint.CheckpointedWriter(args.output, fieldnames, input_path=args.input, resume=not args.restart,
+                                          sink=results.open_sink(args.results_db, "getuser", args.input,
+                                                                 args.output)) as writer:
         csv_reader = csv.DictReader(infile)
-        
-        for row in csv_reader:
-            user_id = row.get("userID")
-            token = row.get("token")
-            
-            if not user_id or not token:
-                logging.warning("Missing userID or token in the input CSV.")
-                continue
-            
-            response = get_user_details(user_id, token)
-            response_data = response.json() if response.status_code == 200 else {}
-
-            # Prepare output data
-            result = {
-                "userID": user_id,
-                "status_code": response.status_code,
-                "message": response_data.get("message", ""),
-                "username": response_data.get("username", ""),
-                "books": format_books(response_data.get("books", []))  # Format the books
-            }
-            responses.append(result)
-
-            # Add delay between requests
-            logging.info(f"Waiting for {time_delay} seconds before the next request...")
-            time.sleep(time_delay)
-
-    # Write to output CSV
-    fieldnames = ["userID", "status_code", "message", "username", "books"]
-    with open(output_file, mode="w", newline="") as outfile:
-        csv_writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-        csv_writer.writeheader()
-        csv_writer.writerows(responses)
-    
-    logging.info(f"Output saved to {output_file}")
+        if writer.resumed:
+            logging.info(f"Resuming after {writer.completed} rows already processed")
+
+        rows = itertools.islice(csv_reader, writer.completed, None)
+        asyncio.run(fetch_all(rows, writer, args.concurrency))
+
+    if response_cache is not None:
+        stats = response_cache.stats()
+        logging.info(f"Requests saved on duplicate rows: {stats['hits'] + stats['coalesced']}")
+        response_cache.close()
+        response_cache = None
+    logging.info(f"Output saved to {args.output}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,51 +1,26 @@
 import csv
-import requests
 import logging
+import time
 import pytest
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
+
+import getusers
+from bookstore import accounts, client, responsecache, tokens
+from bookstore.server import LocalBookstoreServer
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 
-# Base URL for the API
-base_url = "https://bookstore.toolsqa.com/Account/v1/User/"
-
-# Headers template
-headers_template = {
-    "Authorization": "Bearer {token}",
-    "Content-Type": "application/json"
-}
-
-def get_user_details(user_id, token):
-    """Fetch user details with the given userID and bearer token."""
-    headers = headers_template.copy()
-    headers["Authorization"] = f"Bearer {token}"
-    response = requests.get(base_url + user_id, headers=headers)
-    logging.info(f"Response for userID {user_id}: {response.status_code} - {response.text}")
-    return response
-
-def load_test_data_from_csv(file_path):
-    """Load test data from a CSV file."""
-    test_data = []
-    with open(file_path, mode="r") as infile:
-        csv_reader = csv.DictReader(infile)
-        for row in csv_reader:
-            test_data.append((
-                row["userID"],
-                row["token"],
-                int(row["expected_status_code"]),
-                row["expected_message"]
-            ))
-    return test_data
-
-# Load test data from the CSV file
-csv_file_path = "input_test.csv"  # Update with your actual file path
-test_data = load_test_data_from_csv(csv_file_path)
-
-@pytest.mark.parametrize("user_id, token, expected_status_code, expected_message", test_data)
-def test_get_user_details(user_id, token, expected_status_code, expected_message):
+def to_case(row):
+    """Turn an input_test.csv row into test arguments."""
+    return row["userID"], row["token"], int(row["expected_status_code"]), row["expected_message"]
+
+# Cases are read from input_test.csv next to this file, one at a time; {account.*} is a pool account
+@pytest.mark.cases("input_test.csv")
+def test_get_user_details(case, account):
     """Test user details retrieval with various cases."""
-    response = get_user_details(user_id, token)
+    user_id, token, expected_status_code, expected_message = to_case(accounts.fill(case, account))
+    response = getusers.get_user_details(user_id, token)
     
     # Parse response JSON if available
     try:
@@ -73,14 +48,87 @@ def test_get_user_details(user_id, token, expected_status_code, expected_message
 ])
 def test_uncommon_http_status(mock_status, mock_response_text):
     """Test for uncommon HTTP statuses."""
-    with patch("requests.get") as mock_get:
+    with patch("bookstore.client.get") as mock_get:
         # Mock the response for uncommon statuses
         mock_get.return_value.status_code = mock_status
         mock_get.return_value.text = mock_response_text
 
         # Simulate a request
-        response = get_user_details("testUserID", "testToken")
+        response = getusers.get_user_details("testUserID", "testToken")
 
         # Validate the mocked response
         assert response.status_code == mock_status, f"Unexpected status code: {response.status_code}"
         assert response.text == mock_response_text, f"Unexpected response text: {response.text}"
+
+def test_doomed_tokens_are_not_sent(tmp_path, monkeypatch):
+    """Malformed and expired tokens are classified locally, or replaced by a fresh cached token."""
+    cache = tokens.TokenCache(str(tmp_path / "tokens.sqlite3"))
+    monkeypatch.setattr(tokens, "_cache", cache)
+    server = LocalBookstoreServer()
+    expired_token = server.make_token("Testing11Januari", issued_at=time.time() - 30 * 24 * 60 * 60)
+
+    with patch("bookstore.client.get") as mock_get:
+        malformed = getusers.fetch_row({"userID": "some-id", "token": "InvalidTokenExample123456"})
+        expired = getusers.fetch_row({"userID": "some-id", "token": expired_token})
+        assert not mock_get.called
+    assert malformed["status_code"] == expired["status_code"] == "N/A"
+    assert expired["message"] == "Not sent: token expired"
+    # Failed rows still name their user, from the token when the input has no username column
+    assert (malformed["username"], expired["username"]) == ("", "Testing11Januari")
+
+    fresh_token = server.make_token("Testing11Januari")
+    cache.put("Testing11Januari", fresh_token, "2999-01-01T00:00:00.000Z")
+    with patch("bookstore.client.get") as mock_get:
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = {"userId": "some-id", "username": "Testing11Januari", "books": []}
+        row = getusers.fetch_row({"userID": "some-id", "token": expired_token})
+    assert row["status_code"] == 200
+    assert mock_get.call_args.kwargs["headers"]["Authorization"] == f"Bearer {fresh_token}"
+
+def test_duplicate_rows_cost_one_request(tmp_path, monkeypatch):
+    """Repeated userID/token pairs in the input are fetched once and reused."""
+    monkeypatch.setattr(tokens, "_cache", tokens.TokenCache(str(tmp_path / "tokens.sqlite3")))
+    monkeypatch.setattr(client, "rate_limiter", None)
+    token = LocalBookstoreServer().make_token("Testing11Januari")
+    input_path = tmp_path / "input.csv"
+    output_path = tmp_path / "output.csv"
+    input_path.write_text("userID,token\n" + f"user-1,{token}\nuser-2,{token}\n" * 5)
+
+    def fake_get(url, headers=None, **kwargs):
+        response = MagicMock()
+        response.status_code = 200
+        response.json.return_value = {"userId": url.rsplit("/", 1)[-1], "username": "Testing11Januari",
+                                      "books": [{"title": "Git Pocket Guide", "author": "Richard E. Silverman"}]}
+        return response
+
+    with patch("bookstore.client.get", side_effect=fake_get) as mock_get:
+        getusers.main(["--input", str(input_path), "--output", str(output_path), "--rate", "0"])
+    assert mock_get.call_count == 2
+
+    with open(output_path, newline="") as infile:
+        rows = list(csv.DictReader(infile))
+    assert [row["userID"] for row in rows] == ["user-1", "user-2"] * 5
+    assert all(row["books"].startswith("Git Pocket Guide by Richard E. Silverman") for row in rows)
+
+def test_unauthorized_answers_are_only_reused_for_the_same_token(tmp_path, monkeypatch):
+    """A 401 for a row's own token is reused; rows using a cached token ask again once it is refreshed."""
+    cache = tokens.TokenCache(str(tmp_path / "tokens.sqlite3"))
+    monkeypatch.setattr(tokens, "_cache", cache)
+    monkeypatch.setattr(client, "rate_limiter", None)
+    token = LocalBookstoreServer().make_token("Testing11Januari")
+    input_path = tmp_path / "input.csv"
+    input_path.write_text("userID,token\n" + f"user-1,{token}\n" * 3)
+
+    with patch("bookstore.client.get") as mock_get:
+        mock_get.return_value.status_code = 401
+        getusers.main(["--input", str(input_path), "--output", str(tmp_path / "output.csv"), "--rate", "0"])
+        assert mock_get.call_count == 1
+
+        # The 401 drops the cached token; the next row sends the one a later login stored
+        monkeypatch.setattr(getusers, "response_cache", responsecache.ResponseCache())
+        row = {"userID": "user-2", "username": "Testing11Januari", "token": ""}
+        for _ in range(2):
+            cache.put("Testing11Januari", token, "2999-01-01T00:00:00.000Z", user_id="user-2")
+            assert getusers.fetch_row(row)["status_code"] == 401
+            assert tokens.lookup("user-2", "Testing11Januari") is None
+    assert mock_get.call_count == 3
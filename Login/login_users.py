@@ -1,128 +1,188 @@
+import argparse
 import csv
-import requests
-import time
+import itertools
+import os
+import sys
 
-# URLs
-login_url = "https://bookstore.toolsqa.com/Account/v1/Authorized"
-generate_token_url = "https://bookstore.toolsqa.com/Account/v1/GenerateToken"
+# Make the shared bookstore package importable when run from this folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bookstore import api, checkpoint, client, engine, metrics, ratelimit, results, sharding, tokens
 
 # File paths
 input_csv = "credentials.csv"
 output_csv = "responses.csv"
 
-# Headers for API requests
-headers = {
-    "Content-Type": "application/json"
-}
-
-# Time delay in seconds
-time_delay = 2
-
-# Prepare output data
-responses = []
-
-# Read input CSV
-with open(input_csv, mode="r") as infile:
-    csv_reader = csv.DictReader(infile)
-    
-    for row in csv_reader:
-        username = row.get("username")
-        password = row.get("password")
-
-        # Check if username or password is missing
-        if not username or not password:
-            print(f"Skipped user: {username} (Missing username or password)")
-            responses.append({
-                "username": username,
-                "login_status": "Failed",
-                "token": "",
-                "expires": "",
-                "result": "",
-                "status": "Missing username or password"
-            })
-            continue
-
-        # Prepare payload
-        payload = {
-            "userName": username,
-            "password": password
+# Number of users logged in at the same time
+concurrency = engine.default_concurrency
+
+# Reuse unexpired tokens from the shared token cache instead of logging in again
+use_token_cache = True
+
+# Output columns
+fieldnames = ["username", "login_status", "token", "expires", "result", "status"]
+
+def login_and_generate_token(row):
+    """Run the Authorized -> GenerateToken chain for one credentials row."""
+    username = row.get("username")
+    password = row.get("password")
+
+    # Check if username or password is missing
+    if not username or not password:
+        print(f"Skipped user: {username} (Missing username or password)")
+        return {
+            "username": username,
+            "login_status": "Failed",
+            "token": "",
+            "expires": "",
+            "result": "",
+            "status": "Missing username or password"
         }
 
-        try:
-            # Step 1: Login
-            login_response = requests.post(login_url, json=payload, headers=headers)
-            login_data = login_response.json()
-
-            if login_response.status_code == 200:
-                print(f"Login request sent for user: {username}")
-
-                # Step 2: Generate Token
-                token_response = requests.post(generate_token_url, json=payload, headers=headers)
-                token_data = token_response.json()
-
-                if token_response.status_code == 200 and token_data.get("status") == "Success":
-                    responses.append({
-                        "username": username,
-                        "login_status": "Success",
-                        "token": token_data.get("token", ""),
-                        "expires": token_data.get("expires", ""),
-                        "result": token_data.get("result", ""),
-                        "status": token_data.get("status", "")
-                    })
-                else:
-                    responses.append({
-                        "username": username,
-                        "login_status": "Success",
-                        "token": "Failed to generate token",
-                        "expires": "",
-                        "result": token_data.get("result", ""),
-                        "status": token_data.get("status", "Failed")
-                    })
-            elif login_response.status_code == 400:
-                if login_data.get("code") == "1200":
-                    print("User  Name and Password required.")
-                elif login_data.get("code") == "1207":
-                    print("User  not found!")
-                responses.append({
+    # Serve unexpired tokens from the cache without any network call, but only for the password
+    # they were issued for; any other password goes to the API
+    cached = tokens.get_cache().get(username, password) if use_token_cache else None
+    if cached:
+        print(f"Using cached token for user: {username}")
+        return {
+            "username": username,
+            "login_status": "Success",
+            "token": cached["token"],
+            "expires": cached["expires"],
+            "result": "Token reused from cache",
+            "status": "Success"
+        }
+
+    try:
+        # Step 1: Login
+        login_response = api.authorize(username, password)
+        login_data = login_response.json()
+
+        if login_response.status_code == 200:
+            print(f"Login request sent for user: {username}")
+
+            # Step 2: Generate Token
+            token_response = api.generate_token(username, password)
+            token_data = token_response.json()
+
+            if token_response.status_code == 200 and token_data.get("status") == "Success":
+                if use_token_cache:
+                    tokens.get_cache().put(username, token_data.get("token", ""), token_data.get("expires", ""),
+                                           password=password)
+                result = {
                     "username": username,
-                    "login_status": "Failed",
-                    "token": "",
-                    "expires": "",
-                    "result": "",
-                    "status": "Unauthorized"
-                })
+                    "login_status": "Success",
+                    "token": token_data.get("token", ""),
+                    "expires": token_data.get("expires", ""),
+                    "result": token_data.get("result", ""),
+                    "status": token_data.get("status", "")
+                }
             else:
-                print(f"Unexpected response for user {username}: {login_response.status_code}")
-                responses.append({
+                result = {
                     "username": username,
-                    "login_status": "Failed",
-                    "token": "",
+                    "login_status": "Success",
+                    "token": "Failed to generate token",
                     "expires": "",
-                    "result": "",
-                    "status": "Unexpected error"
-                })
-
-        except Exception as e:
-            # Handle errors
-            responses.append({
+                    "result": token_data.get("result", ""),
+                    "status": token_data.get("status", "Failed")
+                }
+        elif login_response.status_code == 400:
+            if login_data.get("code") == "1200":
+                print("User  Name and Password required.")
+            elif login_data.get("code") == "1207":
+                print("User  not found!")
+            result = {
                 "username": username,
-                "login_status": "Error",
+                "login_status": "Failed",
                 "token": "",
                 "expires": "",
                 "result": "",
-                "status": str(e)
-            })
-
-        # Add delay between requests
-        print(f"Waiting for {time_delay} seconds before the next request...")
-        time.sleep(time_delay)
-
-# Write to output CSV
-with open(output_csv, mode="w", newline="") as outfile:
-    fieldnames = ["username", "login_status", "token", "expires", "result", "status"]
-    csv_writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-
-    csv_writer.writeheader()
-    csv_writer.writerows(responses)
+                "status": "Unauthorized"
+            }
+        else:
+            print(f"Unexpected response for user {username}: {login_response.status_code}")
+            result = {
+                "username": username,
+                "login_status": "Failed",
+                "token": "",
+                "expires": "",
+                "result": "",
+                "status": "Unexpected error"
+            }
+
+    except Exception as e:
+        # Handle errors
+        result = {
+            "username": username,
+            "login_status": "Error",
+            "token": "",
+            "expires": "",
+            "result": "",
+            "status": str(e)
+        }
 
-print(f"Responses have been saved to {output_csv}")
\ No newline at end of file
+    return result
+
+async def login_all(input_path, output_path, concurrency=concurrency, resume=True, sink=None):
+    """Log in every user from input_path and stream the results in input order.
+
+    Progress is checkpointed next to the output file, so a rerun after a crash
+    continues after the last saved user unless resume is False. Results also
+    go to sink (a bookstore.results.ResultSink) when one is given.
+    """
+    with open(input_path, mode="r") as infile, \
+            checkpoint.CheckpointedWriter(output_path, fieldnames, input_path=input_path, resume=resume,
+                                          sink=sink) as writer:
+        csv_reader = csv.DictReader(infile)
+        if writer.resumed:
+            print(f"Resuming after {writer.completed} users already in {output_path}")
+        rows = itertools.islice(csv_reader, writer.completed, None)
+
+        async for _, result in engine.run_ordered(login_and_generate_token, rows, concurrency):
+            writer.record(result)
+
+def init_shard(rate, max_rate, token_cache):
+    """Set up a shard process the way main() sets up this one."""
+    global use_token_cache
+    use_token_cache = token_cache
+    client.set_rate_limiter(ratelimit.from_arguments(rate, max_rate))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Log in users from a CSV file and save their tokens.")
+    parser.add_argument("--input", default=input_csv, help="credentials CSV (username,password)")
+    parser.add_argument("--output", default=output_csv, help="where to write the responses CSV")
+    parser.add_argument("--concurrency", type=int, default=concurrency,
+                        help="number of users processed at the same time")
+    ratelimit.add_arguments(parser)
+    parser.add_argument("--no-token-cache", action="store_true",
+                        help="always call Authorized and GenerateToken, even for cached users")
+    parser.add_argument("--restart", action="store_true",
+                        help="ignore any checkpoint and start from the first user")
+    metrics.add_arguments(parser)
+    results.add_arguments(parser)
+    sharding.add_arguments(parser)
+    args = parser.parse_args(argv)
+    import asyncio
+
+    if sharding.is_requested(args):
+        # Each shard process gets an equal part of the starting rate and the ceiling
+        path = sharding.run_from_arguments(args, login_and_generate_token, fieldnames, "username", args.concurrency,
+                                           init_shard, (args.rate / args.processes, args.max_rate / args.processes,
+                                                        not args.no_token_cache),
+                                           endpoint="login")
+        print(f"Responses have been saved to {path}")
+        return
+
+    global use_token_cache
+    use_token_cache = not args.no_token_cache
+
+    # Keep one pooled connection per worker
+    client.configure(maxsize=max(client.pool_maxsize, args.concurrency))
+    client.set_rate_limiter(ratelimit.from_arguments(args.rate, args.max_rate))
+    with metrics.from_arguments(args):
+        sink = results.open_sink(args.results_db, "login", args.input, args.output)
+        asyncio.run(login_all(args.input, args.output, args.concurrency, resume=not args.restart, sink=sink))
+    print(f"Responses have been saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,20 @@
+import csv
 import pytest
-import requests
 from unittest.mock import patch
 
-# URLs
-login_url = "https://bookstore.toolsqa.com/Account/v1/Authorized"
-generate_token_url = "https://bookstore.toolsqa.com/Account/v1/GenerateToken"
+import login_users
+from bookstore import accounts, api, client, jwtcheck, tokens
 
-headers = {"Content-Type": "application/json"}
+def to_case(row):
+    """Turn a credentials_test.csv row into test arguments."""
+    return (row["username"], row["password"], int(row["expected_status"]), row["expected_message"],
+            row["expected_token_status"], row["expected_token_result"])
 
-def login_user(username, password):
-    """Login and return response."""
-    payload = {"userName": username, "password": password}
-    return requests.post(login_url, json=payload, headers=headers, timeout=10)
-
-def generate_token(username, password):
-    """Generate token and return response."""
-    payload = {"userName": username, "password": password}
-    return requests.post(generate_token_url, json=payload, headers=headers, timeout=10)
-
-@pytest.mark.parametrize("username, password, expected_status, expected_message", [
-    ("PixelPusher22", "KucingMakanTuna22#", 200, "true"),  # Successful login
-    ("invalidUser", "WrongPassword", 404, "User not found!"),  # Invalid credentials
-    ("", "Valid@123", 400, "UserName and Password required."),  # Missing username
-    ("validUser", "", 400, "UserName and Password required.")  # Missing password
-])
-def test_login(username, password, expected_status, expected_message):
-    response = login_user(username, password)
+# Cases are read from credentials_test.csv next to this file, one at a time; {account.*} is a pool account
+@pytest.mark.cases("credentials_test.csv")
+def test_login(case, account):
+    username, password, expected_status, expected_message, _, _ = to_case(accounts.fill(case, account))
+    response = api.authorize(username, password, timeout=10)
 
     # Validate status code
     assert response.status_code == expected_status, (
@@ -45,13 +34,10 @@ def test_login(username, password, expected_status, expected_message):
             f"Expected message '{expected_message}', got '{data.get('message')}'"
         )
 
-@pytest.mark.parametrize("username, password, expected_status, expected_result", [
-    ("PixelPusher22", "KucingMakanTuna22#", "Success", "User authorized successfully."),  # Successful token
-    ("invalidUser", "WrongPassword", "Failed", "User authorization failed."),  # Invalid credentials
-    ("", "Valid@123", "Failed", "UserName and Password required.")  # Missing username
-])
-def test_generate_token(username, password, expected_status, expected_result):
-    response = generate_token(username, password)
+@pytest.mark.cases("credentials_test.csv")
+def test_generate_token(case, account):
+    username, password, _, _, expected_status, expected_result = to_case(accounts.fill(case, account))
+    response = api.generate_token(username, password, timeout=10)
 
     # Validate response content
     try:
@@ -76,16 +62,62 @@ def test_generate_token(username, password, expected_status, expected_result):
     (429, "Too Many Requests")  # Rate limit exceeded
 ])
 def test_uncommon_http_status(mock_status, mock_response_text):
-    with patch("requests.post") as mock_post:
+    with patch("bookstore.client.post") as mock_post:
         mock_post.return_value.status_code = mock_status
         mock_post.return_value.text = mock_response_text
 
         # Test login with simulated error
-        response = login_user("testUser", "testPassword")
+        response = api.authorize("testUser", "testPassword")
         assert response.status_code == mock_status, f"Unexpected status code: {response.status_code}"
         assert response.text == mock_response_text, f"Unexpected response text: {response.text}"
 
         # Test generate token with simulated error
-        response = generate_token("testUser", "testPassword")
+        response = api.generate_token("testUser", "testPassword")
         assert response.status_code == mock_status, f"Unexpected status code: {response.status_code}"
         assert response.text == mock_response_text, f"Unexpected response text: {response.text}"
+
+def test_batch_login_keeps_input_order(tmp_path, monkeypatch, fake_api):
+    """Concurrent batch login writes one row per credential, in input order."""
+    input_path = tmp_path / "credentials.csv"
+    output_path = tmp_path / "responses.csv"
+    users = [f"user{i}" for i in range(25)] + ["unknownUser", ""]
+    with open(input_path, mode="w", newline="") as infile:
+        csv_writer = csv.writer(infile)
+        csv_writer.writerow(["username", "password"])
+        for username in users:
+            csv_writer.writerow([username, "Secret@123"])
+
+    # main() installs a rate limiter; restore the client afterwards
+    monkeypatch.setattr(client, "rate_limiter", None)
+    monkeypatch.setattr(tokens, "_cache", tokens.TokenCache(str(tmp_path / "tokens.sqlite3")))
+    login_users.main(["--input", str(input_path), "--output", str(output_path), "--concurrency", "8"])
+
+    with open(output_path, mode="r") as outfile:
+        rows = list(csv.DictReader(outfile))
+
+    assert [row["username"] for row in rows] == users
+    assert jwtcheck.decode(rows[0]["token"])[1]["userName"] == "user0"
+    assert rows[0]["status"] == "Success"
+    assert rows[-2]["status"] == "Unauthorized"
+    assert rows[-1]["status"] == "Missing username or password"
+
+def test_batch_login_serves_cached_tokens_without_network(tmp_path, monkeypatch, fake_api):
+    """Users with an unexpired cached token are not sent to the API again, unless the password differs."""
+    cache = tokens.TokenCache(str(tmp_path / "tokens.sqlite3"))
+    cache.put("cachedUser", "cached-token", "2999-01-01T00:00:00.000Z", password="Secret@123")
+    monkeypatch.setattr(tokens, "_cache", cache)
+    monkeypatch.setattr(client, "rate_limiter", None)
+
+    input_path = tmp_path / "credentials.csv"
+    output_path = tmp_path / "responses.csv"
+    input_path.write_text("username,password\ncachedUser,Secret@123\ncachedUser,Wrong@123\n")
+
+    login_users.main(["--input", str(input_path), "--output", str(output_path)])
+
+    # Only the row with another password went to the API (Authorized, then GenerateToken)
+    assert [call.kwargs["json"]["password"] for call in fake_api.post_mock.call_args_list] == ["Wrong@123"] * 2
+    with open(output_path, mode="r") as outfile:
+        rows = list(csv.DictReader(outfile))
+    assert rows[0]["token"] == "cached-token"
+    assert rows[0]["status"] == "Success"
+    assert rows[1]["token"] != "cached-token"
@@ -0,0 +1,159 @@
+import argparse
+import asyncio
+import csv
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Reuse the Registration, Login and GetUser scripts and the shared bookstore package
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, ".."))
+for folder in ("Registration", "Login", "GetUser"):
+    sys.path.insert(0, os.path.join(here, "..", folder))
+
+import getusers
+import login_users
+import register_users
+from bookstore import client, metrics, ratelimit, tokens
+
+# File paths
+input_csv = "users.csv"
+output_csv = "pipeline_results.csv"
+
+# Worker threads per stage
+concurrency = 10
+
+# Users waiting between two stages; producers block when a queue is full
+queue_size = 100
+
+# Output columns
+fieldnames = ["userName", "userID", "registration_message", "login_status", "token_status",
+              "getuser_status_code", "books", "completed_stage"]
+
+# Marks the end of a stage's input
+_done = object()
+
+def register_stage(user):
+    """Register the user; users that already exist continue to login."""
+    result = register_users.register_user({"userName": user["userName"], "password": user["password"]})
+    user["registration_message"] = result["message"]
+    if result["status_code"] == 201:
+        user["userID"] = result["userID"]
+    elif "exists" not in str(result["message"]):
+        return user, False
+    user["completed_stage"] = "register"
+    return user, True
+
+def login_stage(user):
+    """Log the user in and generate a token."""
+    result = login_users.login_and_generate_token({"username": user["userName"], "password": user["password"]})
+    user["login_status"] = result["login_status"]
+    user["token_status"] = result["status"]
+    if result["status"] != "Success":
+        return user, False
+    user["token"] = result["token"]
+    user["completed_stage"] = "login"
+    return user, True
+
+def getuser_stage(user):
+    """Fetch the user's details with the fresh token."""
+    if not user.get("userID"):
+        # Users registered in an earlier run are linked to their userID in the token cache
+        cached = tokens.get_cache().get(user["userName"])
+        user["userID"] = cached["user_id"] if cached and cached["user_id"] else ""
+    if not user["userID"]:
+        return user, False
+    result = getusers.fetch_row({"userID": user["userID"], "token": user["token"]})
+    user["getuser_status_code"] = result["status_code"]
+    user["books"] = result["books"]
+    if result["status_code"] != 200:
+        return user, False
+    user["completed_stage"] = "getuser"
+    return user, True
+
+async def _run_stage(func, inbox, outbox, results, executor, workers):
+    """Move users from inbox through func; successes go to outbox, failures to results."""
+    loop = asyncio.get_running_loop()
+
+    async def worker():
+        while True:
+            user = await inbox.get()
+            if user is _done:
+                # Let the other workers of this stage see the end marker too
+                await inbox.put(_done)
+                return
+            try:
+                user, passed = await loop.run_in_executor(executor, func, user)
+            except Exception as e:
+                logging.error(f"{func.__name__} failed for user {user['userName']}: {e}")
+                user["error"] = str(e)
+                passed = False
+            await (outbox if passed else results).put(user)
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    # Earlier stages are finished by now, so this also ends the results for the last stage
+    await outbox.put(_done)
+
+async def run_pipeline(input_path, output_path, concurrency=concurrency, queue_size=queue_size):
+    """Stream every user through register -> login -> getuser and write one row per user.
+
+    Each stage has its own workers and a bounded queue in front of it, so a user
+    moves on as soon as the previous stage finishes with them.
+    """
+    register_queue = asyncio.Queue(maxsize=queue_size)
+    login_queue = asyncio.Queue(maxsize=queue_size)
+    getuser_queue = asyncio.Queue(maxsize=queue_size)
+    results = asyncio.Queue(maxsize=queue_size)
+    stages = [
+        (register_stage, register_queue, login_queue),
+        (login_stage, login_queue, getuser_queue),
+        (getuser_stage, getuser_queue, results),
+    ]
+
+    async def produce():
+        with open(input_path, mode="r") as infile:
+            for row in csv.DictReader(infile):
+                await register_queue.put({
+                    "userName": row.get("userName", ""),
+                    "password": row.get("password", ""),
+                    "userID": "",
+                    "completed_stage": ""
+                })
+        await register_queue.put(_done)
+
+    async def write():
+        with open(output_path, mode="w", newline="") as outfile:
+            csv_writer = csv.DictWriter(outfile, fieldnames=fieldnames, extrasaction="ignore")
+            csv_writer.writeheader()
+            while True:
+                user = await results.get()
+                if user is _done:
+                    return
+                csv_writer.writerow(user)
+
+    with ThreadPoolExecutor(max_workers=concurrency * len(stages)) as executor:
+        stage_tasks = [
+            _run_stage(func, inbox, outbox, results, executor, concurrency)
+            for func, inbox, outbox in stages
+        ]
+        await asyncio.gather(produce(), write(), *stage_tasks)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Register, log in and fetch every user in one streaming pass.")
+    parser.add_argument("--input", default=input_csv, help="input CSV (userName,password)")
+    parser.add_argument("--output", default=output_csv, help="where to write the pipeline results CSV")
+    parser.add_argument("--concurrency", type=int, default=concurrency, help="worker threads per stage")
+    parser.add_argument("--queue-size", type=int, default=queue_size, help="users buffered between stages")
+    ratelimit.add_arguments(parser)
+    metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    client.configure(maxsize=max(client.pool_maxsize, args.concurrency * 3))
+    client.set_rate_limiter(ratelimit.from_arguments(args.rate, args.max_rate))
+    with metrics.from_arguments(args):
+        asyncio.run(run_pipeline(args.input, args.output, args.concurrency, args.queue_size))
+    print(f"Pipeline results have been saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
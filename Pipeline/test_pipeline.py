@@ -0,0 +1,34 @@
+import asyncio
+import csv
+
+import run_pipeline
+from bookstore import client, tokens
+
+def test_pipeline_streams_users_through_all_stages(tmp_path, monkeypatch, fake_api):
+    monkeypatch.setattr(tokens, "_cache", tokens.TokenCache(str(tmp_path / "tokens.sqlite3")))
+    monkeypatch.setattr(client, "rate_limiter", None)
+
+    input_path = tmp_path / "users.csv"
+    output_path = tmp_path / "pipeline_results.csv"
+    names = [f"user{i}" for i in range(20)]
+    with open(input_path, mode="w", newline="") as infile:
+        csv_writer = csv.writer(infile)
+        csv_writer.writerow(["userName", "password"])
+        for name in names:
+            csv_writer.writerow([name, "KucingMakanTuna22#"])
+        csv_writer.writerow(["weakUser", "weakpass"])
+        csv_writer.writerow(["existingUser", "KucingMakanTuna22#"])
+
+    asyncio.run(run_pipeline.run_pipeline(str(input_path), str(output_path), concurrency=4, queue_size=2))
+
+    with open(output_path, mode="r") as outfile:
+        rows = {row["userName"]: row for row in csv.DictReader(outfile)}
+
+    assert len(rows) == len(names) + 2
+    assert all(rows[name]["completed_stage"] == "getuser" for name in names)
+    assert rows["user0"]["userID"] == "id-user0"
+    assert rows["user0"]["getuser_status_code"] == "200"
+    # Rejected before any request goes out
+    assert rows["weakUser"]["completed_stage"] == ""
+    # Logged in, but the userID is unknown so GetUser is skipped
+    assert rows["existingUser"]["completed_stage"] == "login"
@@ -1,119 +1,125 @@
-import requests
+import argparse
+import atexit
 import csv
-import time
-import re  # For password validation
-
-# URL for the registration API
-url = "https://bookstore.toolsqa.com/Account/v1/User"
-
-# Function to validate password
-def is_valid_password(password):
-    """Validates the password based on specified criteria."""
-    if len(password) < 8:
-        return False
-    if not re.search(r'[A-Z]', password):  # Must contain uppercase letter
-        return False
-    if not re.search(r'[a-z]', password):  # Must contain lowercase letter
-        return False
-    if not re.search(r'\d', password):  # Must contain a digit
-        return False
-    if not re.search(r'[^a-zA-Z0-9]', password):  # Must contain a special character
-        return False
-    return True
-
-# Open CSV file to read input data and prepare output file
-with open('users.csv', mode='r') as input_file, open('registration_results.csv', mode='w', newline='') as output_file:
-    csv_reader = csv.DictReader(input_file)
-    fieldnames = ['userName', 'password', 'status_code', 'userID', 'message']  # Add new columns
-    csv_writer = csv.DictWriter(output_file, fieldnames=fieldnames)
-    
-    csv_writer.writeheader()  # Write header to output file
-    
-    for row in csv_reader:
-        user_data = {
-            "userName": row['userName'],
-            "password": row['password']
+import itertools
+import os
+import sys
+
+# Make the shared bookstore package importable when run from this folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bookstore import api, checkpoint, client, metrics, passwords, ratelimit, registry, results, sharding, tokens
+
+# File paths
+input_csv = "users.csv"
+output_csv = "registration_results.csv"
+
+# Output columns
+fieldnames = ['userName', 'password', 'status_code', 'userID', 'message']
+
+# Index of users registered by earlier runs, opened by main(); None checks every user with the API
+registered = None
+
+def register_user(row):
+    """Register one user from the input CSV and return its result row."""
+    user_data = {
+        "userName": row['userName'],
+        "password": row['password']
+    }
+
+    # Check if username or password is empty
+    if not user_data["userName"] or not user_data["password"]:
+        print(f"Skipped user: {user_data['userName']} (Missing username or password)")
+        result_row = {
+            'userName': user_data['userName'],
+            'password': user_data['password'],
+            'status_code': 400,
+            'userID': 'N/A',
+            'message': "User Name and Password required."
         }
+        return result_row
 
-        # Check if username or password is empty
-        if not user_data["userName"] or not user_data["password"]:
-            print(f"Skipped user: {user_data['userName']} (Missing username or password)")
+    # Validate password locally; the API would reject it with the same message
+    if not passwords.is_valid_password(user_data["password"]):
+        print(f"Invalid password for user: {user_data['userName']}")
+        result_row = {
+            'userName': user_data['userName'],
+            'password': user_data['password'],
+            'status_code': 400,
+            'userID': 'N/A',
+            'message': passwords.password_message
+        }
+        return result_row
+
+    # Skip users an earlier run already registered
+    known_id = registered.get(user_data['userName']) if registered is not None else None
+    if known_id is not None:
+        print(f"Skipped user: {user_data['userName']} (Already registered)")
+        return {
+            'userName': user_data['userName'],
+            'password': user_data['password'],
+            'status_code': 'N/A',
+            'userID': known_id or 'N/A',
+            'message': registry.skipped_message
+        }
+
+    # Send POST request
+    try:
+        response = api.register(user_data["userName"], user_data["password"])
+        response_data = response.json()  # Response in JSON format
+    except (client.RequestException, ValueError) as e:
+        # Timeouts, connection errors and an open circuit are recorded, not fatal
+        print(f"Request failed for user: {user_data['userName']} ({e})")
+        return {
+            'userName': user_data['userName'],
+            'password': user_data['password'],
+            'status_code': 'N/A',
+            'userID': 'N/A',
+            'message': str(e)
+        }
+    
+    # Process response based on status code and response body
+    if response.status_code == 201:
+        # Registration successful
+        result_row = {
+            'userName': user_data['userName'],
+            'password': user_data['password'],
+            'status_code': response.status_code,
+            'userID': response_data.get('userID', 'N/A'),
+            'message': "Registration successful"
+        }
+        # Let GetUser find this user's token by userID once they log in
+        tokens.get_cache().set_user_id(user_data['userName'], result_row['userID'])
+    elif response.status_code == 400:
+        if response_data.get("code") == "1204":
+            # User already registered
             result_row = {
                 'userName': user_data['userName'],
                 'password': user_data['password'],
-                'status_code': 400,
+                'status_code': response.status_code,
                 'userID': 'N/A',
-                'message': "User Name and Password required."
+                'message': "User  exists!"
             }
-            csv_writer.writerow(result_row)
-            continue
-
-        # Validate password
-        if not is_valid_password(user_data["password"]):
-            print(f"Invalid password for user: {user_data['userName']}")
+        elif response_data.get("code") == "1200":
+            # Username or password is empty
             result_row = {
                 'userName': user_data['userName'],
                 'password': user_data['password'],
-                'status_code': 400,
+                'status_code': response.status_code,
                 'userID': 'N/A',
-                'message': "Passwords must have at least one non alphanumeric character, one digit ('0'-'9'), one uppercase ('A'-'Z'), one lowercase ('a'-'z'), one special character and Password must be eight characters or longer."
+                'message': "User Name and Password required."
             }
-            csv_writer.writerow(result_row)
-            continue
-
-        # Send POST request
-        response = requests.post(url, json=user_data)
-        response_data = response.json()  # Response in JSON format
-        
-        # Process response based on status code and response body
-        if response.status_code == 201:
-            # Registration successful
+        elif response_data.get("code") == "1300":
+            # Invalid password format
             result_row = {
                 'userName': user_data['userName'],
                 'password': user_data['password'],
                 'status_code': response.status_code,
-                'userID': response_data.get('userID', 'N/A'),
-                'message': "Registration successful"
+                'userID': 'N/A',
+                'message': passwords.password_message
             }
-        elif response.status_code == 400:
-            if response_data.get("code") == "1204":
-                # User already registered
-                result_row = {
-                    'userName': user_data['userName'],
-                    'password': user_data['password'],
-                    'status_code': response.status_code,
-                    'userID': 'N/A',
-                    'message': "User  exists!"
-                }
-            elif response_data.get("code") == "1200":
-                # Username or password is empty
-                result_row = {
-                    'userName': user_data['userName'],
-                    'password': user_data['password'],
-                    'status_code': response.status_code,
-                    'userID': 'N/A',
-                    'message': "User Name and Password required."
-                }
-            elif response_data.get("code") == "1300":
-                # Invalid password format
-                result_row = {
-                    'userName': user_data['userName'],
-                    'password': user_data['password'],
-                    'status_code': response.status_code,
-                    'userID': 'N/A',
-                    'message': "Passwords must have at least one non alphanumeric character, one digit ('0'-'9'), one uppercase ('A'-'Z'), one lowercase ('a'-'z'), one special character and Password must be eight characters or longer."
-                }
-            else:
-                # Other errors
-                result_row = {
-                    'userName': user_data['userName'],
-                    'password': user_data['password'],
-                    'status_code': response.status_code,
-                    'userID': 'N/A',
-                    'message': response_data.get("message", "Unknown error")
-                }
         else:
-            # Handle unexpected status codes
+            # Other errors
             result_row = {
                 'userName': user_data['userName'],
                 'password': user_data['password'],
@@ -121,12 +127,90 @@ with open('users.csv', mode='r') as input_file, open('registration_results.csv',
                 'userID': 'N/A',
                 'message': response_data.get("message", "Unknown error")
             }
+    else:
+        # Handle unexpected status codes
+        result_row = {
+            'userName': user_data['userName'],
+            'password': user_data['password'],
+            'status_code': response.status_code,
+            'userID': 'N/A',
+            'message': response_data.get("message", "Unknown error")
+        }
+
+    # Remember registered users so the next run skips them
+    if registered is not None and (response.status_code == 201 or response_data.get("code") == "1204"):
+        registered.add(user_data['userName'], result_row['userID'])
+
+    # Print result to console
+    print(f"Processed user: {user_data['userName']}, Message: {result_row['message']}")
+
+    return result_row
+
+def init_shard(rate, max_rate, index_path):
+    """Set up a shard process the way main() sets up this one."""
+    global registered
+    client.set_rate_limiter(ratelimit.from_arguments(rate, max_rate))
+    if index_path:
+        registered = registry.RegisteredIndex(index_path)
+        atexit.register(registered.close)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Register users from a CSV file.")
+    parser.add_argument("--input", default=input_csv, help="input CSV (userName,password)")
+    parser.add_argument("--output", default=output_csv, help="where to write the registration results CSV")
+    ratelimit.add_arguments(parser)
+    parser.add_argument("--restart", action="store_true",
+                        help="ignore any checkpoint and start from the first user")
+    parser.add_argument("--index", default=registry.default_path(),
+                        help="index of registered users; known users are skipped without calling the API")
+    parser.add_argument("--no-index", action="store_true",
+                        help="send every user to the API, even ones registered by earlier runs")
+    metrics.add_arguments(parser)
+    results.add_arguments(parser)
+    sharding.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    global registered
+    index_path = None if args.no_index else args.index
+    registered = registry.RegisteredIndex(index_path) if index_path else None
+    if registered is not None:
+        # Pick up users from the previous results before the output is rewritten
+        imported = registered.import_results(args.output)
+        if imported:
+            print(f"Indexed {imported} registered users from {args.output}")
+
+    if sharding.is_requested(args):
+        if registered is not None:
+            # Shard processes open the index themselves
+            registered.close()
+            registered = None
+        # One user at a time per shard, as below; each shard gets an equal part of the rate and the ceiling
+        path = sharding.run_from_arguments(args, register_user, fieldnames, "userName", 1,
+                                           init_shard, (args.rate / args.processes, args.max_rate / args.processes,
+                                                        index_path),
+                                           endpoint="registration")
+        print(f"Results have been saved to {path}")
+        return
+
+    # Throttle requests by the server's responses instead of a fixed sleep
+    client.set_rate_limiter(ratelimit.from_arguments(args.rate, args.max_rate))
+
+    # Stream results to the output file, resuming after the last checkpoint
+    with metrics.from_arguments(args), open(args.input, mode='r') as input_file, \
+            checkpoint.CheckpointedWriter(args.output, fieldnames, input_path=args.input, resume=not args.restart,
+                                          sink=results.open_sink(args.results_db, "registration", args.input,
+                                                                 args.output)) as writer:
+        csv_reader = csv.DictReader(input_file)
+        if writer.resumed:
+            print(f"Resuming after {writer.completed} users already in {args.output}")
+
+        try:
+            for row in itertools.islice(csv_reader, writer.completed, None):
+                writer.record(register_user(row))
+        finally:
+            if registered is not None:
+                registered.close()
+                registered = None
 
-        # Write result to output file
-        csv_writer.writerow(result_row)
-        
-        # Print result to console
-        print(f"Processed user: {user_data['userName']}, Message: {result_row['message']}")
-        
-        # Delay 1 second before processing the next user
-        time.sleep(1)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
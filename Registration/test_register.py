@@ -1,35 +1,30 @@
+import csv
+import sqlite3
+from contextlib import closing
+
 import pytest
-import requests
 from unittest.mock import patch
-import re  # validate password
-
-# URLs
-url = "https://bookstore.toolsqa.com/Account/v1/User"
-
-headers = {"Content-Type": "application/json"}
-
-# Function to validate password
-def is_valid_password(password):
-    """Validates the password based on specified criteria."""
-    return (
-        len(password) >= 8
-        and re.search(r'[A-Z]', password)
-        and re.search(r'[a-z]', password)
-        and re.search(r'\d', password)
-        and re.search(r'[^a-zA-Z0-9]', password)
-    )
-
-@pytest.mark.parametrize("user_data, expected_status_code, expected_message", [
-    ({"userName": "ZulvikaTestke1", "password": "KucingMakanTuna22#"}, 201, "Registration successful"),
-    ({"userName": "", "password": "KucingMakanTuna22#"}, 400, "UserName and Password required."),
-    ({"userName": "ZulvikaTest", "password": ""}, 400, "UserName and Password required."),
-    ({"userName": "ZulvikaTest", "password": "weakpass"}, 400, "Passwords must have at least one non alphanumeric character, one digit ('0'-'9'), one uppercase ('A'-'Z'), one lowercase ('a'-'z'), one special character and Password must be eight characters or longer."),
-    ({"userName": "PixelPusher22", "password": "KucingMakanTuna22#"}, 406, "User exists!"),
-])
-def test_user_registration(user_data, expected_status_code, expected_message):
+
+import register_users
+from bookstore import accounts, api, client
+
+def to_case(row):
+    """Turn a users_test.csv row into test arguments."""
+    return ({"userName": row["userName"], "password": row["password"]},
+            int(row["expected_status_code"]), row["expected_message"])
+
+# Cases are read from users_test.csv next to this file, one at a time; {account.*} is a pool account
+# and {new.username} a name nobody has registered, so reruns don't collide
+@pytest.mark.cases("users_test.csv")
+def test_user_registration(case, account, account_pool):
     """Test user registration with various cases."""
-    response = requests.post(url, json=user_data, headers=headers)
+    user_data, expected_status_code, expected_message = to_case(
+        accounts.fill(case, account, account_pool.new_username()))
+    response = api.register(user_data["userName"], user_data["password"])
     response_data = response.json()
+    if response.status_code == 201:
+        # Deleted with the pool at the end of the run
+        account_pool.track(user_data["userName"], user_data["password"], response_data["userID"])
 
     assert response.status_code == expected_status_code, f"Unexpected status code for {user_data['userName']}"
 
@@ -39,7 +34,7 @@ def test_user_registration(user_data, expected_status_code, expected_message):
     else:
         assert response_data.get("message") == expected_message, f"Unexpected message: {response_data.get('message')}"
 
-@patch("requests.post")
+@patch("bookstore.client.post")
 @pytest.mark.parametrize("mock_status_code, mock_message", [
     (500, "Internal Server Error"),
     (429, "Too Many Requests"),
@@ -50,8 +45,57 @@ def test_uncommon_status_codes(mock_post, mock_status_code, mock_message):
     mock_post.return_value.json.return_value = {"message": mock_message}
 
     user_data = {"userName": "TestUser", "password": "ValidP@ss123"}
-    response = requests.post(url, json=user_data)
+    response = api.register(user_data["userName"], user_data["password"])
 
     assert response.status_code == mock_status_code, f"Unexpected status code: {response.status_code}"
     response_data = response.json()
     assert response_data.get("message") == mock_message, f"Unexpected message: {response_data.get('message')}"
+
+def test_rerun_skips_registered_users_without_network(tmp_path, monkeypatch, fake_api):
+    """Users registered by an earlier run are skipped, even after the index is rebuilt from the results."""
+    monkeypatch.setattr(client, "rate_limiter", None)
+    monkeypatch.setattr(register_users.tokens, "_cache", register_users.tokens.TokenCache(":memory:"))
+    input_path = tmp_path / "users.csv"
+    output_path = tmp_path / "registration_results.csv"
+    input_path.write_text("userName,password\nnewUser1,ValidP@ss123\nnewUser2,ValidP@ss123\n")
+    args = ["--input", str(input_path), "--output", str(output_path), "--rate", "0"]
+
+    register_users.main(args + ["--index", str(tmp_path / "index.sqlite3")])
+    assert fake_api.post_mock.call_count == 2
+    assert register_users.registered is None
+
+    register_users.main(args + ["--index", str(tmp_path / "index.sqlite3"), "--restart"])
+    # A fresh index learns the same users from the previous results file
+    register_users.main(args + ["--index", str(tmp_path / "rebuilt.sqlite3"), "--restart"])
+    assert fake_api.post_mock.call_count == 2
+
+    with open(output_path, newline="") as infile:
+        rows = list(csv.DictReader(infile))
+    assert [(row["userID"], row["message"]) for row in rows] == [
+        ("id-newUser1", "Already registered"), ("id-newUser2", "Already registered")]
+
+def test_shard_processes_share_the_index(local_api, tmp_path, monkeypatch):
+    """Two shard processes register users while both write to the same index."""
+    monkeypatch.setenv("BOOKSTORE_BASE_URL", local_api.base_url)
+    # Shard processes open their own caches; keep them out of the real ~/.bookstore
+    monkeypatch.setenv("BOOKSTORE_TOKEN_CACHE", str(tmp_path / "tokens.sqlite3"))
+    monkeypatch.setenv("BOOKSTORE_REGISTERED_INDEX", str(tmp_path / "registered.sqlite3"))
+    monkeypatch.setattr(register_users, "registered", None)
+    input_path = tmp_path / "users.csv"
+    output_path = tmp_path / "registration_results.csv"
+    index_path = tmp_path / "index.sqlite3"
+    input_path.write_text("userName,password\n" + "".join(f"shardUser{n},ValidP@ss123\n" for n in range(40)))
+
+    register_users.main(["--input", str(input_path), "--output", str(output_path), "--rate", "0",
+                         "--index", str(index_path), "--processes", "2", "--restart"])
+
+    with open(output_path, newline="") as infile:
+        assert [row["status_code"] for row in csv.DictReader(infile)] == ["201"] * 40
+    index = register_users.registry.RegisteredIndex(str(index_path))
+    assert all(f"shardUser{n}" in index for n in range(40))
+    index.close()
+    # The closed index is not left behind for later calls in this process
+    assert register_users.registered is None
+    # The shards linked their users in the token cache named by the environment
+    with closing(sqlite3.connect(tmp_path / "tokens.sqlite3")) as db:
+        assert db.execute("SELECT COUNT(*) FROM tokens WHERE username LIKE 'shardUser%'").fetchone()[0] == 40
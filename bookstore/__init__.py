@@ -0,0 +1 @@
+"""Shared helpers for the Bookstore API batch scripts and tests."""
@@ -0,0 +1,47 @@
+"""One entry point for the batch scripts:
+
+    python -m bookstore register --input Registration/users.csv
+    python -m bookstore login --input Login/credentials.csv --concurrency 50
+    python -m bookstore getuser --input GetUser/input.csv
+    python -m bookstore pipeline --input Registration/users.csv
+
+Each subcommand takes the options of its script (see `python -m bookstore
+login --help`). Only the script that runs is imported.
+"""
+import argparse
+import importlib
+import os
+import sys
+
+# Repository root, holding one folder per script
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# subcommand -> (folder, module, description)
+commands = {
+    "register": ("Registration", "register_users", "register users from a CSV file"),
+    "login": ("Login", "login_users", "log in users from a CSV file and save their tokens"),
+    "getuser": ("GetUser", "getusers", "fetch user details for userID/token pairs"),
+    "pipeline": ("Pipeline", "run_pipeline", "register, log in and fetch every user in one streaming run"),
+}
+
+def load(command):
+    """Import and return the script module behind a subcommand."""
+    folder, module, _ = commands[command]
+    path = os.path.abspath(os.path.join(root, folder))
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    return importlib.import_module(module)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bookstore", description="Run a Bookstore API batch job.")
+    subparsers = parser.add_subparsers(dest="command", required=True, metavar="command")
+    for command, (_, _, description) in commands.items():
+        subparsers.add_parser(command, help=description, add_help=False)
+    args, rest = parser.parse_known_args(argv)
+
+    # The script parses its own options and reports errors under this name
+    sys.argv[0] = f"python -m bookstore {args.command}"
+    load(args.command).main(rest)
+
+if __name__ == "__main__":
+    main()
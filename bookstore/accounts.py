@@ -0,0 +1,163 @@
+"""A pool of throwaway accounts for the API suites, registered once per run.
+
+The first test that asks for an `account` registers `--account-pool` fresh
+accounts at once, concurrently, and logs each one in for a token. Every test
+then gets an account of its own for its duration, so tests never share
+one, and a test that finds the pool empty gets one more registered on the
+spot. Usernames carry a random run prefix, so reruns and parallel workers
+never collide. The accounts are deleted again at the end of the session,
+together with any account a test registers itself and hands to `track()`.
+
+With --cassette the prefix and passwords are fixed instead (`--account-prefix`,
+"cassette" by default), so a recorded run sends the same requests when it
+is replayed.
+
+Case files refer to the pool through placeholders filled in by `fill()`:
+`{account.username}`, `{account.password}`, `{account.user_id}`,
+`{account.token}` and `{new.username}` (a name nobody has registered yet).
+"""
+import hashlib
+import itertools
+import queue
+import secrets
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bookstore import api
+
+# Accounts registered up front
+default_pool_size = 4
+
+# Registrations sent at the same time
+provision_concurrency = 8
+
+# Account prefix used with --cassette when --account-prefix is not given
+cassette_prefix = "cassette"
+
+Account = namedtuple("Account", ["username", "password", "user_id", "token"])
+
+class ProvisioningError(RuntimeError):
+    """Raised when the API refuses to register or log in a pool account."""
+
+def new_password(seed=None, username=""):
+    """A password that passes every rule of the API; the same for the same seed and username."""
+    if seed is None:
+        return f"Pool#{secrets.token_hex(4)}A1"
+    return f"Pool#{hashlib.sha256(f'{seed}:{username}'.encode()).hexdigest()[:8]}A1"
+
+class AccountPool:
+    """Registered accounts handed out to one holder at a time.
+
+    With a fixed prefix the usernames and passwords are the same on every run.
+    """
+
+    def __init__(self, size=default_pool_size, prefix=None, concurrency=provision_concurrency):
+        self.seed = prefix
+        self.prefix = prefix or f"pool{secrets.token_hex(4)}"
+        self.concurrency = concurrency
+        self._numbers = itertools.count()
+        self._lock = threading.Lock()
+        self._idle = queue.SimpleQueue()
+        self.accounts = []
+        self.tracked = []
+        self.add(size)
+
+    def new_username(self):
+        """A username unique to this pool that is not registered yet."""
+        with self._lock:
+            return f"{self.prefix}n{next(self._numbers)}"
+
+    def _provision(self, username):
+        password = new_password(self.seed, username)
+        response = api.register(username, password)
+        if response.status_code != 201:
+            raise ProvisioningError(f"Registering {username} failed: {response.status_code} {response.text}")
+        data = api.generate_token(username, password).json()
+        if data.get("status") != "Success":
+            raise ProvisioningError(f"Logging in {username} failed: {data}")
+        return Account(username, password, response.json()["userID"], data["token"])
+
+    def add(self, count):
+        """Register count more accounts and make them available."""
+        if count < 1:
+            return
+        # Names are taken up front so the accounts keep their order whatever the threads do
+        usernames = [self.new_username() for _ in range(count)]
+        with ThreadPoolExecutor(max_workers=min(count, self.concurrency)) as executor:
+            for account in executor.map(self._provision, usernames):
+                self.accounts.append(account)
+                self._idle.put(account)
+
+    def acquire(self):
+        """Take an account nobody else holds, registering one if all are taken."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            self.add(1)
+            return self._idle.get_nowait()
+
+    def release(self, account):
+        self._idle.put(account)
+
+    def track(self, username, password, user_id):
+        """Delete an account a test registered itself along with the pool's."""
+        with self._lock:
+            self.tracked.append((username, password, user_id))
+
+    def delete_all(self):
+        """Delete every account of the pool and every tracked one; failures are ignored."""
+        for account in self.accounts:
+            try:
+                api.delete_user(account.user_id, account.token)
+            except Exception:
+                pass
+        for username, password, user_id in self.tracked:
+            try:
+                token = api.generate_token(username, password).json()["token"]
+                api.delete_user(user_id, token)
+            except Exception:
+                pass
+
+def fill(row, account=None, new_username=None):
+    """Return row with the account placeholders in its values filled in."""
+    values = {}
+    if account is not None:
+        values.update({f"{{account.{field}}}": value for field, value in account._asdict().items()})
+    if new_username is not None:
+        values["{new.username}"] = new_username
+    filled = {}
+    for key, value in row.items():
+        if isinstance(value, str) and "{" in value:
+            for placeholder, replacement in values.items():
+                value = value.replace(placeholder, replacement)
+        filled[key] = value
+    return filled
+
+def pytest_addoption(parser):
+    parser.addoption("--account-pool", type=int, default=default_pool_size, metavar="N",
+                     help="accounts registered up front for tests that use the account fixture")
+    parser.addoption("--account-prefix", metavar="PREFIX",
+                     help=f"fixed username prefix and password seed for the pool (default with --cassette: "
+                          f"{cassette_prefix}, otherwise random)")
+
+@pytest.fixture(scope="session")
+def account_pool(request):
+    """The accounts of this run, registered on first use and deleted at the end."""
+    prefix = request.config.getoption("--account-prefix")
+    if prefix is None and request.config.getoption("--cassette", default=None):
+        # Parallel workers record their own cassettes, under their own names
+        worker = request.config.getoption("--worker", default=None)
+        prefix = f"{cassette_prefix}w{worker[0]}" if worker else cassette_prefix
+    pool = AccountPool(request.config.getoption("--account-pool"), prefix)
+    yield pool
+    pool.delete_all()
+
+@pytest.fixture
+def account(account_pool):
+    """A registered account with a token, held by this test alone."""
+    held = account_pool.acquire()
+    yield held
+    account_pool.release(held)
@@ -0,0 +1,51 @@
+"""Endpoints of the Bookstore Account API, with one helper per call.
+
+The batch scripts, the pipeline and the tests all build their requests from
+these URLs and headers. Every helper sends through bookstore.client, so calls
+get the shared pool, timeouts, retries, rate limiting and cassettes, and
+extra keyword arguments (e.g. timeout) are passed on to it.
+
+    from bookstore import api
+    response = api.generate_token("PixelPusher22", "KucingMakanTuna22#")
+"""
+from bookstore import client
+
+# URLs, on the production host; client.base_url redirects them when overridden
+account_url = client.default_base_url + "/Account/v1"
+user_url = account_url + "/User"
+login_url = account_url + "/Authorized"
+generate_token_url = account_url + "/GenerateToken"
+
+# Headers for API requests
+headers = {
+    "Content-Type": "application/json"
+}
+
+def bearer_headers(token):
+    """Headers for a call authorized with token."""
+    return {**headers, "Authorization": f"Bearer {token}"}
+
+def credentials(username, password):
+    return {"userName": username, "password": password}
+
+def register(username, password, **kwargs):
+    """POST Account/v1/User."""
+    return client.post(user_url, json=credentials(username, password), headers=headers, **kwargs)
+
+def authorize(username, password, **kwargs):
+    """POST Account/v1/Authorized; safe to retry."""
+    kwargs.setdefault("idempotent", True)
+    return client.post(login_url, json=credentials(username, password), headers=headers, **kwargs)
+
+def generate_token(username, password, **kwargs):
+    """POST Account/v1/GenerateToken; safe to retry."""
+    kwargs.setdefault("idempotent", True)
+    return client.post(generate_token_url, json=credentials(username, password), headers=headers, **kwargs)
+
+def get_user(user_id, token, **kwargs):
+    """GET Account/v1/User/{userID} with a bearer token."""
+    return client.get(f"{user_url}/{user_id}", headers=bearer_headers(token), **kwargs)
+
+def delete_user(user_id, token, **kwargs):
+    """DELETE Account/v1/User/{userID} with a bearer token."""
+    return client.request("DELETE", f"{user_url}/{user_id}", headers=bearer_headers(token), **kwargs)
@@ -0,0 +1,125 @@
+"""Record and replay Bookstore API interactions.
+
+In record mode every request sent through bookstore.client is stored as one
+compact JSON line. In replay mode the cassette is loaded into an in-memory
+index and requests are answered from it without touching the network.
+Requests are matched on method, URL, body and Authorization header (GetUser
+calls differ only by their bearer token). Identical requests are replayed in
+the order they were recorded, and the last answer repeats once they run out.
+"""
+import json
+import os
+import threading
+from collections import defaultdict, deque
+from datetime import timedelta
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Response headers worth keeping in a cassette
+kept_headers = ("Content-Type", "Retry-After")
+
+# The cassette in use, or None
+active = None
+
+class CassetteMiss(requests.exceptions.RequestException):
+    """Raised in replay mode for a request the cassette has no answer for."""
+
+def request_key(method, url, kwargs):
+    """Return the match key of a request as sent to bookstore.client.request."""
+    if kwargs.get("json") is not None:
+        body = json.dumps(kwargs["json"], sort_keys=True, separators=(",", ":"))
+    else:
+        data = kwargs.get("data")
+        body = data.decode() if isinstance(data, bytes) else (data or "")
+    headers = CaseInsensitiveDict(kwargs.get("headers") or {})
+    return method.upper(), url, body, headers.get("Authorization", "")
+
+class Cassette:
+    """JSONL cassette in "record" or "replay" mode."""
+
+    def __init__(self, path, mode="replay"):
+        if mode not in ("record", "replay"):
+            raise ValueError("mode must be 'record' or 'replay'")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._index = defaultdict(deque)
+        self._file = None
+        if mode == "record":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = open(path, mode="w")
+        else:
+            self._load()
+
+    def _load(self):
+        with open(self.path, mode="r") as infile:
+            for line in infile:
+                if line.strip():
+                    entry = json.loads(line)
+                    key = (entry["method"], entry["url"], entry["body"], entry.get("auth", ""))
+                    self._index[key].append(entry)
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._index.values())
+
+    def record(self, method, url, kwargs, response):
+        """Append one interaction to the cassette."""
+        method, url, body, auth = request_key(method, url, kwargs)
+        entry = {
+            "method": method,
+            "url": url,
+            "body": body,
+            "auth": auth,
+            "status": response.status_code,
+            "headers": {name: response.headers[name] for name in kept_headers if name in response.headers},
+            "content": response.content.decode("utf-8", errors="replace")
+        }
+        line = json.dumps(entry, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def replay(self, method, url, kwargs):
+        """Return the recorded response for a request, or raise CassetteMiss."""
+        key = request_key(method, url, kwargs)
+        with self._lock:
+            entries = self._index.get(key)
+            if not entries:
+                raise CassetteMiss(f"No recorded response for {key[0]} {key[1]} in {self.path}")
+            entry = entries.popleft() if len(entries) > 1 else entries[0]
+
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response._content = entry["content"].encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = url
+        response.reason = "Replayed"
+        response.elapsed = timedelta(0)
+        return response
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def use(path, mode="replay"):
+    """Start recording to or replaying from path for every bookstore.client request."""
+    global active
+    eject()
+    active = Cassette(path, mode)
+    return active
+
+def eject():
+    """Stop using the active cassette."""
+    global active
+    if active is not None:
+        active.close()
+        active = None
+
+def use_from_environment():
+    """Activate the cassette named by BOOKSTORE_CASSETTE (mode from BOOKSTORE_CASSETTE_MODE)."""
+    path = os.environ.get("BOOKSTORE_CASSETTE")
+    if path:
+        use(path, os.environ.get("BOOKSTORE_CASSETTE_MODE", "replay"))
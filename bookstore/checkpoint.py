@@ -0,0 +1,116 @@
+"""Streaming CSV output with checkpoints so long batch runs can resume.
+
+Rows are written as soon as they are ready and flushed to disk every
+`flush_every` input rows. After each flush a small JSON checkpoint records
+how many input rows are done and how long the output file was at that point.
+A rerun truncates the output back to that length (dropping rows written after
+the last checkpoint) and skips the input rows that are already done.
+
+An optional result sink (see bookstore.results) receives every output row and
+is flushed with each checkpoint; a resumed run continues the sink's run.
+"""
+import csv
+import json
+import os
+
+from bookstore import metrics
+
+# Input rows processed between flushes
+default_flush_every = 100
+
+class CheckpointedWriter:
+    """CSV writer that streams rows to disk and remembers its progress."""
+
+    def __init__(self, output_path, fieldnames, input_path=None, checkpoint_path=None,
+                 flush_every=default_flush_every, resume=True, sink=None):
+        self.output_path = output_path
+        self.fieldnames = fieldnames
+        self.input_path = os.path.abspath(input_path) if input_path else None
+        self.checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+        self.flush_every = flush_every
+        self.completed = 0
+        self.sink = sink
+        self._file = None
+        self._writer = None
+        self._open(resume)
+
+    def _load_checkpoint(self):
+        """Return the saved checkpoint, or None if it is missing or doesn't match."""
+        try:
+            with open(self.checkpoint_path, mode="r") as infile:
+                checkpoint = json.load(infile)
+        except (OSError, ValueError):
+            return None
+        if checkpoint.get("input") != self.input_path or not os.path.exists(self.output_path):
+            return None
+        if os.path.getsize(self.output_path) < checkpoint.get("offset", 0):
+            return None
+        return checkpoint
+
+    def _open(self, resume):
+        checkpoint = self._load_checkpoint() if resume else None
+        if checkpoint:
+            self._file = open(self.output_path, mode="r+", newline="")
+            self._file.truncate(checkpoint["offset"])
+            self._file.seek(checkpoint["offset"])
+            self.completed = checkpoint["completed"]
+            if self.sink is not None and checkpoint.get("run_id") is not None:
+                self.sink.resume(checkpoint["run_id"])
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+        else:
+            self._file = open(self.output_path, mode="w", newline="")
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+            self._writer.writeheader()
+            self.flush()
+
+    @property
+    def resumed(self):
+        """True if this run continues an earlier one."""
+        return self.completed > 0
+
+    def record(self, row):
+        """Mark one input row as done, writing its output row unless it is None."""
+        if row is not None:
+            with metrics.timer("csv_write"):
+                self._writer.writerow(row)
+            if self.sink is not None:
+                self.sink.add(row)
+        self.completed += 1
+        if self.completed % self.flush_every == 0:
+            self.flush()
+
+    def flush(self):
+        """Write buffered rows to disk, then save the checkpoint."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        checkpoint = {
+            "input": self.input_path,
+            "completed": self.completed,
+            "offset": self._file.tell()
+        }
+        if self.sink is not None:
+            self.sink.flush()
+            checkpoint["run_id"] = self.sink.run_id
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, mode="w") as outfile:
+            json.dump(checkpoint, outfile)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def close(self, finished=True):
+        """Flush and close the output. A finished run removes its checkpoint."""
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+        if self.sink is not None:
+            self.sink.close(finished)
+        if finished and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Keep the checkpoint when the run stops early so the next one can resume
+        self.close(finished=exc_type is None)
@@ -0,0 +1,147 @@
+"""Pooled keep-alive HTTP client shared by the batch scripts and tests.
+
+All API calls go through one `requests.Session`, so connections to
+bookstore.toolsqa.com are reused instead of paying a new TCP+TLS handshake
+per request.
+
+`requests`, and the cassette and resilience modules built on it, are imported
+when the first request is sent, so importing this module (and the scripts and
+tests that do) stays cheap.
+"""
+import os
+import threading
+import time
+
+from bookstore import metrics
+
+# Production API; requests to it can be redirected to a local stand-in server
+default_base_url = "https://bookstore.toolsqa.com"
+base_url = os.environ.get("BOOKSTORE_BASE_URL", default_base_url).rstrip("/")
+
+# Number of hosts to keep a connection pool for
+pool_connections = int(os.environ.get("BOOKSTORE_POOL_CONNECTIONS", 10))
+
+# Maximum keep-alive connections per host
+pool_maxsize = int(os.environ.get("BOOKSTORE_POOL_MAXSIZE", 20))
+
+# Wait for a free connection instead of going over the per-host limit
+pool_block = True
+
+# Optional bookstore.ratelimit.AdaptiveRateLimiter applied to every request
+rate_limiter = None
+
+# Optional callable(method, url, response, seconds) told about every response, e.g. by the test reporter
+observer = None
+
+_session = None
+_session_lock = threading.Lock()
+
+def _new_session():
+    """Create a session with keep-alive pools mounted for http and https."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+    if metrics.recorder is not None:
+        # Let new connections report their connect and TLS time
+        adapter.poolmanager.pool_classes_by_scheme = metrics.timed_pool_classes()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def get_session():
+    """Return the process-wide session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _new_session()
+    return _session
+
+def configure(connections=None, maxsize=None):
+    """Change the pool limits; the next request opens a fresh session."""
+    global pool_connections, pool_maxsize
+    if connections is not None:
+        pool_connections = connections
+    if maxsize is not None:
+        pool_maxsize = maxsize
+    close()
+
+def close():
+    """Close every pooled connection."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+def set_rate_limiter(limiter):
+    """Throttle every request with limiter, or pass None to stop throttling."""
+    global rate_limiter
+    rate_limiter = limiter
+
+def resolve_url(url):
+    """Point URLs of the production API at base_url when it is overridden."""
+    if base_url != default_base_url and url.startswith(default_base_url):
+        return base_url + url[len(default_base_url):]
+    return url
+
+def request(method, url, idempotent=None, **kwargs):
+    """Send a request through the shared session.
+
+    Calls get the default timeouts, retries and circuit breaker from
+    bookstore.resilience. Pass idempotent=True for POSTs that are safe to repeat.
+    With a cassette in use, calls are recorded, or answered from it in replay mode.
+    """
+    from bookstore import cassette, resilience
+
+    watcher = observer
+    start = time.perf_counter() if watcher is not None else 0.0
+    tape = cassette.active
+    if tape is not None and tape.mode == "replay":
+        response = tape.replay(method, url, kwargs)
+    else:
+        target = resolve_url(url)
+        kwargs.setdefault("timeout", resilience.timeout)
+        response = resilience.call(method, lambda: _send(method, target, **kwargs), idempotent)
+        if tape is not None:
+            tape.record(method, url, kwargs, response)
+    if watcher is not None:
+        watcher(method, url, response, time.perf_counter() - start)
+    return response
+
+def _send(method, url, **kwargs):
+    """Send one attempt, applying the rate limiter and metrics."""
+    limiter = rate_limiter
+    if limiter is not None:
+        limiter.acquire()
+    session = get_session()
+    recorder = metrics.recorder
+    if recorder is None:
+        response = session.request(method, url, **kwargs)
+    else:
+        response = recorder.time_request(method, url, lambda: session.request(method, url, **kwargs))
+    if limiter is not None:
+        limiter.record_response(response)
+    return response
+
+def get(url, **kwargs):
+    """Send a GET request through the shared session."""
+    return request("GET", url, **kwargs)
+
+def post(url, **kwargs):
+    """Send a POST request through the shared session."""
+    return request("POST", url, **kwargs)
+
+def __getattr__(name):
+    # client.RequestException, for except clauses that shouldn't import requests up front
+    if name == "RequestException":
+        import requests
+        return requests.RequestException
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Record or replay when BOOKSTORE_CASSETTE is set
+if os.environ.get("BOOKSTORE_CASSETTE"):
+    from bookstore import cassette
+    cassette.use_from_environment()
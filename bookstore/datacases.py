@@ -0,0 +1,145 @@
+"""Data-driven test cases streamed from CSV or JSONL files.
+
+A test takes a `case` argument and names its case file with the `cases`
+marker; the path is relative to the test module, not the working directory:
+
+    @pytest.mark.cases("input_test.csv", convert=to_case)
+    def test_get_user_details(case):
+        user_id, token, expected_status_code, expected_message = case
+
+Collection only scans the file for the byte offset of every record, so a
+test gets one item per case with a deterministic ID (`input_test.csv#42`)
+without any rows being parsed or kept in memory. Each case is read from its
+offset when the test runs, and passed through convert when one is given
+(CSV rows arrive as dicts of strings, JSONL rows as decoded objects).
+
+Large files can be cut down before the items are created:
+
+    pytest --cases 1000:2000      # only cases 1000 to 1999 of every case file
+    pytest --case-shard 2/8       # the third of eight contiguous slices
+
+The shard is taken from the selected range, so machines running
+--case-shard 0/8 to 7/8 together run every case exactly once.
+"""
+import csv
+import io
+import json
+import os
+from array import array
+
+import pytest
+
+# Case files already scanned in this session, by absolute path
+_files = {}
+
+class CaseFile:
+    """Byte-offset index of the records in a CSV or JSONL case file."""
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.name = os.path.basename(path)
+        self.jsonl = path.endswith((".jsonl", ".ndjson"))
+        self.fieldnames = None
+        self._offsets = array("q")
+        self._scan()
+
+    def _records(self, infile):
+        """Yield (offset, raw record) for every non-blank record, keeping quoted newlines inside CSV records."""
+        offset = infile.tell()
+        record = b""
+        for line in iter(infile.readline, b""):
+            record += line
+            if not self.jsonl and record.count(b'"') % 2:
+                continue
+            if record.strip():
+                yield offset, record
+            offset += len(record)
+            record = b""
+        if record.strip():
+            yield offset, record
+
+    def _scan(self):
+        with open(self.path, mode="rb") as infile:
+            records = self._records(infile)
+            if not self.jsonl:
+                _, header = next(records, (0, b""))
+                self.fieldnames = next(csv.reader(io.StringIO(header.decode("utf-8-sig"))), [])
+            for offset, _ in records:
+                self._offsets.append(offset)
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def ids(self, indices):
+        return [f"{self.name}#{index}" for index in indices]
+
+    def read(self, index):
+        """Parse and return case index: a dict for CSV, the decoded object for JSONL."""
+        with open(self.path, mode="rb") as infile:
+            infile.seek(self._offsets[index])
+            _, record = next(self._records(infile))
+        text = record.decode("utf-8")
+        if self.jsonl:
+            return json.loads(text)
+        values = next(csv.reader(io.StringIO(text)))
+        return dict(zip(self.fieldnames, values))
+
+def case_file(path):
+    """Return the (shared) index of the case file at path."""
+    path = os.path.abspath(path)
+    if path not in _files:
+        _files[path] = CaseFile(path)
+    return _files[path]
+
+def parse_range(text):
+    """Parse START:END (either side may be empty) into a slice."""
+    start, separator, end = (text or "").partition(":")
+    if not separator:
+        raise ValueError(f"Case range {text!r} must look like START:END, e.g. 1000:2000")
+    return slice(int(start) if start else None, int(end) if end else None)
+
+def parse_shard(text):
+    """Parse I/N into (shard index, shard count), with 0 <= I < N."""
+    index, separator, count = (text or "").partition("/")
+    if not separator or not 0 <= int(index) < int(count):
+        raise ValueError(f"Case shard {text!r} must look like I/N with 0 <= I < N, e.g. 2/8")
+    return int(index), int(count)
+
+def select(count, case_range=None, shard=None):
+    """Return the case indices to run out of count, as a range."""
+    indices = range(count)[case_range] if case_range else range(count)
+    if shard:
+        index, shard_count = shard
+        indices = indices[len(indices) * index // shard_count:len(indices) * (index + 1) // shard_count]
+    return indices
+
+def pytest_addoption(parser):
+    group = parser.getgroup("datacases", "data-driven test cases")
+    group.addoption("--cases", metavar="START:END", type=parse_range,
+                    help="only run cases START to END-1 of every case file")
+    group.addoption("--case-shard", metavar="I/N", type=parse_shard,
+                    help="only run the I-th of N contiguous slices of the selected cases (0-based)")
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "cases(path, convert=None): take the `case` argument from a CSV/JSONL file")
+
+def _marked_file(node):
+    marker = node.get_closest_marker("cases")
+    path = marker.args[0]
+    if not os.path.isabs(path):
+        path = os.path.join(os.path.dirname(str(node.path)), path)
+    return case_file(path), marker.kwargs.get("convert")
+
+def pytest_generate_tests(metafunc):
+    if "case" not in metafunc.fixturenames or metafunc.definition.get_closest_marker("cases") is None:
+        return
+    cases, _ = _marked_file(metafunc.definition)
+    indices = select(len(cases), metafunc.config.getoption("--cases"), metafunc.config.getoption("--case-shard"))
+    metafunc.parametrize("case", indices, ids=cases.ids(indices), indirect=True)
+
+@pytest.fixture
+def case(request):
+    """The current case, read from its file when the test runs."""
+    cases, convert = _marked_file(request.node)
+    row = cases.read(request.param)
+    return convert(row) if convert else row
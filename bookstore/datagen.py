@@ -0,0 +1,250 @@
+"""Seeded synthetic inputs for the Registration, Login and GetUser scripts.
+
+One pass over a stream of synthetic users writes any of the three files, row
+by row, so files of any size are written without holding them in memory:
+
+    python -m bookstore.datagen --rows 1000000 --seed 7 \\
+        --users users_big.csv --credentials credentials_big.csv --getuser input_test_big.csv
+
+Every row carries the status and message the API is expected to answer with,
+in the columns the data-driven tests use. The mix is configurable:
+
+- invalid: passwords that break one of the API's rules in users.csv, wrong
+  passwords in credentials.csv, unknown userIDs or malformed tokens in the
+  GetUser file
+- missing: rows with an empty userName/username, password or token
+- duplicates: copies of an earlier valid row (406 "User exists!" on registration)
+
+Rows of the three files line up: user n of credentials.csv is user n of
+users.csv, and only users whose registration is expected to succeed can log
+in or be looked up. userIDs and tokens are generated too, so the GetUser
+expectations hold on a stand-in server seeded with `seed_server()`; tokens
+are signed with a key of our own, which the real API rejects.
+
+The same seed, row count and mix always give the same files.
+"""
+import argparse
+import base64
+import csv
+import hashlib
+import hmac
+import json
+import random
+import string
+import itertools
+import time
+from collections import deque
+
+from bookstore import passwords
+
+# Expected answers, as the data-driven tests spell them
+registered_message = "Registration successful"
+exists_message = "User exists!"
+not_found_message = "User not found!"
+not_authorized_message = "User not authorized!"
+found_message = "Valid response"
+authorized_result = "User authorized successfully."
+authorization_failed_result = "User authorization failed."
+
+# Columns of each file
+users_fieldnames = ["userName", "password", "expected_status_code", "expected_message"]
+credentials_fieldnames = ["username", "password", "expected_status", "expected_message",
+                          "expected_token_status", "expected_token_result"]
+getuser_fieldnames = ["userID", "token", "expected_status_code", "expected_message"]
+
+# Default share of invalid, missing and duplicate rows
+default_invalid = 0.1
+default_missing = 0.02
+default_duplicates = 0.01
+
+# Distinct passwords drawn per kind; rows pick from these pools
+pool_size = 1024
+
+# Earlier valid rows that duplicates are copied from
+recent_size = 1024
+
+# Rows written per writerows() call
+chunk_size = 4096
+
+# Special characters used in passwords; none of them needs quoting in CSV or JSON
+_specials = "!#$%&*+-=?@^_~"
+
+def _uuid4(bits):
+    """Format 128 random bits as a version 4 UUID, without building a uuid.UUID."""
+    bits = (bits & ~(0xf000 << 64) | (0x4000 << 64)) & ~(0xc000 << 48) | (0x8000 << 48)
+    text = f"{bits:032x}"
+    return f"{text[:8]}-{text[8:12]}-{text[12:16]}-{text[16:20]}-{text[20:]}"
+
+def _json_string(text):
+    """JSON string literal of text; plain ASCII is quoted as is instead of going through json.dumps."""
+    if text.isascii() and text.isprintable() and '"' not in text and "\\" not in text:
+        return f'"{text}"'
+    return json.dumps(text)
+
+def _valid_password(rng):
+    """A password that passes every rule: 8 to 16 characters with all four classes."""
+    chars = [rng.choice(string.ascii_uppercase), rng.choice(string.ascii_lowercase),
+             rng.choice(string.digits), rng.choice(_specials)]
+    chars += rng.choices(string.ascii_letters + string.digits + _specials, k=rng.randint(4, 12))
+    rng.shuffle(chars)
+    return "".join(chars)
+
+def _invalid_password(rng):
+    """A password that breaks one rule: too short, or missing one character class."""
+    classes = [string.ascii_uppercase, string.ascii_lowercase, string.digits, _specials]
+    rule = rng.randrange(len(classes) + 1)
+    if rule == len(classes):
+        return "".join(rng.choice(group) for group in classes) + rng.choice(string.ascii_lowercase) * rng.randint(0, 3)
+    kept = [group for index, group in enumerate(classes) if index != rule]
+    chars = [rng.choice(group) for group in kept] + rng.choices("".join(kept), k=rng.randint(5, 12))
+    rng.shuffle(chars)
+    return "".join(chars)
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+class TokenMaker:
+    """JWTs shaped like the API's (HS256, userName/password/iat claims), signed with our own key."""
+
+    def __init__(self, seed, issued_at):
+        self._key = f"bookstore-datagen-{seed}".encode()
+        self._header = _b64(b'{"alg":"HS256","typ":"JWT"}')
+        self.issued_at = int(issued_at)
+
+    def make(self, username, password):
+        claims = f'{{"userName":{_json_string(username)},"password":{_json_string(password)},"iat":{self.issued_at}}}'
+        signing_input = f"{self._header}.{_b64(claims.encode())}"
+        signature = hmac.digest(self._key, signing_input.encode(), hashlib.sha256)
+        return f"{signing_input}.{_b64(signature)}"
+
+def users(rows, seed=0, invalid=default_invalid, missing=default_missing, duplicates=default_duplicates,
+          prefix="user"):
+    """Yield rows synthetic users as dicts with userName, password, userID and the registration outcome.
+
+    "registered" is true for the users whose registration is expected to succeed.
+    """
+    rng = random.Random(f"{seed}:users")
+    valid_pool = [_valid_password(rng) for _ in range(pool_size)]
+    invalid_pool = [_invalid_password(rng) for _ in range(pool_size)]
+    recent = deque(maxlen=recent_size)
+
+    for number in range(rows):
+        draw = rng.random()
+        user_id = _uuid4(rng.getrandbits(128))
+        username = f"{prefix}{number}"
+        if draw < duplicates and recent:
+            user = dict(rng.choice(recent), registered=False, status=406, message=exists_message)
+        elif draw < duplicates + missing:
+            password = rng.choice(valid_pool)
+            username, password = ("", password) if rng.random() < 0.5 else (username, "")
+            user = {"userName": username, "password": password, "userID": user_id, "registered": False,
+                    "status": 400, "message": passwords.required_message}
+        elif draw < duplicates + missing + invalid:
+            user = {"userName": username, "password": rng.choice(invalid_pool), "userID": user_id,
+                    "registered": False, "status": 400, "message": passwords.password_message}
+        else:
+            user = {"userName": username, "password": rng.choice(valid_pool), "userID": user_id,
+                    "registered": True, "status": 201, "message": registered_message}
+            recent.append(user)
+        yield user
+
+def users_row(user):
+    return [user["userName"], user["password"], user["status"], user["message"]]
+
+def credentials_row(user, rng, invalid):
+    """The login case of one user, with the answers of Authorized and GenerateToken."""
+    username, password = user["userName"], user["password"]
+    if not username or not password:
+        return [username, password, 400, passwords.required_message, "Failed", passwords.required_message]
+    if user["registered"] or user["status"] == 406:
+        if rng.random() >= invalid:
+            return [username, password, 200, "true", "Success", authorized_result]
+        password = password[::-1] + "x"
+    return [username, password, 404, not_found_message, "Failed", authorization_failed_result]
+
+def getuser_row(user, rng, invalid, missing, tokens):
+    """The GetUser case of one user."""
+    username, user_id = user["userName"], user["userID"]
+    if not username or not user["password"] or rng.random() < missing:
+        return [user_id, "", 401, not_authorized_message]
+    token = tokens.make(username, user["password"])
+    if not (user["registered"] or user["status"] == 406):
+        # The stand-in doesn't know this user, whatever the token says
+        return [user_id, token, 401, not_authorized_message]
+    if rng.random() < invalid:
+        if rng.random() < 0.5:
+            return [_uuid4(rng.getrandbits(128)), token, 401, not_found_message]
+        return [user_id, token.split(".", 1)[0] + ".not-a-token", 401, not_authorized_message]
+    return [user_id, token, 200, found_message]
+
+def generate(rows, seed=0, users_path=None, credentials_path=None, getuser_path=None,
+             invalid=default_invalid, missing=default_missing, duplicates=default_duplicates,
+             prefix="user", issued_at=None):
+    """Write the requested files (any of them may be None) in one pass over the users."""
+    tokens = TokenMaker(seed, time.time() if issued_at is None else issued_at)
+    credentials_rng = random.Random(f"{seed}:credentials")
+    getuser_rng = random.Random(f"{seed}:getuser")
+    files = []
+    try:
+        writers = []
+        for path, fieldnames in ((users_path, users_fieldnames), (credentials_path, credentials_fieldnames),
+                                 (getuser_path, getuser_fieldnames)):
+            writer = None
+            if path:
+                files.append(open(path, mode="w", newline="", buffering=1 << 20))
+                writer = csv.writer(files[-1])
+                writer.writerow(fieldnames)
+            writers.append(writer)
+        users_writer, credentials_writer, getuser_writer = writers
+
+        stream = users(rows, seed, invalid, missing, duplicates, prefix)
+        while chunk := list(itertools.islice(stream, chunk_size)):
+            if users_writer:
+                users_writer.writerows([users_row(user) for user in chunk])
+            if credentials_writer:
+                credentials_writer.writerows([credentials_row(user, credentials_rng, invalid) for user in chunk])
+            if getuser_writer:
+                getuser_writer.writerows([getuser_row(user, getuser_rng, invalid, missing, tokens) for user in chunk])
+    finally:
+        for outfile in files:
+            outfile.close()
+
+def seed_server(server, rows, seed=0, invalid=default_invalid, missing=default_missing,
+                duplicates=default_duplicates, prefix="user"):
+    """Create the accounts that registration is expected to create, with their generated userIDs.
+
+    Use it on a LocalBookstoreServer to run credentials.csv and the GetUser file
+    against it without registering first.
+    """
+    for user in users(rows, seed, invalid, missing, duplicates, prefix):
+        if user["registered"]:
+            server.add_user(user["userName"], user["password"], user["userID"])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write seeded synthetic inputs for the batch scripts.")
+    parser.add_argument("--rows", type=int, required=True, help="users to generate; each file gets one row per user")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--users", help="write Registration users here (userName,password,expected_...)")
+    parser.add_argument("--credentials", help="write Login credentials here (username,password,expected_...)")
+    parser.add_argument("--getuser", help="write GetUser cases here (userID,token,expected_...)")
+    parser.add_argument("--invalid", type=float, default=default_invalid,
+                        help="share of invalid passwords, wrong passwords and bad userIDs/tokens")
+    parser.add_argument("--missing", type=float, default=default_missing, help="share of rows with an empty field")
+    parser.add_argument("--duplicates", type=float, default=default_duplicates,
+                        help="share of users.csv rows repeating an earlier user")
+    parser.add_argument("--prefix", default="user", help="username prefix; change it to get fresh accounts")
+    parser.add_argument("--issued-at", type=int, help="iat of the generated tokens (default: now)")
+    args = parser.parse_args(argv)
+    if not (args.users or args.credentials or args.getuser):
+        parser.error("give at least one of --users, --credentials and --getuser")
+    if args.invalid + args.missing + args.duplicates > 1:
+        parser.error("--invalid, --missing and --duplicates add up to more than 1")
+
+    start = time.perf_counter()
+    generate(args.rows, args.seed, args.users, args.credentials, args.getuser, args.invalid, args.missing,
+             args.duplicates, args.prefix, args.issued_at)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {args.rows} rows per file in {elapsed:.1f}s ({args.rows / elapsed:.0f} rows/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Asyncio batch engine for running per-row API work concurrently.
+
+asyncio is imported when a batch starts, not with this module, to keep the
+scripts' startup (and --help) cheap.
+"""
+from collections import deque
+
+# Default number of rows processed at the same time
+default_concurrency = 20
+
+async def run_ordered(func, items, concurrency=default_concurrency):
+    """Run func(item) for every item and yield (item, result) in input order.
+
+    Each call runs in a worker thread, so blocking HTTP helpers can be reused
+    as they are. At most `concurrency` calls run at once, and only a small
+    window of finished results is held back to keep the output ordered.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    loop = asyncio.get_running_loop()
+    window = concurrency * 2
+    pending = deque()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        try:
+            for item in items:
+                pending.append((item, loop.run_in_executor(executor, func, item)))
+                if len(pending) >= window:
+                    head_item, head = pending.popleft()
+                    yield head_item, await head
+
+            while pending:
+                head_item, head = pending.popleft()
+                yield head_item, await head
+        finally:
+            # Don't start rows that were queued when the caller stopped early
+            for _, future in pending:
+                future.cancel()
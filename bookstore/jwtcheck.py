@@ -0,0 +1,99 @@
+"""Local checks of the API's bearer tokens, without any network call.
+
+GenerateToken returns HS256 JWTs whose payload holds `userName`, `password`
+and `iat`, together with an `expires` time about a week later. The signature
+can't be checked without the server's secret, but a token that doesn't
+decode, belongs to someone else or has expired is certain to get a 401, so
+GetUser can classify those rows (or swap in a fresh cached token) instead of
+sending them.
+
+    python -m bookstore.jwtcheck GetUser/input.csv
+"""
+import argparse
+import base64
+import binascii
+import csv
+import json
+import time
+from collections import Counter
+from datetime import timedelta
+
+from bookstore.tokens import parse_expires
+
+# How long tokens stay valid when no `expires` came with them
+token_lifetime = timedelta(days=7).total_seconds()
+
+# Tolerated difference between our clock and the server's, in seconds
+clock_skew = 300
+
+# Results of inspect()
+valid = "valid"
+malformed = "malformed"
+expired = "expired"
+wrong_user = "wrong user"
+
+class MalformedToken(ValueError):
+    """Raised by decode() for a string that is not one of the API's JWTs."""
+
+def _b64_decode(segment):
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+def decode(token):
+    """Return the (header, claims) of a token without verifying its signature."""
+    parts = (token or "").split(".")
+    if len(parts) != 3 or not all(parts):
+        raise MalformedToken("not a JWT, expected header.payload.signature")
+    try:
+        header = json.loads(_b64_decode(parts[0]))
+        claims = json.loads(_b64_decode(parts[1]))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise MalformedToken("header or payload is not base64url-encoded JSON") from None
+    if not isinstance(header, dict) or header.get("alg") != "HS256":
+        raise MalformedToken("unsupported algorithm")
+    if not isinstance(claims, dict) or not isinstance(claims.get("userName"), str) \
+            or not isinstance(claims.get("iat"), int):
+        raise MalformedToken("missing userName or iat claim")
+    return header, claims
+
+def inspect(token, expires=None, username=None, now=None, margin=0):
+    """Classify a token as valid, malformed, expired or wrong user.
+
+    Expiry is taken from `expires` as returned by GenerateToken when given,
+    otherwise from `iat` plus the usual lifetime. Tokens expiring within
+    margin seconds count as expired. Returns a dict with the result, a reason
+    and the decoded userName/iat/expires_at where available.
+    """
+    now = time.time() if now is None else now
+    try:
+        _, claims = decode(token)
+    except MalformedToken as e:
+        return {"result": malformed, "reason": str(e), "username": None, "issued_at": None, "expires_at": None}
+
+    issued_at = claims["iat"]
+    expires_at = parse_expires(expires) or issued_at + token_lifetime
+    info = {"result": valid, "reason": "", "username": claims["userName"],
+            "issued_at": issued_at, "expires_at": expires_at}
+    if issued_at > now + clock_skew:
+        info.update(result=malformed, reason="issued in the future")
+    elif expires_at - margin <= now:
+        info.update(result=expired, reason="token expired")
+    elif username and claims["userName"] != username:
+        info.update(result=wrong_user, reason=f"token belongs to {claims['userName']}")
+    return info
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classify the tokens in a CSV file without calling the API.")
+    parser.add_argument("input", help="CSV with a token column (and optionally expires and username)")
+    args = parser.parse_args(argv)
+
+    counts = Counter()
+    with open(args.input, mode="r") as infile:
+        for number, row in enumerate(csv.DictReader(infile), start=1):
+            info = inspect(row.get("token"), row.get("expires"), row.get("username"))
+            counts[info["result"]] += 1
+            if info["result"] != valid:
+                print(f"row {number}: {info['result']} ({info['reason']})")
+    print(", ".join(f"{count} {result}" for result, count in sorted(counts.items())))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""Per-request timing histograms for the shared HTTP client.
+
+When enabled, every request sent through bookstore.client records how long it
+spent in each phase, labelled by endpoint and status code:
+
+- connect: DNS lookup and TCP connect for a new pooled connection
+- tls: TLS handshake for a new https connection
+- server: from sending the request until the response headers arrive
+- transfer: reading the response body
+- total: the whole call
+
+Response sizes are recorded too, and local work such as writing output rows
+can be timed with `timer()`. Histograms can be exported as Prometheus text or
+JSON, at the end of a run or periodically during it. While disabled, the
+client skips all of this and only pays for one `is None` check per request.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+# Upper bounds of the duration buckets, in seconds
+duration_buckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Upper bounds of the response size buckets, in bytes
+size_buckets = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+phases = ("connect", "tls", "server", "transfer", "total")
+
+# The active Recorder, or None while metrics are disabled
+recorder = None
+
+_local = threading.local()
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Yield (upper bound, cumulative count) pairs, ending with +Inf."""
+        total = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            total += count
+            yield bound, total
+
+def endpoint_name(method, url):
+    """Label a request by method and path, with the userID replaced by a placeholder."""
+    path = urlsplit(url).path.rstrip("/")
+    prefix, _, user_id = path.rpartition("/User/")
+    if prefix and user_id:
+        path = f"{prefix}/User/{{userID}}"
+    return f"{method} {path}"
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+class Recorder:
+    """Collects request and local-phase histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.durations = {}  # (endpoint, status, phase) -> Histogram
+        self.sizes = {}  # (endpoint, status) -> Histogram
+        self.local = {}  # phase -> Histogram
+
+    def _observe(self, table, key, bounds, value):
+        with self._lock:
+            histogram = table.get(key)
+            if histogram is None:
+                histogram = table[key] = Histogram(bounds)
+            histogram.observe(value)
+
+    def observe_request(self, endpoint, status, timings, size=None):
+        """Record the phase timings (seconds) and response size of one request."""
+        status = str(status)
+        for phase, seconds in timings.items():
+            self._observe(self.durations, (endpoint, status, phase), duration_buckets, seconds)
+        if size is not None:
+            self._observe(self.sizes, (endpoint, status), size_buckets, size)
+
+    def observe_local(self, phase, seconds):
+        """Record time spent in our own code, e.g. writing CSV rows."""
+        self._observe(self.local, phase, duration_buckets, seconds)
+
+    def time_request(self, method, url, send):
+        """Call send() and record its phases under the endpoint of method and url."""
+        _local.timings = {}
+        start = time.perf_counter()
+        status = "error"
+        size = None
+        try:
+            response = send()
+            status = response.status_code
+            size = len(response.content)
+            return response
+        finally:
+            total = time.perf_counter() - start
+            timings = _local.timings
+            _local.timings = None
+            setup = timings.get("connect", 0.0) + timings.get("tls", 0.0)
+            if status != "error":
+                elapsed = response.elapsed.total_seconds()
+                timings["server"] = max(0.0, elapsed - setup)
+                timings["transfer"] = max(0.0, total - elapsed)
+            timings["total"] = total
+            self.observe_request(endpoint_name(method, url), status, timings, size)
+
+    def to_dict(self):
+        """Return every histogram as plain data."""
+        def dump(histogram):
+            return {
+                "buckets": [["+Inf" if bound == float("inf") else bound, count]
+                            for bound, count in histogram.cumulative()],
+                "sum": histogram.sum,
+                "count": histogram.count
+            }
+
+        with self._lock:
+            return {
+                "requests": [
+                    {"endpoint": endpoint, "status": status, "phase": phase, **dump(histogram)}
+                    for (endpoint, status, phase), histogram in sorted(self.durations.items())
+                ],
+                "response_sizes": [
+                    {"endpoint": endpoint, "status": status, **dump(histogram)}
+                    for (endpoint, status), histogram in sorted(self.sizes.items())
+                ],
+                "local": [
+                    {"phase": phase, **dump(histogram)}
+                    for phase, histogram in sorted(self.local.items())
+                ]
+            }
+
+    def to_prometheus(self):
+        """Return every histogram in the Prometheus text exposition format."""
+        lines = []
+
+        def emit(name, help_text, items):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in items:
+                label_text = ",".join(f'{key}="{value}"' for key, value in labels)
+                for bound, count in histogram.cumulative():
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{name}_bucket{{{label_text},le="{le}"}} {count}')
+                lines.append(f"{name}_sum{{{label_text}}} {histogram.sum!r}")
+                lines.append(f"{name}_count{{{label_text}}} {histogram.count}")
+
+        with self._lock:
+            emit("bookstore_request_duration_seconds", "Time spent per request phase.", [
+                ((("endpoint", endpoint), ("status", status), ("phase", phase)), histogram)
+                for (endpoint, status, phase), histogram in sorted(self.durations.items())
+            ])
+            emit("bookstore_response_size_bytes", "Response body size.", [
+                ((("endpoint", endpoint), ("status", status)), histogram)
+                for (endpoint, status), histogram in sorted(self.sizes.items())
+            ])
+            emit("bookstore_local_duration_seconds", "Time spent in local processing.", [
+                ((("phase", phase),), histogram)
+                for phase, histogram in sorted(self.local.items())
+            ])
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Write the histograms to path: JSON for *.json, Prometheus text otherwise."""
+        text = json.dumps(self.to_dict(), indent=2) if path.endswith(".json") else self.to_prometheus()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, mode="w") as outfile:
+            outfile.write(text)
+        os.replace(tmp_path, path)
+
+# Connection classes that report connect and TLS time to the request being timed
+
+def _record_phase(phase, seconds):
+    timings = getattr(_local, "timings", None)
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+@functools.lru_cache(maxsize=None)
+def timed_pool_classes():
+    """Pool classes for PoolManager.pool_classes_by_scheme while metrics are enabled.
+
+    Built on first use, so importing this module doesn't import urllib3.
+    """
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class TimedHTTPConnection(HTTPConnection):
+        def _new_conn(self):
+            start = time.perf_counter()
+            sock = super()._new_conn()
+            _record_phase("connect", time.perf_counter() - start)
+            return sock
+
+    class TimedHTTPSConnection(HTTPSConnection):
+        def _new_conn(self):
+            start = time.perf_counter()
+            sock = super()._new_conn()
+            self._connect_seconds = time.perf_counter() - start
+            _record_phase("connect", self._connect_seconds)
+            return sock
+
+        def connect(self):
+            self._connect_seconds = 0.0
+            start = time.perf_counter()
+            super().connect()
+            _record_phase("tls", max(0.0, time.perf_counter() - start - self._connect_seconds))
+
+    class TimedHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = TimedHTTPConnection
+
+    class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = TimedHTTPSConnection
+
+    return {"http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+
+# Enabling, disabling and exporting
+
+_exporter = None
+
+def enable():
+    """Start recording. Returns the active Recorder."""
+    global recorder
+    if recorder is None:
+        recorder = Recorder()
+        # Reopen the pooled session with connections that report their setup time
+        from bookstore import client
+        client.close()
+    return recorder
+
+def disable():
+    """Stop recording and any periodic export."""
+    global recorder
+    stop_periodic_export()
+    recorder = None
+
+@contextmanager
+def timer(phase):
+    """Time a block of local work when metrics are enabled."""
+    active = recorder
+    if active is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        active.observe_local(phase, time.perf_counter() - start)
+
+def export(path):
+    """Write the current histograms to path, if metrics are enabled."""
+    if recorder is not None:
+        recorder.export(path)
+
+def start_periodic_export(path, interval):
+    """Export the histograms to path every interval seconds until disabled."""
+    global _exporter
+    stop_periodic_export()
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            export(path)
+
+    thread = threading.Thread(target=run, name="bookstore-metrics", daemon=True)
+    thread.start()
+    _exporter = (stop, thread)
+
+def stop_periodic_export():
+    global _exporter
+    if _exporter is not None:
+        stop, thread = _exporter
+        stop.set()
+        thread.join()
+        _exporter = None
+
+def add_arguments(parser):
+    """Add the --metrics-out/--metrics-interval options to a script's argument parser."""
+    parser.add_argument("--metrics-out", help="write request timing histograms here (.json or Prometheus text)")
+    parser.add_argument("--metrics-interval", type=float, default=0,
+                        help="also export the histograms every N seconds during the run")
+
+@contextmanager
+def from_arguments(args):
+    """Enable metrics for the duration of a run when --metrics-out was given."""
+    if not args.metrics_out:
+        yield
+        return
+    enable()
+    if args.metrics_interval:
+        start_periodic_export(args.metrics_out, args.metrics_interval)
+    try:
+        yield
+    finally:
+        stop_periodic_export()
+        export(args.metrics_out)
+        disable()
@@ -0,0 +1,85 @@
+"""Run the test suites in several pytest processes at once.
+
+    python -m bookstore.parallel -n 4 Login GetUser Registration -- --local-api
+
+starts four pytest workers from the repository root. Worker i runs with
+`--worker i/4` and keeps every fourth collected test, so together they run
+each test exactly once, and each one has its own account pool (and, with
+--local-api, its own stand-in server). Each worker's output is printed as it
+finishes, and the exit status is the worst of the workers'.
+
+`--worker I/N` also works on its own, e.g. to split the suites across CI jobs.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Repository root, where pytest.ini is
+root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+def parse_worker(text):
+    """Parse I/N into (worker index, worker count), with 0 <= I < N."""
+    index, separator, count = (text or "").partition("/")
+    if not separator or not 0 <= int(index) < int(count):
+        raise ValueError(f"Worker {text!r} must look like I/N with 0 <= I < N, e.g. 1/4")
+    return int(index), int(count)
+
+def pytest_addoption(parser):
+    parser.addoption("--worker", metavar="I/N", type=parse_worker,
+                     help="only run every N-th collected test, starting with the I-th (0-based)")
+
+def pytest_collection_modifyitems(config, items):
+    worker = config.getoption("--worker")
+    if not worker:
+        return
+    index, count = worker
+    kept, deselected = [], []
+    for number, item in enumerate(items):
+        (kept if number % count == index else deselected).append(item)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = kept
+
+def run(paths, workers, pytest_args=()):
+    """Run pytest over paths in workers processes and return the worst exit status."""
+    processes = []
+    for index in range(workers):
+        output = tempfile.TemporaryFile(mode="w+")
+        command = [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider",
+                   f"--worker={index}/{workers}", *pytest_args, *paths]
+        processes.append((index, output, subprocess.Popen(command, cwd=root, stdout=output,
+                                                          stderr=subprocess.STDOUT)))
+
+    statuses = []
+    for index, output, process in processes:
+        statuses.append(process.wait())
+        output.seek(0)
+        print(f"===== worker {index}/{workers} (exit status {statuses[-1]}) =====")
+        print(output.read(), end="")
+        output.close()
+    # 5 means no tests were collected, which is fine for a worker with an empty share
+    failed = [status for status in statuses if status not in (0, 5)]
+    return max(failed) if failed else min(statuses)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run pytest over the suites in several worker processes.",
+                                     epilog="Arguments after -- are passed to every pytest worker.")
+    parser.add_argument("-n", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("paths", nargs="*", default=["Login", "GetUser", "Registration"],
+                        help="test folders or files, relative to the repository root")
+    argv = sys.argv[1:] if argv is None else list(argv)
+    pytest_args = []
+    if "--" in argv:
+        argv, pytest_args = argv[:argv.index("--")], argv[argv.index("--") + 1:]
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    status = run(args.paths, max(1, args.workers), pytest_args)
+    print(f"{args.workers} workers finished in {time.perf_counter() - start:.1f}s")
+    sys.exit(status)
+
+if __name__ == "__main__":
+    main()
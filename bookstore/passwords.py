@@ -0,0 +1,169 @@
+"""Password rules of the Account API, checked locally before any request.
+
+A password needs at least eight characters, an uppercase letter, a lowercase
+letter, a digit and a character that is none of those. Each password is
+mapped to its character classes in one `str.translate` pass and the classes
+are then found with substring checks, all in C, instead of one regex search
+per rule.
+
+The bulk mode splits a whole users.csv into the rows worth sending and the
+rows the API would reject, with the exact 400 message it would return:
+
+    python -m bookstore.passwords users.csv --valid users.valid.csv --rejected users.rejected.csv
+"""
+import argparse
+import csv
+import functools
+import io
+import multiprocessing
+import string
+
+# Messages the API returns with 400 for these rows
+required_message = "UserName and Password required."
+password_message = ("Passwords must have at least one non alphanumeric character, one digit ('0'-'9'), "
+                    "one uppercase ('A'-'Z'), one lowercase ('a'-'z'), one special character and "
+                    "Password must be eight characters or longer.")
+
+min_length = 8
+
+# Rows per chunk in bulk mode
+default_chunk_size = 100000
+
+# Columns of the rejected file, the same as Registration's results
+rejected_fieldnames = ["userName", "password", "status_code", "userID", "message"]
+
+# Every ASCII character maps to its class; other characters are left as they are and count as special
+_class_table = str.maketrans({
+    **dict.fromkeys(map(chr, range(128)), "S"),
+    **dict.fromkeys(string.ascii_uppercase, "U"),
+    **dict.fromkeys(string.ascii_lowercase, "L"),
+    **dict.fromkeys(string.digits, "D")
+})
+_rule_classes = (("uppercase", "U"), ("lowercase", "L"), ("digit", "D"), ("special", "S"))
+
+def _classes(password):
+    """Return password with every ASCII character replaced by its class letter."""
+    return password.translate(_class_table)
+
+def is_valid_password(password):
+    """True if the API accepts password."""
+    if len(password) < min_length:
+        return False
+    classes = _classes(password)
+    return "U" in classes and "L" in classes and "D" in classes and ("S" in classes or not classes.isascii())
+
+def broken_rules(password):
+    """Return the names of the rules password breaks, in message order; empty when it is valid."""
+    classes = _classes(password)
+    broken = [] if len(password) >= min_length else ["length"]
+    broken += [rule for rule, symbol in _rule_classes if symbol not in classes]
+    if broken[-1:] == ["special"] and not classes.isascii():
+        broken.pop()
+    return broken
+
+def rejection_message(username, password):
+    """Return the 400 message the API gives for these credentials, or None if it would accept them."""
+    if not username or not password:
+        return required_message
+    if not is_valid_password(password):
+        return password_message
+    return None
+
+def _csv_line(fields):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(fields)
+    return buffer.getvalue()
+
+# Rejected rows differ only in their credentials, so the rest of the line is encoded once
+_rejected_suffix = {message: _csv_line([400, "N/A", message]) for message in (required_message, password_message)}
+
+def _cell(row, index):
+    return row[index] if index < len(row) else ""
+
+def _split_chunk(lines, name_at, password_at):
+    """Split raw CSV lines into (valid text, rejected text, valid count, rejected count).
+
+    Valid lines are passed through as they are. Chunks without quotes are split
+    on commas directly; others go through the csv module.
+    """
+    valid, rejected = [], []
+    if any('"' in line for line in lines):
+        rows = ((row, None) for row in csv.reader(lines))
+    else:
+        rows = ((line.rstrip("\r\n").split(","), line) for line in lines)
+
+    for row, line in rows:
+        if not row or row == [""]:
+            continue
+        username, password = _cell(row, name_at), _cell(row, password_at)
+        message = rejection_message(username, password)
+        if message is None:
+            valid.append(_csv_line(row) if line is None else line if line.endswith("\n") else line + "\r\n")
+        elif line is None:
+            rejected.append(_csv_line([username, password]).rstrip("\r\n") + "," + _rejected_suffix[message])
+        else:
+            rejected.append(f"{username},{password},{_rejected_suffix[message]}")
+    return "".join(valid), "".join(rejected), len(valid), len(rejected)
+
+def _line_chunks(infile, chunk_size):
+    """Yield lists of about chunk_size lines, never splitting a quoted field across chunks."""
+    chunk, quotes = [], 0
+    for line in infile:
+        chunk.append(line)
+        quotes += line.count('"')
+        if len(chunk) >= chunk_size and quotes % 2 == 0:
+            yield chunk
+            chunk, quotes = [], 0
+    if chunk:
+        yield chunk
+
+def split_file(input_path, valid_path, rejected_path, chunk_size=default_chunk_size, processes=1):
+    """Split a users CSV into rows the API accepts and rows it rejects.
+
+    The valid file keeps the input columns; the rejected file has Registration's
+    result columns with status code 400 and the API's message. Rows stay in
+    input order. Returns (valid count, rejected count).
+    """
+    valid_count = rejected_count = 0
+    pool = multiprocessing.get_context("spawn").Pool(processes) if processes > 1 else None
+    try:
+        with open(input_path, mode="r", newline="") as infile, \
+                open(valid_path, mode="w", newline="") as valid_file, \
+                open(rejected_path, mode="w", newline="") as rejected_file:
+            header_line = infile.readline()
+            header = next(csv.reader([header_line]), None) or ["userName", "password"]
+            name_at, password_at = header.index("userName"), header.index("password")
+            valid_file.write(header_line)
+            rejected_file.write(_csv_line(rejected_fieldnames))
+
+            chunks = _line_chunks(infile, chunk_size)
+            if pool is None:
+                results = (_split_chunk(chunk, name_at, password_at) for chunk in chunks)
+            else:
+                results = pool.imap(functools.partial(_split_chunk, name_at=name_at, password_at=password_at), chunks)
+
+            for valid_text, rejected_text, valid_rows, rejected_rows in results:
+                valid_file.write(valid_text)
+                rejected_file.write(rejected_text)
+                valid_count += valid_rows
+                rejected_count += rejected_rows
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return valid_count, rejected_count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Split a users CSV into valid rows and rows the API would reject.")
+    parser.add_argument("input", help="users CSV (userName,password)")
+    parser.add_argument("--valid", default="users.valid.csv", help="where to write the rows worth registering")
+    parser.add_argument("--rejected", default="users.rejected.csv", help="where to write the rejected rows")
+    parser.add_argument("--chunk-size", type=int, default=default_chunk_size, help="rows checked per chunk")
+    parser.add_argument("--processes", type=int, default=1, help="check chunks in this many processes")
+    args = parser.parse_args(argv)
+
+    valid_count, rejected_count = split_file(args.input, args.valid, args.rejected, args.chunk_size, args.processes)
+    print(f"{valid_count} valid rows saved to {args.valid}, {rejected_count} rejected rows saved to {args.rejected}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Adaptive token-bucket rate limiter for the Bookstore API.
+
+The limiter starts at a configured rate and speeds up while responses are
+healthy. On 429 and 5xx responses it backs off multiplicatively and honours
+the server's Retry-After header.
+"""
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# Starting request rate per second; the limiter adapts it to the server
+default_rate = 1.0
+
+# Requests per second the limiter may speed up to unless --max-rate says otherwise
+default_max_rate = 50.0
+
+def is_throttled(status_code):
+    """Return True for responses that mean the server wants us to slow down."""
+    return status_code == 429 or status_code >= 500
+
+def parse_retry_after(value, now=None):
+    """Return the Retry-After header value in seconds, or None if missing or invalid."""
+    if value is None or value == "":
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    now = time.time() if now is None else now
+    return max(0.0, retry_at.timestamp() - now)
+
+class AdaptiveRateLimiter:
+    """Thread-safe token bucket whose rate follows the server's responses."""
+
+    def __init__(self, rate=1.0, min_rate=0.2, max_rate=default_max_rate, burst=None,
+                 increase=0.5, backoff=0.5, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0 or min_rate <= 0 or max_rate < min_rate:
+            raise ValueError("rates must be positive and min_rate <= max_rate")
+        if not 0 < backoff < 1:
+            raise ValueError("backoff must be between 0 and 1")
+        # A starting rate above max_rate raises the ceiling instead of being ignored
+        self.max_rate = max(max_rate, rate)
+        self.min_rate = min_rate
+        self.rate = max(rate, min_rate)
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.increase = increase  # requests/second added per second of healthy traffic
+        self.backoff = backoff  # rate multiplier applied on 429/5xx
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = 1.0
+        self._updated = clock()
+        self._last_backoff = None
+
+    def _refill(self, now):
+        # _updated can be in the future while a Retry-After pause is active
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def acquire(self):
+        """Block until the caller may send one request. Returns the time waited."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._tokens -= 1
+            wait = max(0.0, self._updated - now) + max(0.0, -self._tokens / self.rate)
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def record(self, status_code, retry_after=None):
+        """Adjust the rate after a response with the given status and Retry-After header."""
+        with self._lock:
+            now = self._clock()
+            if is_throttled(status_code):
+                # Back off at most once per interval so a burst of 429s counts once
+                interval = 1.0 / self.rate
+                if self._last_backoff is None or now - self._last_backoff >= interval:
+                    self.rate = max(self.min_rate, self.rate * self.backoff)
+                    self._last_backoff = now
+                delay = parse_retry_after(retry_after)
+                if delay:
+                    self._refill(now)
+                    self._tokens = min(self._tokens, 0.0)
+                    self._updated = max(self._updated, now + delay)
+            else:
+                # Healthy answers, including expected 4xx errors, let us speed up
+                self._refill(now)
+                self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def record_response(self, response):
+        """Adjust the rate from a `requests` response."""
+        self.record(response.status_code, response.headers.get("Retry-After"))
+
+def add_arguments(parser, rate=default_rate):
+    """Add --rate (starting at rate) and --max-rate to a script's argument parser."""
+    parser.add_argument("--rate", type=float, default=rate,
+                        help="starting requests per second, adjusted on 429/5xx (0 disables the limiter)")
+    parser.add_argument("--max-rate", type=float, default=default_max_rate,
+                        help="requests per second the limiter may speed up to while responses are healthy")
+
+def from_arguments(rate, max_rate=default_max_rate):
+    """Return a limiter for the --rate and --max-rate values, or None when rate is 0."""
+    return AdaptiveRateLimiter(rate=rate, max_rate=max_rate) if rate else None
@@ -0,0 +1,192 @@
+"""Persistent index of users that are already registered.
+
+Register runs POST every row of users.csv, and users registered by an earlier
+run only come back as "User exists!". The index remembers userName -> userID
+(an empty userID when the API only told us the user exists) in SQLite, so
+those users are skipped without a network call. A Bloom filter sits in front
+of the table: most new users are ruled out in memory, and only probable hits
+are looked up on disk. The filter is saved with the table and rebuilt when it
+no longer matches it, e.g. after shard processes added users concurrently.
+"""
+import csv
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+
+def default_path():
+    """Where the index lives: BOOKSTORE_REGISTERED_INDEX, else ~/.bookstore/registered.sqlite3, read at call time."""
+    return os.environ.get("BOOKSTORE_REGISTERED_INDEX") or os.path.join(
+        os.path.expanduser("~"), ".bookstore", "registered.sqlite3")
+
+# Message written for users skipped because the index knows them
+skipped_message = "Already registered"
+
+# Seconds a write waits for another process (e.g. a shard) to finish its own
+busy_timeout = 30
+
+# Result messages that mean the user is registered, whitespace-normalised
+registered_messages = {"User exists!", skipped_message}
+
+def is_registered_result(row):
+    """True if a registration results row shows the user is registered."""
+    message = " ".join((row.get("message") or "").split())
+    return str(row.get("status_code")) == "201" or message in registered_messages
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (no false negatives)."""
+
+    __slots__ = ("size", "hashes", "bits")
+
+    def __init__(self, capacity, error_rate=0.001, hashes=None, bits=None):
+        capacity = max(capacity, 1)
+        if bits is None:
+            # Whole bytes, so a saved filter can be restored from its bits alone
+            nbytes = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2 / 8)
+            bits = bytes(nbytes)
+        self.bits = bytearray(bits)
+        self.size = len(self.bits) * 8
+        self.hashes = hashes or max(1, round(self.size / capacity * math.log(2)))
+
+    def _positions(self, key):
+        # Double hashing: two 64-bit halves of one digest give every position
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+class RegisteredIndex:
+    """userName -> userID index of registered users, backed by SQLite with a Bloom filter in front.
+
+    Added users are written in batches of commit_every, each in its own short
+    transaction, so several processes can add to one index at once.
+    """
+
+    def __init__(self, path=None, expected=1000000, error_rate=0.001, commit_every=100):
+        self.path = path or default_path()
+        self.error_rate = error_rate
+        self.commit_every = commit_every
+        self._lock = threading.Lock()
+        # Users added since the last write, kept in memory so no transaction is open between requests
+        self._pending = {}
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=busy_timeout, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS registered (username TEXT PRIMARY KEY, user_id TEXT NOT NULL)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS bloom ("
+            " id INTEGER PRIMARY KEY CHECK (id = 1),"
+            " entries INTEGER NOT NULL,"
+            " capacity INTEGER NOT NULL,"
+            " hashes INTEGER NOT NULL,"
+            " bits BLOB NOT NULL)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS imports (path TEXT PRIMARY KEY, size INTEGER, mtime REAL)")
+        self._db.commit()
+        self._load_filter(expected)
+
+    def _load_filter(self, expected):
+        """Use the saved filter if it still covers the table, otherwise rebuild it."""
+        self.entries = self._db.execute("SELECT COUNT(*) FROM registered").fetchone()[0]
+        saved = self._db.execute("SELECT entries, capacity, hashes, bits FROM bloom WHERE id = 1").fetchone()
+        if saved and saved[0] == self.entries and self.entries <= saved[1]:
+            self.capacity = saved[1]
+            self._filter = BloomFilter(saved[1], self.error_rate, hashes=saved[2], bits=saved[3])
+            return
+        self.capacity = max(expected, 2 * self.entries)
+        self._filter = BloomFilter(self.capacity, self.error_rate)
+        for (username,) in self._db.execute("SELECT username FROM registered"):
+            self._filter.add(username)
+
+    def get(self, username):
+        """Return the userID of a registered user ('' if unknown), or None if not registered."""
+        if not username or username not in self._filter:
+            return None
+        with self._lock:
+            if username in self._pending:
+                return self._pending[username]
+            row = self._db.execute("SELECT user_id FROM registered WHERE username = ?", (username,)).fetchone()
+        return row[0] if row else None
+
+    def __contains__(self, username):
+        return self.get(username) is not None
+
+    def add(self, username, user_id=""):
+        """Remember a registered user. A known userID is never replaced by an empty one."""
+        if not username:
+            return
+        user_id = "" if user_id in (None, "N/A") else user_id
+        with self._lock:
+            new = username not in self._filter or (username not in self._pending and self._db.execute(
+                "SELECT 1 FROM registered WHERE username = ?", (username,)).fetchone() is None)
+            if user_id or username not in self._pending:
+                self._pending[username] = user_id
+            self._filter.add(username)
+            self.entries += new
+            if len(self._pending) >= self.commit_every:
+                self._write_pending()
+
+    def _write_pending(self):
+        """Write the pending users in one short transaction; the caller holds the lock."""
+        if self._pending:
+            self._db.executemany(
+                "INSERT INTO registered (username, user_id) VALUES (?, ?)"
+                " ON CONFLICT (username) DO UPDATE SET user_id = excluded.user_id WHERE excluded.user_id != ''",
+                self._pending.items())
+        self._db.commit()
+        self._pending = {}
+
+    def import_results(self, results_path):
+        """Add the registered users from a registration results CSV. Returns the number of rows added.
+
+        A file that has not changed since it was last imported is skipped.
+        """
+        if not os.path.exists(results_path):
+            return 0
+        stat = os.stat(results_path)
+        key = os.path.abspath(results_path)
+        with self._lock:
+            seen = self._db.execute("SELECT size, mtime FROM imports WHERE path = ?", (key,)).fetchone()
+        if seen == (stat.st_size, stat.st_mtime):
+            return 0
+
+        added = 0
+        with open(results_path, mode="r", newline="") as infile:
+            for row in csv.DictReader(infile):
+                if is_registered_result(row):
+                    self.add(row.get("userName"), row.get("userID"))
+                    added += 1
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO imports (path, size, mtime) VALUES (?, ?, ?)",
+                             (key, stat.st_size, stat.st_mtime))
+            self._db.commit()
+        return added
+
+    def flush(self):
+        """Commit pending users and save the filter next to them."""
+        with self._lock:
+            self._write_pending()
+            self._db.execute(
+                "INSERT OR REPLACE INTO bloom (id, entries, capacity, hashes, bits) VALUES (1, ?, ?, ?, ?)",
+                (self.entries, self.capacity, self._filter.hashes, bytes(self._filter.bits)))
+            self._db.commit()
+
+    def close(self):
+        if self._db is None:
+            return
+        self.flush()
+        with self._lock:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,292 @@
+"""Streaming test results: one JSON line per test, written as it finishes.
+
+    pytest --results-jsonl results.jsonl
+    python -m bookstore.parallel -n 4 -- --local-api --results-jsonl results/worker-{worker}.jsonl
+
+Each line holds the test id, its parameters, the outcome, the duration, the
+status code and latency of the last API call the test made, the number of
+calls, and the failure message. Lines are appended and flushed one at a time,
+so the cost per test is the same for ten tests or a million, and a run that
+dies halfway still leaves every finished test on disk. `{worker}` in the path
+is replaced by the --worker index, so parallel workers write their own files.
+
+Result files are aggregated offline, any number at once:
+
+    python -m bookstore.reporting results/*.jsonl
+    python -m bookstore.reporting results/*.jsonl --html report.html
+
+The second form writes the same page as pytest-html, using one of the
+committed report.html files as the template.
+"""
+import argparse
+import html
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from collections import Counter, defaultdict
+
+import pytest
+
+from bookstore import client, metrics
+
+# Longest failure message kept per test
+message_limit = 2000
+
+# Longest parameter value kept per test; tokens and long strings are cut
+param_limit = 200
+
+# pytest-html page the --html output is built from
+default_template = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "GetUser", "report.html")
+
+# Outcomes with a filter checkbox on the pytest-html page, and how its results column spells them
+html_outcomes = ("failed", "passed", "skipped", "xfailed", "xpassed", "error", "rerun")
+html_results = {"passed": "Passed", "failed": "Failed", "skipped": "Skipped", "xfailed": "XFailed",
+                "xpassed": "XPassed", "error": "Error", "rerun": "Rerun"}
+
+def _short(value, limit):
+    text = value if isinstance(value, (str, int, float, bool, type(None))) else repr(value)
+    if isinstance(text, str) and len(text) > limit:
+        return text[:limit] + "..."
+    return text
+
+def params_of(item):
+    """The parametrize values of a test item as a JSON-friendly dict."""
+    callspec = getattr(item, "callspec", None)
+    if callspec is None:
+        return {}
+    return {name: _short(value, param_limit) for name, value in callspec.params.items()}
+
+def _outcome(report):
+    if hasattr(report, "wasxfail"):
+        return "xfailed" if report.skipped else "xpassed"
+    if report.when != "call" and report.failed:
+        return "error"
+    return report.outcome
+
+class ResultWriter:
+    """Appends one record per test to a JSONL file, flushing after each."""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, mode="w", encoding="utf-8")
+        self._test = None
+
+    # Called by bookstore.client for every response while the writer is installed
+    def observe(self, method, url, response, seconds):
+        test = self._test
+        if test is not None:
+            test["status_code"] = getattr(response, "status_code", None)
+            test["latency"] = round(seconds, 6)
+            test["api_calls"] += 1
+            test["api_seconds"] += seconds
+
+    def start(self, item):
+        self._test = {"id": item.nodeid, "params": params_of(item), "outcome": "passed", "duration": 0.0,
+                      "status_code": None, "latency": None, "api_calls": 0, "api_seconds": 0.0, "message": None}
+
+    def add(self, report):
+        test = self._test
+        if test is None:
+            return
+        test["duration"] += report.duration
+        if test["outcome"] == "passed" and (report.when == "call" or not report.passed):
+            # The first phase that doesn't pass decides, e.g. a teardown error after a passed call
+            outcome = _outcome(report)
+            test["outcome"] = outcome
+            if outcome != "passed" and test["message"] is None:
+                test["message"] = _short(self._message(report), message_limit)
+
+    @staticmethod
+    def _message(report):
+        if hasattr(report, "wasxfail"):
+            return report.wasxfail or None
+        if report.skipped and isinstance(report.longrepr, tuple):
+            return report.longrepr[2]
+        crash = getattr(report.longrepr, "reprcrash", None)
+        return crash.message if crash is not None else report.longreprtext
+
+    def finish(self):
+        test, self._test = self._test, None
+        if test is None:
+            return
+        test["duration"] = round(test["duration"], 6)
+        test["api_seconds"] = round(test["api_seconds"], 6)
+        self._file.write(json.dumps(test, separators=(",", ":")) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+def read(paths):
+    """Yield the records of result files one at a time, skipping torn last lines."""
+    for path in paths:
+        with open(path, encoding="utf-8") as infile:
+            for line in infile:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+def summarize(records):
+    """Aggregate records into counts and duration percentiles overall and per test function."""
+    outcomes, statuses = Counter(), Counter()
+    functions = defaultdict(lambda: {"outcomes": Counter(), "durations": [], "api_seconds": 0.0})
+    failures = Counter()
+    total, elapsed = 0, 0.0
+    for record in records:
+        total += 1
+        elapsed += record["duration"]
+        outcomes[record["outcome"]] += 1
+        statuses[record.get("status_code")] += 1
+        function = functions[record["id"].split("[", 1)[0]]
+        function["outcomes"][record["outcome"]] += 1
+        function["durations"].append(record["duration"])
+        function["api_seconds"] += record.get("api_seconds") or 0.0
+        if record.get("message") and record["outcome"] in ("failed", "error"):
+            failures[record["message"].splitlines()[0][:120]] += 1
+    return {"total": total, "duration": elapsed, "outcomes": outcomes, "statuses": statuses,
+            "functions": functions, "failures": failures}
+
+def print_summary(summary, out=sys.stdout):
+    print(f"{summary['total']} tests, {summary['duration']:.2f}s in tests", file=out)
+    print("  " + ", ".join(f"{count} {outcome}" for outcome, count in summary["outcomes"].most_common()), file=out)
+
+    print(f"\n{'test':<70} {'runs':>6} {'passed':>7} {'failed':>7} {'p50 s':>8} {'p95 s':>8} {'api s':>8}", file=out)
+    for name, function in sorted(summary["functions"].items()):
+        counts, durations = function["outcomes"], sorted(function["durations"])
+        print(f"{name[-70:]:<70} {len(durations):>6} {counts['passed']:>7} {counts['failed'] + counts['error']:>7} "
+              f"{metrics.percentile(durations, 0.5):>8.3f} {metrics.percentile(durations, 0.95):>8.3f} "
+              f"{function['api_seconds']:>8.2f}", file=out)
+
+    print(f"\n{'last status':<12} {'tests':>7}", file=out)
+    for status, count in sorted(summary["statuses"].items(), key=lambda entry: (entry[0] is None, entry[0] or 0)):
+        print(f"{'-' if status is None else status:<12} {count:>7}", file=out)
+
+    if summary["failures"]:
+        print(f"\n{'failures':>7}  message", file=out)
+        for message, count in summary["failures"].most_common(20):
+            print(f"{count:>7}  {message}", file=out)
+
+def _html_duration(seconds):
+    """Durations as pytest-html shows them: "561 ms" below a second, HH:MM:SS above."""
+    if seconds < 1:
+        return f"{round(seconds * 1000)} ms"
+    return time.strftime("%H:%M:%S", time.gmtime(seconds))
+
+def write_html(records, path, template=default_template, title=None):
+    """Write records as a pytest-html (v4) page, built from an existing report.html."""
+    with open(template, encoding="utf-8") as infile:
+        page = infile.read()
+    title = title or os.path.basename(path)
+
+    tests, counts, elapsed = {}, Counter(), 0.0
+    for record in records:
+        result = html_results.get(record["outcome"], record["outcome"].capitalize())
+        counts[record["outcome"]] += 1
+        elapsed += record["duration"]
+        duration = _html_duration(record["duration"])
+        test_id = html.escape(record["id"])
+        tests.setdefault(record["id"], []).append({
+            "extras": [],
+            "result": result,
+            "testId": record["id"],
+            "duration": duration,
+            "resultsTableRow": [f'<td class="col-result">{result}</td>', f'<td class="col-testId">{test_id}</td>',
+                                f'<td class="col-duration">{duration}</td>', '<td class="col-links"></td>'],
+            "log": record.get("message") or "No log output captured.",
+        })
+
+    blob = {"environment": {"Python": sys.version.split()[0], "Platform": sys.platform},
+            "tests": tests, "renderCollapsed": ["passed"], "initialSort": "result", "title": title}
+    total = sum(counts.values())
+    escaped_title = html.escape(title)
+    run_count = f"{total} {'test' if total == 1 else 'tests'} took {_html_duration(elapsed)}."
+    replacements = [
+        (r'(<title id="head-title">).*?(</title>)', lambda match: f"{match[1]}{escaped_title}{match[2]}"),
+        (r'(<h1 id="title">).*?(</h1>)', lambda match: f"{match[1]}{escaped_title}{match[2]}"),
+        (r"<p>Report generated on .*?</p>",
+         lambda match: time.strftime("<p>Report generated on %d-%b-%Y at %H:%M:%S by bookstore.reporting</p>")),
+        (r'<p class="run-count">.*?</p>', lambda match: f'<p class="run-count">{run_count}</p>'),
+        (r'data-jsonblob="[^"]*"', lambda match: f'data-jsonblob="{html.escape(json.dumps(blob))}"'),
+    ]
+    for outcome in html_outcomes:
+        count = counts[outcome]
+        replacements += [
+            (rf'(data-test-result="{outcome}") ?(?:disabled)?/>',
+             lambda match, count=count: f"{match[1]} {'' if count else 'disabled'}/>"),
+            (rf'(<span class="{outcome}">)\d+ ', lambda match, count=count: f"{match[1]}{count} "),
+        ]
+    for pattern, replacement in replacements:
+        page = re.sub(pattern, replacement, page, count=1, flags=re.DOTALL)
+
+    with open(path, mode="w", encoding="utf-8") as outfile:
+        outfile.write(page)
+    # The page links its stylesheet from an assets folder next to it
+    style = os.path.join(os.path.dirname(os.path.abspath(template)), "assets", "style.css")
+    assets = os.path.join(os.path.dirname(os.path.abspath(path)), "assets")
+    if os.path.exists(style) and not os.path.exists(os.path.join(assets, "style.css")):
+        os.makedirs(assets, exist_ok=True)
+        shutil.copyfile(style, os.path.join(assets, "style.css"))
+
+# Where the session's ResultWriter is kept on the config
+_writer_key = pytest.StashKey()
+
+def pytest_addoption(parser):
+    parser.addoption("--results-jsonl", metavar="PATH",
+                     help="write one JSON line per finished test here; {worker} is replaced by the --worker index")
+
+def pytest_configure(config):
+    path = config.getoption("--results-jsonl")
+    if not path:
+        return
+    worker = config.getoption("--worker", default=None)
+    writer = ResultWriter(path.replace("{worker}", str(worker[0] if worker else 0)))
+    config.stash[_writer_key] = writer
+    client.observer = writer.observe
+
+def pytest_unconfigure(config):
+    writer = config.stash.get(_writer_key, None)
+    if writer is not None:
+        client.observer = None
+        writer.close()
+        del config.stash[_writer_key]
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    writer = item.config.stash.get(_writer_key, None)
+    if writer is None:
+        return (yield)
+    writer.start(item)
+    try:
+        return (yield)
+    finally:
+        writer.finish()
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_makereport(item, call):
+    report = yield
+    writer = item.config.stash.get(_writer_key, None)
+    if writer is not None:
+        writer.add(report)
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize --results-jsonl files from one or more test runs.")
+    parser.add_argument("results", nargs="+", help="result files, e.g. one per parallel worker")
+    parser.add_argument("--html", metavar="PATH", help="also write a pytest-html style report here")
+    parser.add_argument("--template", default=default_template, help="pytest-html report.html to build --html from")
+    parser.add_argument("--title", help="title of the --html report (default: its file name)")
+    args = parser.parse_args(argv)
+
+    print_summary(summarize(read(args.results)))
+    if args.html:
+        write_html(read(args.results), args.html, args.template, args.title)
+        print(f"\nWrote {args.html}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Timeouts, retries and a circuit breaker for every Bookstore API call.
+
+- Every request gets a (connect, read) timeout unless the caller passes one.
+- Idempotent calls are retried on connection errors, timeouts, 429 and 5xx,
+  with jittered exponential backoff. Other calls are only retried when the
+  server certainly did not process them: a connect timeout or a 429.
+- After `failure_threshold` failures in a row the circuit opens, and calls fail
+  immediately with CircuitOpenError until `reset_timeout` has passed. Then one
+  trial call decides whether the circuit closes again.
+"""
+import os
+import random
+import threading
+import time
+
+import requests
+
+from bookstore.ratelimit import parse_retry_after
+
+# (connect, read) timeout in seconds for calls that don't set their own
+timeout = (float(os.environ.get("BOOKSTORE_CONNECT_TIMEOUT", 5)), float(os.environ.get("BOOKSTORE_READ_TIMEOUT", 30)))
+
+# Methods that are safe to send twice
+idempotent_methods = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# Responses worth another attempt
+retry_status_codes = {429, 500, 502, 503, 504}
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling the API while the circuit is open."""
+
+class RetryPolicy:
+    """Bounded retries with full-jitter exponential backoff."""
+
+    def __init__(self, max_attempts=3, backoff_base=0.5, backoff_cap=10.0, rng=random.random):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._rng = rng
+
+    def delay(self, attempt, retry_after=None):
+        """Seconds to wait before retry number attempt (0-based), honouring Retry-After."""
+        backoff = self._rng() * min(self.backoff_cap, self.backoff_base * 2 ** attempt)
+        if retry_after is not None:
+            backoff = max(backoff, min(retry_after, self.backoff_cap))
+        return backoff
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker shared by all threads."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._clock() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go out now."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self.reset_timeout - (self._clock() - self._opened_at)
+            if remaining > 0 or self._trial_running:
+                raise CircuitOpenError(f"Circuit open: API unavailable, next attempt in {max(remaining, 0):.0f}s")
+            # Half-open: let exactly one trial call through
+            self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._trial_running = False
+
+    def reset(self):
+        self.record_success()
+
+# Shared instances used by bookstore.client
+retry_policy = RetryPolicy()
+breaker = CircuitBreaker()
+
+def call(method, send, idempotent=None, policy=None, circuit=None, sleep=time.sleep):
+    """Call send() under the retry policy and circuit breaker and return its response."""
+    policy = policy or retry_policy
+    circuit = circuit or breaker
+    if idempotent is None:
+        idempotent = method.upper() in idempotent_methods
+
+    for attempt in range(policy.max_attempts):
+        last_attempt = attempt == policy.max_attempts - 1
+        circuit.before_call()
+        try:
+            response = send()
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            circuit.record_failure()
+            never_sent = isinstance(e, requests.exceptions.ConnectTimeout)
+            if last_attempt or not (idempotent or never_sent):
+                raise
+            sleep(policy.delay(attempt))
+            continue
+        except Exception:
+            circuit.record_failure()
+            raise
+
+        if response.status_code >= 500:
+            circuit.record_failure()
+        else:
+            circuit.record_success()
+
+        status = response.status_code
+        if last_attempt or status not in retry_status_codes or not (idempotent or status == 429):
+            return response
+        sleep(policy.delay(attempt, parse_retry_after(response.headers.get("Retry-After"))))
+    return response
@@ -0,0 +1,132 @@
+"""Request coalescing and a TTL cache for repeated lookups.
+
+GetUser inputs often list the same userID/token pair many times. Lookups go
+through `ResponseCache.get_or_load(key, load)`: a fresh cached answer is
+returned straight away, and concurrent callers for a key that is already
+being fetched wait for that one request instead of sending their own. Answers
+are kept in a bounded in-memory LRU for `ttl` seconds and, when a path is
+given, in a SQLite file so the next run can use them too.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Entries kept in memory
+default_maxsize = 10000
+
+# Seconds an answer stays fresh
+default_ttl = 600
+
+class ResponseCache:
+    """Single-flight loader with an LRU/TTL cache and optional SQLite persistence."""
+
+    def __init__(self, maxsize=default_maxsize, ttl=default_ttl, path=None, clock=time.time):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._inflight = {}  # key -> Future
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+        self._db = None
+        if path:
+            if path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, stored_at REAL NOT NULL, value TEXT NOT NULL)")
+            self._db.execute("DELETE FROM responses WHERE stored_at <= ?", (clock() - ttl,))
+            self._db.commit()
+
+    def _fresh(self, stored_at):
+        return self._clock() - stored_at < self.ttl
+
+    def _remember(self, key, stored_at, value):
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _lookup(self, key):
+        """Return the fresh cached value of key, or None. Call with the lock held."""
+        entry = self._entries.get(key)
+        if entry is None and self._db is not None:
+            row = self._db.execute("SELECT stored_at, value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                entry = (row[0], json.loads(row[1]))
+                self._remember(key, *entry)
+        if entry is None:
+            return None
+        if not self._fresh(entry[0]):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def get(self, key):
+        """Return a copy of the fresh cached value of key, or None."""
+        with self._lock:
+            value = self._lookup(key)
+        return None if value is None else dict(value)
+
+    def put(self, key, value):
+        stored_at = self._clock()
+        with self._lock:
+            self._remember(key, stored_at, dict(value))
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO responses (key, stored_at, value) VALUES (?, ?, ?)",
+                                 (key, stored_at, json.dumps(value, default=str)))
+                self._db.commit()
+
+    def get_or_load(self, key, load, cacheable=None):
+        """Return the cached value of key, or load() it once however many callers ask at the same time.
+
+        Only values for which cacheable(value) is true are kept afterwards.
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                self.hits += 1
+                return dict(value)
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return dict(future.result())
+
+        try:
+            value = load()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            if cacheable is None or cacheable(value):
+                self.put(key, value)
+            future.set_result(value)
+            return dict(value)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced}
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,241 @@
+"""Optional SQLite store for batch results, kept across runs.
+
+The batch scripts overwrite their output CSV on every run. With --results-db
+(or BOOKSTORE_RESULTS_DB) every output row is also appended to a SQLite
+database: one table per endpoint, each row tagged with the run it belongs to.
+Rows are buffered and written in one transaction per checkpoint, and a resumed
+run keeps its run id. Every table is indexed on username, userID, status and
+time, so questions across runs are index lookups:
+
+    python -m bookstore.results results.sqlite3 failed --endpoint login --runs 5
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from bookstore import registry
+
+def _logged_in(row):
+    return str(row.get("status")) == "Success"
+
+def _found(row):
+    return str(row.get("status_code")) == "200"
+
+# endpoint -> (username column, userID column, status column, test for a row that succeeded).
+# Registration rows count as ok whenever the user ends up registered, including
+# "User exists!" and users skipped as "Already registered".
+endpoints = {
+    "registration": ("userName", "userID", "status_code", registry.is_registered_result),
+    "login": ("username", None, "status", _logged_in),
+    "getuser": ("username", "userID", "status_code", _found),
+}
+
+# Rows buffered before they are written
+default_batch_size = 500
+
+def default_path():
+    """The database named by BOOKSTORE_RESULTS_DB, or None."""
+    return os.environ.get("BOOKSTORE_RESULTS_DB") or None
+
+class ResultStore:
+    """Append-only result tables in one SQLite file."""
+
+    def __init__(self, path, batch_size=default_batch_size):
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pending = []
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " run_id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " endpoint TEXT NOT NULL,"
+            " input TEXT,"
+            " output TEXT,"
+            " started_at REAL NOT NULL,"
+            " finished_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS runs_endpoint ON runs (endpoint, run_id)")
+        for table in endpoints:
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                " run_id INTEGER NOT NULL,"
+                " recorded_at REAL NOT NULL,"
+                " username TEXT,"
+                " user_id TEXT,"
+                " status TEXT,"
+                " ok INTEGER NOT NULL,"
+                " data TEXT NOT NULL)"
+            )
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS {table}_username ON {table} (username, run_id)")
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS {table}_user_id ON {table} (user_id, run_id)")
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS {table}_status ON {table} (status, run_id)")
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS {table}_ok ON {table} (ok, run_id)")
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS {table}_recorded_at ON {table} (recorded_at)")
+        self._db.commit()
+
+    def start_run(self, endpoint, input_path=None, output_path=None):
+        """Register a new run and return its id."""
+        _check_endpoint(endpoint)
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO runs (endpoint, input, output, started_at) VALUES (?, ?, ?, ?)",
+                (endpoint, input_path and os.path.abspath(input_path),
+                 output_path and os.path.abspath(output_path), time.time()))
+            self._db.commit()
+            return cursor.lastrowid
+
+    def finish_run(self, run_id):
+        self.flush()
+        with self._lock:
+            self._db.execute("UPDATE runs SET finished_at = ? WHERE run_id = ?", (time.time(), run_id))
+            self._db.commit()
+
+    def add(self, endpoint, run_id, row):
+        """Buffer one output row; it is written with the next batch."""
+        username_column, user_id_column, status_column, succeeded = endpoints[endpoint]
+        status = str(row.get(status_column, ""))
+        user_id = row.get(user_id_column) if user_id_column else None
+        record = (run_id, time.time(), row.get(username_column) or None,
+                  None if user_id in (None, "", "N/A") else user_id,
+                  status, succeeded(row), json.dumps(row, default=str))
+        with self._lock:
+            self._pending.append((endpoint, record))
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered rows in one transaction."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return
+            with self._db:
+                for endpoint in endpoints:
+                    records = [record for table, record in pending if table == endpoint]
+                    if records:
+                        self._db.executemany(
+                            f"INSERT INTO {endpoint} (run_id, recorded_at, username, user_id, status, ok, data)"
+                            " VALUES (?, ?, ?, ?, ?, ?, ?)", records)
+
+    def runs(self, endpoint, limit=10):
+        """Return the latest runs of an endpoint, newest first."""
+        _check_endpoint(endpoint)
+        with self._lock:
+            cursor = self._db.execute(
+                "SELECT run_id, input, output, started_at, finished_at FROM runs"
+                " WHERE endpoint = ? ORDER BY run_id DESC LIMIT ?", (endpoint, limit))
+            return [dict(zip(("run_id", "input", "output", "started_at", "finished_at"), row)) for row in cursor]
+
+    def failed(self, endpoint, last_runs=5):
+        """Return the failed rows of the last runs of an endpoint, newest run first."""
+        run_ids = [run["run_id"] for run in self.runs(endpoint, last_runs)]
+        if not run_ids:
+            return []
+        with self._lock:
+            cursor = self._db.execute(
+                f"SELECT run_id, username, user_id, status, data FROM {endpoint}"
+                f" WHERE ok = 0 AND run_id IN ({','.join('?' * len(run_ids))})"
+                " ORDER BY run_id DESC, rowid", run_ids)
+            return [
+                {"run_id": run_id, "username": username, "user_id": user_id, "status": status, "row": json.loads(data)}
+                for run_id, username, user_id, status, data in cursor
+            ]
+
+    def sink(self, endpoint, input_path=None, output_path=None):
+        """Return a ResultSink that records one run of endpoint."""
+        return ResultSink(self, endpoint, input_path, output_path)
+
+    def close(self):
+        if self._db is None:
+            return
+        self.flush()
+        with self._lock:
+            self._db.close()
+            self._db = None
+
+class ResultSink:
+    """One run of one endpoint, fed by a CheckpointedWriter.
+
+    The run is created on first use, so a writer that resumes an earlier run
+    can hand over that run's id first.
+    """
+
+    def __init__(self, store, endpoint, input_path=None, output_path=None):
+        _check_endpoint(endpoint)
+        self.store = store
+        self.endpoint = endpoint
+        self.input_path = input_path
+        self.output_path = output_path
+        self._run_id = None
+
+    @property
+    def run_id(self):
+        if self._run_id is None:
+            self._run_id = self.store.start_run(self.endpoint, self.input_path, self.output_path)
+        return self._run_id
+
+    def resume(self, run_id):
+        """Keep adding rows to an earlier, unfinished run."""
+        self._run_id = run_id
+
+    def add(self, row):
+        self.store.add(self.endpoint, self.run_id, row)
+
+    def flush(self):
+        self.store.flush()
+
+    def close(self, finished=True):
+        if finished:
+            self.store.finish_run(self.run_id)
+        self.store.close()
+
+def _check_endpoint(endpoint):
+    if endpoint not in endpoints:
+        raise ValueError(f"Unknown endpoint {endpoint!r}, expected one of {', '.join(endpoints)}")
+
+def open_sink(path, endpoint, input_path=None, output_path=None):
+    """Return a sink for one run in the database at path, or None when path is empty."""
+    return ResultStore(path).sink(endpoint, input_path, output_path) if path else None
+
+def add_arguments(parser):
+    """Add the --results-db option to a batch script's argument parser."""
+    parser.add_argument("--results-db", default=default_path(),
+                        help="also append every result to this SQLite database, tagged with a run id")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the results stored by the batch scripts.")
+    parser.add_argument("database", help="SQLite file written with --results-db")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    runs_parser = subparsers.add_parser("runs", help="list the latest runs")
+    runs_parser.add_argument("--endpoint", choices=endpoints, required=True)
+    runs_parser.add_argument("--limit", type=int, default=10)
+    failed_parser = subparsers.add_parser("failed", help="list the users that failed in the last runs")
+    failed_parser.add_argument("--endpoint", choices=endpoints, required=True)
+    failed_parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    store = ResultStore(args.database)
+    try:
+        if args.command == "runs":
+            for run in store.runs(args.endpoint, args.limit):
+                state = "finished" if run["finished_at"] else "unfinished"
+                started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run["started_at"]))
+                print(f"run {run['run_id']}  {started}  {state}  {run['input'] or ''}")
+        else:
+            for row in store.failed(args.endpoint, args.runs):
+                print(f"run {row['run_id']}  {row['username'] or ''}  {row['user_id'] or ''}  {row['status']}")
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
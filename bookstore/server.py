@@ -0,0 +1,317 @@
+"""Local stand-in for the Bookstore Account API.
+
+Serves Account/v1/User, User/{userID}, Authorized and GenerateToken with the
+status codes and messages the real API returns, on a plain asyncio HTTP/1.1
+server with keep-alive. Latency and errors can be injected for load tests.
+
+Run it on its own with:
+
+    python -m bookstore.server --port 8080
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+
+from bookstore.passwords import is_valid_password, password_message, required_message
+
+# Messages returned by the real API
+exists_message = "User exists!"
+not_found_message = "User not found!"
+not_authorized_message = "User not authorized!"
+
+# How long generated tokens stay valid
+token_lifetime = timedelta(days=7)
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+def _b64_decode(segment):
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+class LocalBookstoreServer:
+    """In-process Account API stand-in with optional latency and error injection.
+
+    latency is a fixed delay in seconds or a (min, max) range. error_rate is the
+    share of requests answered with one of error_statuses instead of the real
+    response; 429 answers carry a Retry-After of retry_after seconds.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, error_rate=0.0,
+                 error_statuses=(500, 429), retry_after=1, seed=None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.retry_after = retry_after
+        self.request_count = 0
+        self._random = random.Random(seed)
+        self._secret = uuid.uuid4().bytes
+        self._users = {}  # userName -> {"userID", "password", "books"}
+        self._ids = {}  # userID -> userName
+        self._forced_errors = []
+        self._server = None
+        self._writers = set()
+        self._loop = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    # Test helpers
+
+    def add_user(self, username, password, user_id=None, books=None):
+        """Create an account directly, e.g. to seed accounts the tests expect."""
+        user_id = user_id or str(uuid.uuid4())
+        self._users[username] = {"userID": user_id, "password": password, "books": list(books or [])}
+        self._ids[user_id] = username
+        return user_id
+
+    def fail_next(self, status, count=1):
+        """Answer the next count requests with status."""
+        self._forced_errors.extend([status] * count)
+
+    def make_token(self, username, password="", issued_at=None):
+        """Return an HS256 JWT with the same claims as the real API's tokens."""
+        header = _b64(json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":")).encode())
+        claims = {"userName": username, "password": password, "iat": int(issued_at or time.time())}
+        payload = _b64(json.dumps(claims, separators=(",", ":")).encode())
+        signature = hmac.new(self._secret, f"{header}.{payload}".encode(), hashlib.sha256).digest()
+        return f"{header}.{payload}.{_b64(signature)}"
+
+    def _token_user(self, token):
+        """Return the userName of a well-formed token for a known user, else None."""
+        parts = token.split(".")
+        if len(parts) != 3:
+            return None
+        try:
+            claims = json.loads(_b64_decode(parts[1]))
+        except ValueError:
+            return None
+        username = claims.get("userName") if isinstance(claims, dict) else None
+        return username if username in self._users else None
+
+    # Endpoints
+
+    def _credentials(self, body):
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
+        return data.get("userName") or "", data.get("password") or ""
+
+    def _register(self, body):
+        username, password = self._credentials(body)
+        if not username or not password:
+            return 400, {"code": "1200", "message": required_message}
+        if not is_valid_password(password):
+            return 400, {"code": "1300", "message": password_message}
+        if username in self._users:
+            return 406, {"code": "1204", "message": exists_message}
+        user_id = self.add_user(username, password)
+        return 201, {"userID": user_id, "username": username, "books": []}
+
+    def _authorized(self, body):
+        username, password = self._credentials(body)
+        if not username or not password:
+            return 400, {"code": "1200", "message": required_message}
+        user = self._users.get(username)
+        if user is None or user["password"] != password:
+            return 404, {"code": "1207", "message": not_found_message}
+        return 200, True
+
+    def _generate_token(self, body):
+        username, password = self._credentials(body)
+        if not username or not password:
+            return 400, {"code": "1200", "message": required_message}
+        user = self._users.get(username)
+        if user is None or user["password"] != password:
+            return 200, {"token": None, "expires": None, "status": "Failed", "result": "User authorization failed."}
+        now = datetime.now(timezone.utc)
+        expires = (now + token_lifetime).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+        return 200, {
+            "token": self.make_token(username, password, now.timestamp()),
+            "expires": expires,
+            "status": "Success",
+            "result": "User authorized successfully."
+        }
+
+    def _get_user(self, user_id, headers):
+        token = headers.get("authorization", "")[len("Bearer "):].strip()
+        username = self._token_user(token)
+        if username is None:
+            return 401, {"code": "1200", "message": not_authorized_message}
+        if self._ids.get(user_id) != username:
+            return 401, {"code": "1207", "message": not_found_message}
+        user = self._users[username]
+        return 200, {"userId": user_id, "username": username, "books": user["books"]}
+
+    def _delete_user(self, user_id, headers):
+        status, data = self._get_user(user_id, headers)
+        if status != 200:
+            return status, data
+        del self._users[self._ids.pop(user_id)]
+        return 204, None
+
+    def handle(self, method, path, headers, body):
+        """Return (status, payload) for one request."""
+        path = path.split("?", 1)[0].rstrip("/")
+        if method == "POST" and path == "/Account/v1/User":
+            return self._register(body)
+        if method == "POST" and path == "/Account/v1/Authorized":
+            return self._authorized(body)
+        if method == "POST" and path == "/Account/v1/GenerateToken":
+            return self._generate_token(body)
+        if path.startswith("/Account/v1/User/"):
+            user_id = path[len("/Account/v1/User/"):]
+            if method == "GET":
+                return self._get_user(user_id, headers)
+            if method == "DELETE":
+                return self._delete_user(user_id, headers)
+        return 404, {"code": "404", "message": "Not Found"}
+
+    def _injected_error(self):
+        if self._forced_errors:
+            return self._forced_errors.pop(0)
+        if self.error_rate and self._random.random() < self.error_rate:
+            return self._random.choice(self.error_statuses)
+        return None
+
+    def _delay(self):
+        if isinstance(self.latency, (tuple, list)):
+            return self._random.uniform(*self.latency)
+        return self.latency
+
+    # HTTP plumbing
+
+    async def _serve_connection(self, reader, writer):
+        self._writers.add(writer)
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                body = await reader.readexactly(length) if length else b""
+
+                self.request_count += 1
+                delay = self._delay()
+                if delay:
+                    await asyncio.sleep(delay)
+
+                extra_headers = ""
+                error = self._injected_error()
+                if error is not None:
+                    status = error
+                    payload = {"code": str(error), "message": HTTPStatus(error).phrase}
+                    if error == 429:
+                        extra_headers = f"Retry-After: {self.retry_after}\r\n"
+                else:
+                    status, payload = self.handle(method, target, headers, body)
+
+                data = b"" if payload is None else json.dumps(payload).encode()
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                writer.write((
+                    f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"{extra_headers}"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                ).encode("latin-1") + data)
+                await writer.drain()
+                if not keep_alive:
+                    return
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def serve(self):
+        """Start listening on the running event loop."""
+        self._server = await asyncio.start_server(self._serve_connection, self.host, self.port, backlog=1024)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self._server
+
+    def start(self):
+        """Run the server in a background thread and return once it accepts connections."""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.serve())
+            ready.set()
+            self._loop.run_forever()
+
+            # Drop open keep-alive connections and let their handlers finish
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            pending = asyncio.all_tasks(self._loop)
+            if pending:
+                self._loop.run_until_complete(asyncio.wait(pending, timeout=1))
+            self._loop.run_until_complete(self._server.wait_closed())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="bookstore-server", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        """Stop a server started with start()."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the Bookstore Account API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 500/429")
+    args = parser.parse_args(argv)
+
+    server = LocalBookstoreServer(args.host, args.port, latency=args.latency, error_rate=args.error_rate)
+
+    async def run():
+        await server.serve()
+        print(f"Bookstore stand-in listening on {server.base_url}")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Split a batch job across processes (and machines) by a stable hash of a key column.
+
+Every input row belongs to shard `crc32(key) % shard_count`. Each shard runs
+in its own process with the normal asyncio engine and writes its results,
+tagged with the input row number, to `<output>.shard-<i>-of-<n>.csv` through a
+CheckpointedWriter, so shards resume independently. When all shards are done,
+their files are merged back into input order.
+
+To split one job over several machines, run each machine with --shard-index
+and --shard-count, copy the shard files into one place and merge them with
+--merge-shards.
+"""
+import csv
+import heapq
+import os
+import zlib
+
+from bookstore import checkpoint, engine, results
+
+# Column holding the input row number in shard output files
+row_column = "_row"
+
+def shard_of(key, shard_count):
+    """Return the shard of key; the same key always lands in the same shard."""
+    return zlib.crc32((key or "").encode("utf-8")) % shard_count
+
+def shard_path(output_path, shard_index, shard_count):
+    root, ext = os.path.splitext(output_path)
+    return f"{root}.shard-{shard_index}-of-{shard_count}{ext or '.csv'}"
+
+def _shard_rows(input_path, key_column, shard_index, shard_count):
+    """Yield (row number, row) for the rows of one shard."""
+    with open(input_path, mode="r") as infile:
+        for number, row in enumerate(csv.DictReader(infile)):
+            if shard_of(row.get(key_column), shard_count) == shard_index:
+                yield number, row
+
+async def _process_shard(row_func, rows, writer, concurrency):
+    async for (number, _), result in engine.run_ordered(lambda item: row_func(item[1]), rows, concurrency):
+        writer.record(None if result is None else {row_column: number, **result})
+
+def run_shard(row_func, fieldnames, key_column, input_path, output_path, shard_index, shard_count,
+              concurrency=engine.default_concurrency, resume=True, initializer=None, initargs=(), results_run=None):
+    """Process one shard of input_path and write its shard output file. Returns that file's path.
+
+    results_run is an optional (database, endpoint, run id) to record the rows
+    in; with a run id of None the shard starts a run of its own.
+    """
+    import asyncio
+
+    if initializer is not None:
+        initializer(*initargs)
+    path = shard_path(output_path, shard_index, shard_count)
+    sink = None
+    if results_run:
+        database, endpoint, run_id = results_run
+        sink = results.open_sink(database, endpoint, input_path, output_path)
+        if run_id is not None:
+            sink.resume(run_id)
+    with checkpoint.CheckpointedWriter(path, [row_column] + list(fieldnames),
+                                       input_path=input_path, resume=resume, sink=sink) as writer:
+        rows = _shard_rows(input_path, key_column, shard_index, shard_count)
+        # Skip the rows of this shard that a previous run already finished
+        for _ in range(writer.completed):
+            next(rows, None)
+        asyncio.run(_process_shard(row_func, rows, writer, concurrency))
+    return path
+
+def merge_shards(output_path, fieldnames, shard_count, remove=True):
+    """Merge every shard file of output_path into output_path, in input order."""
+    paths = [shard_path(output_path, index, shard_count) for index in range(shard_count)]
+    missing = [path for path in paths if not os.path.exists(path)]
+    if missing:
+        raise FileNotFoundError(f"Missing shard outputs: {', '.join(missing)}")
+
+    files = [open(path, mode="r", newline="") for path in paths]
+    try:
+        readers = [
+            ((int(row[row_column]), row) for row in csv.DictReader(infile))
+            for infile in files
+        ]
+        with open(output_path, mode="w", newline="") as outfile:
+            csv_writer = csv.DictWriter(outfile, fieldnames=fieldnames, extrasaction="ignore")
+            csv_writer.writeheader()
+            for _, row in heapq.merge(*readers, key=lambda item: item[0]):
+                csv_writer.writerow(row)
+    finally:
+        for infile in files:
+            infile.close()
+
+    if remove:
+        for path in paths:
+            os.remove(path)
+
+def run_sharded(row_func, fieldnames, key_column, input_path, output_path, processes, shard_count=None,
+                concurrency=engine.default_concurrency, resume=True, initializer=None, initargs=(), results_run=None):
+    """Run every shard in a pool of processes, then merge the results into output_path.
+
+    row_func, initializer and initargs must be picklable, i.e. module-level
+    functions and plain values.
+    """
+    shard_count = shard_count or processes
+    # Only needed with several processes, so not imported up front
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+        futures = [
+            pool.submit(run_shard, row_func, fieldnames, key_column, input_path, output_path,
+                        index, shard_count, concurrency, resume, initializer, initargs, results_run)
+            for index in range(shard_count)
+        ]
+        for future in futures:
+            future.result()
+    merge_shards(output_path, fieldnames, shard_count)
+
+def add_arguments(parser):
+    """Add the sharding options to a batch script's argument parser."""
+    parser.add_argument("--processes", type=int, default=1,
+                        help="run the input as shards in this many processes")
+    parser.add_argument("--shard-count", type=int,
+                        help="number of shards (defaults to --processes)")
+    parser.add_argument("--shard-index", type=int,
+                        help="only run this shard and keep its shard file, e.g. one shard per machine")
+    parser.add_argument("--merge-shards", action="store_true",
+                        help="only merge existing shard files into the output")
+
+def is_requested(args):
+    return args.processes > 1 or args.shard_count or args.shard_index is not None or args.merge_shards
+
+def run_from_arguments(args, row_func, fieldnames, key_column, concurrency=engine.default_concurrency,
+                       initializer=None, initargs=(), endpoint=None):
+    """Run a batch script's job the way its sharding options ask for. Returns the file written.
+
+    With --results-db, rows are recorded under endpoint; all shards of one
+    sharded run share a single run id.
+    """
+    shard_count = args.shard_count or args.processes
+    resume = not getattr(args, "restart", False)
+    database = getattr(args, "results_db", None) if endpoint else None
+    results_run = (database, endpoint, None) if database else None
+    if args.merge_shards:
+        merge_shards(args.output, fieldnames, shard_count)
+        return args.output
+    if args.shard_index is not None:
+        if not 0 <= args.shard_index < shard_count:
+            raise SystemExit(f"--shard-index must be between 0 and {shard_count - 1}")
+        return run_shard(row_func, fieldnames, key_column, args.input, args.output, args.shard_index,
+                         shard_count, concurrency, resume, initializer, initargs, results_run)
+    if database:
+        store = results.ResultStore(database)
+        results_run = (database, endpoint, store.start_run(endpoint, args.input, args.output))
+        store.close()
+    run_sharded(row_func, fieldnames, key_column, args.input, args.output, args.processes,
+                shard_count, concurrency, resume, initializer, initargs, results_run)
+    return args.output
@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+from bookstore import accounts, api, parallel
+
+def test_pool_hands_out_each_account_to_one_holder(local_api):
+    pool = accounts.AccountPool(size=2)
+    first, second = pool.acquire(), pool.acquire()
+    assert first.username != second.username
+    assert api.get_user(first.user_id, first.token).status_code == 200
+
+    # An empty pool registers one more instead of sharing
+    third = pool.acquire()
+    assert len(pool.accounts) == 3 and third not in (first, second)
+    pool.release(first)
+    assert pool.acquire() == first
+
+    pool.delete_all()
+    assert api.authorize(first.username, first.password).status_code == 404
+
+def test_fill_replaces_placeholders():
+    account = accounts.Account("poolUser", "Pool#1234A1", "id-1", "token-1")
+    row = {"userID": "{account.user_id}", "token": "Bearer {account.token}", "userName": "{new.username}",
+           "expected_status_code": "200"}
+    assert accounts.fill(row, account, "newUser") == {
+        "userID": "id-1", "token": "Bearer token-1", "userName": "newUser", "expected_status_code": "200"}
+
+def test_workers_split_the_collected_tests():
+    items = list(range(10))
+    shares = []
+    for index in range(3):
+        deselected = []
+        config = SimpleNamespace(getoption=lambda name, worker=(index, 3): worker,
+                                 hook=SimpleNamespace(pytest_deselected=lambda items: deselected.extend(items)))
+        share = list(items)
+        parallel.pytest_collection_modifyitems(config, share)
+        shares.append(share)
+        assert sorted(share + deselected) == items
+    assert sorted(sum(shares, [])) == items
+
+def test_pool_is_fixed_under_a_cassette_so_recordings_replay(tmp_path):
+    """A module recorded against the stand-in replays without a server, pool accounts included."""
+    cassette = str(tmp_path / "suite.jsonl")
+    # Keep the runs' token cache and index out of ~/.bookstore and ignore the caller's BOOKSTORE_* settings
+    env = {name: value for name, value in os.environ.items() if not name.startswith("BOOKSTORE_")}
+    env.update(HOME=str(tmp_path), BOOKSTORE_TOKEN_CACHE=str(tmp_path / "tokens.sqlite3"),
+               BOOKSTORE_REGISTERED_INDEX=str(tmp_path / "registered.sqlite3"))
+    command = [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", f"--cassette={cassette}",
+               os.path.join("GetUser", "test_getuser.py")]
+    record = subprocess.run(command + ["--local-api", "--record"], cwd=parallel.root, env=env,
+                            capture_output=True, text=True)
+    assert record.returncode == 0, record.stdout
+    replay = subprocess.run(command, cwd=parallel.root, env=env, capture_output=True, text=True)
+    assert replay.returncode == 0, replay.stdout
+
+def test_tracked_accounts_are_deleted_with_the_pool(local_api):
+    pool = accounts.AccountPool(size=0)
+    username, password = pool.new_username(), accounts.new_password()
+    pool.track(username, password, api.register(username, password).json()["userID"])
+    pool.delete_all()
+    assert api.authorize(username, password).status_code == 404
+
+def test_fixed_prefix_gives_the_same_accounts():
+    assert accounts.new_password("cassette", "cassetten0") == accounts.new_password("cassette", "cassetten0")
+    assert accounts.new_password("cassette", "cassetten0") != accounts.new_password("cassette", "cassetten1")
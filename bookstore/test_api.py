@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+
+from bookstore import __main__ as cli
+from bookstore import api
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+def test_account_lifecycle(local_api):
+    assert api.register("apiUser", "Api@Pass1").status_code == 201
+    assert api.authorize("apiUser", "Api@Pass1").json() is True
+    token = api.generate_token("apiUser", "Api@Pass1").json()["token"]
+    user_id = api.get_user(local_api._users["apiUser"]["userID"], token).json()["userId"]
+
+    assert api.delete_user(user_id, token).status_code == 204
+    assert api.authorize("apiUser", "Api@Pass1").status_code == 404
+
+def test_scripts_import_without_requests():
+    code = ("import sys; sys.path[:0] = ['Login', 'Registration', 'GetUser']; "
+            "import login_users, register_users, getusers; print('requests' in sys.modules)")
+    output = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "False"
+
+def test_cli_runs_the_script_of_a_subcommand(monkeypatch):
+    calls = []
+    monkeypatch.setattr(sys, "argv", ["bookstore"])
+    monkeypatch.setattr(cli.load("login"), "main", calls.append)
+    cli.main(["login", "--input", "credentials.csv", "--concurrency", "5"])
+    assert calls == [["--input", "credentials.csv", "--concurrency", "5"]]
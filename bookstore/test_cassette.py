@@ -0,0 +1,48 @@
+import pytest
+
+from bookstore import cassette, client
+
+base_url = "https://bookstore.toolsqa.com/Account/v1"
+
+@pytest.fixture
+def cassette_path(tmp_path):
+    yield str(tmp_path / "cassette.jsonl")
+    cassette.eject()
+
+def test_recorded_interactions_replay_without_network(local_api, cassette_path, monkeypatch):
+    credentials = {"userName": "PixelPusher22", "password": "KucingMakanTuna22#"}
+    cassette.use(cassette_path, "record")
+    login = client.post(f"{base_url}/Authorized", json=credentials)
+    token = client.post(f"{base_url}/GenerateToken", json=credentials).json()["token"]
+    good = client.get(f"{base_url}/User/invalid_user_id", headers={"Authorization": f"Bearer {token}"})
+    bad = client.get(f"{base_url}/User/invalid_user_id", headers={"Authorization": "Bearer InvalidToken"})
+    cassette.eject()
+
+    # Nothing listens here, so any real request would fail
+    monkeypatch.setattr(client, "base_url", "http://127.0.0.1:9")
+    tape = cassette.use(cassette_path, "replay")
+    assert len(tape) == 4
+
+    replayed = client.post(f"{base_url}/Authorized", json=credentials)
+    assert (replayed.status_code, replayed.text) == (login.status_code, login.text)
+    replayed = client.get(f"{base_url}/User/invalid_user_id", headers={"Authorization": "Bearer InvalidToken"})
+    assert replayed.json() == bad.json()
+    replayed = client.get(f"{base_url}/User/invalid_user_id", headers={"Authorization": f"Bearer {token}"})
+    assert replayed.json() == good.json()
+
+def test_replay_miss_raises(cassette_path):
+    open(cassette_path, mode="w").close()
+    cassette.use(cassette_path, "replay")
+    with pytest.raises(cassette.CassetteMiss):
+        client.post(f"{base_url}/Authorized", json={"userName": "nobody", "password": "x"})
+
+def test_identical_requests_replay_in_recorded_order(local_api, cassette_path):
+    cassette.use(cassette_path, "record")
+    local_api.fail_next(500)
+    payload = {"userName": "PixelPusher22", "password": "KucingMakanTuna22#"}
+    statuses = [client.post(f"{base_url}/Authorized", json=payload).status_code for _ in range(2)]
+    cassette.eject()
+
+    cassette.use(cassette_path, "replay")
+    replayed = [client.post(f"{base_url}/Authorized", json=payload).status_code for _ in range(3)]
+    assert replayed == statuses + statuses[-1:]
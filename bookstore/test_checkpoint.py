@@ -0,0 +1,54 @@
+import csv
+import os
+
+import pytest
+
+from bookstore.checkpoint import CheckpointedWriter
+
+fieldnames = ["username", "status"]
+
+def read_rows(path):
+    with open(path, mode="r", newline="") as infile:
+        return list(csv.DictReader(infile))
+
+def test_writer_streams_rows_and_removes_checkpoint_when_finished(tmp_path):
+    output_path = tmp_path / "out.csv"
+    with CheckpointedWriter(str(output_path), fieldnames, flush_every=2) as writer:
+        for i in range(5):
+            writer.record({"username": f"user{i}", "status": "Success"})
+
+    assert [row["username"] for row in read_rows(output_path)] == [f"user{i}" for i in range(5)]
+    assert not os.path.exists(f"{output_path}.checkpoint")
+
+def test_rerun_resumes_after_last_checkpoint(tmp_path):
+    input_path = tmp_path / "in.csv"
+    output_path = tmp_path / "out.csv"
+    input_path.write_text("username\n")
+
+    with pytest.raises(RuntimeError):
+        with CheckpointedWriter(str(output_path), fieldnames, input_path=str(input_path), flush_every=3) as writer:
+            for i in range(10):
+                if i == 7:
+                    raise RuntimeError("crash")
+                # Incomplete input rows produce no output row but still count
+                writer.record(None if i == 1 else {"username": f"user{i}", "status": "Success"})
+
+    with CheckpointedWriter(str(output_path), fieldnames, input_path=str(input_path), flush_every=3) as writer:
+        assert writer.resumed
+        assert writer.completed == 7
+        for i in range(writer.completed, 10):
+            writer.record({"username": f"user{i}", "status": "Success"})
+
+    usernames = [row["username"] for row in read_rows(output_path)]
+    assert usernames == [f"user{i}" for i in range(10) if i != 1]
+
+def test_checkpoint_for_other_input_is_ignored(tmp_path):
+    output_path = tmp_path / "out.csv"
+    with pytest.raises(RuntimeError):
+        with CheckpointedWriter(str(output_path), fieldnames, input_path="a.csv", flush_every=1) as writer:
+            writer.record({"username": "user0", "status": "Success"})
+            raise RuntimeError("crash")
+
+    with CheckpointedWriter(str(output_path), fieldnames, input_path="b.csv") as writer:
+        assert not writer.resumed
+    assert read_rows(output_path) == []
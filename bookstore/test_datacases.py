@@ -0,0 +1,29 @@
+import pytest
+
+from bookstore import datacases
+
+def test_cases_are_read_by_index_with_quoted_newlines(tmp_path):
+    path = tmp_path / "cases.csv"
+    path.write_text('userName,expected_message\nfirst,"one, two"\n\nsecond,"multi\nline"\nthird,plain\n')
+    cases = datacases.CaseFile(str(path))
+
+    assert len(cases) == 3
+    assert cases.read(2) == {"userName": "third", "expected_message": "plain"}
+    assert cases.read(1) == {"userName": "second", "expected_message": "multi\nline"}
+    assert cases.read(0)["expected_message"] == "one, two"
+    assert cases.ids(range(1, 3)) == ["cases.csv#1", "cases.csv#2"]
+
+def test_jsonl_cases(tmp_path):
+    path = tmp_path / "cases.jsonl"
+    path.write_text('{"userName": "a", "expected_status_code": 201}\n\n{"userName": "b", "expected_status_code": 406}\n')
+    cases = datacases.CaseFile(str(path))
+    assert len(cases) == 2
+    assert cases.read(1) == {"userName": "b", "expected_status_code": 406}
+
+def test_shards_cover_the_selected_range_once():
+    selected = datacases.parse_range("10:")
+    shards = [datacases.select(95, selected, (index, 4)) for index in range(4)]
+    assert [index for shard in shards for index in shard] == list(range(10, 95))
+    assert datacases.select(95, datacases.parse_range(":3")) == range(3)
+    with pytest.raises(ValueError):
+        datacases.parse_shard("4/4")
@@ -0,0 +1,49 @@
+import csv
+
+from bookstore import api, datagen, passwords
+
+mix = {"invalid": 0.2, "missing": 0.1, "duplicates": 0.1}
+
+def read_rows(path):
+    with open(path, newline="") as infile:
+        return list(csv.DictReader(infile))
+
+def test_files_are_deterministic_and_follow_the_password_rules(tmp_path):
+    for name in ("a", "b"):
+        datagen.generate(2000, 7, tmp_path / f"users-{name}.csv", tmp_path / f"credentials-{name}.csv",
+                         tmp_path / f"getuser-{name}.csv", issued_at=1760000000, **mix)
+    for kind in ("users", "credentials", "getuser"):
+        assert (tmp_path / f"{kind}-a.csv").read_bytes() == (tmp_path / f"{kind}-b.csv").read_bytes()
+
+    rows = read_rows(tmp_path / "users-a.csv")
+    statuses = {row["expected_status_code"] for row in rows}
+    assert statuses == {"201", "400", "406"}
+    for row in rows:
+        if row["expected_message"] == passwords.password_message:
+            assert not passwords.is_valid_password(row["password"])
+        elif row["expected_status_code"] in ("201", "406"):
+            assert passwords.is_valid_password(row["password"])
+        else:
+            assert not row["userName"] or not row["password"]
+
+def test_expectations_match_the_stand_in(tmp_path, local_api):
+    datagen.generate(150, 3, tmp_path / "users.csv", tmp_path / "credentials.csv", prefix="genReg", **mix)
+    for row in read_rows(tmp_path / "users.csv"):
+        response = api.register(row["userName"], row["password"])
+        assert response.status_code == int(row["expected_status_code"]), row
+        if response.status_code != 201:
+            assert response.json()["message"] == row["expected_message"]
+    for row in read_rows(tmp_path / "credentials.csv"):
+        response = api.authorize(row["username"], row["password"])
+        assert response.status_code == int(row["expected_status"]), row
+        data = api.generate_token(row["username"], row["password"]).json()
+        assert (data.get("status", "Failed"), data.get("result", data.get("message"))) == \
+            (row["expected_token_status"], row["expected_token_result"])
+
+    datagen.seed_server(local_api, 150, 4, prefix="genGet", **mix)
+    datagen.generate(150, 4, getuser_path=tmp_path / "getuser.csv", prefix="genGet", **mix)
+    for row in read_rows(tmp_path / "getuser.csv"):
+        response = api.get_user(row["userID"], row["token"])
+        assert response.status_code == int(row["expected_status_code"]), row
+        if response.status_code != 200:
+            assert response.json()["message"] == row["expected_message"]
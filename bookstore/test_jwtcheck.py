@@ -0,0 +1,35 @@
+import pytest
+
+from bookstore import jwtcheck
+from bookstore.server import LocalBookstoreServer
+
+issued_at = 1736576303  # 2025-01-11T06:18:23Z
+day = 24 * 60 * 60
+
+@pytest.fixture
+def token():
+    return LocalBookstoreServer().make_token("Testing11Januari", "KucinGmakanikan12##", issued_at)
+
+def test_decode_reads_the_api_claims(token):
+    header, claims = jwtcheck.decode(token)
+    assert header["alg"] == "HS256"
+    assert claims["userName"] == "Testing11Januari"
+    assert claims["iat"] == issued_at
+
+@pytest.mark.parametrize("token", ["InvalidTokenExample123456", "a.b.c", "", None, "e30.e30.sig"])
+def test_malformed_tokens(token):
+    with pytest.raises(jwtcheck.MalformedToken):
+        jwtcheck.decode(token)
+    assert jwtcheck.inspect(token)["result"] == jwtcheck.malformed
+
+def test_expiry_comes_from_expires_or_the_token_lifetime(token):
+    assert jwtcheck.inspect(token, now=issued_at + day)["result"] == jwtcheck.valid
+    assert jwtcheck.inspect(token, now=issued_at + 8 * day)["result"] == jwtcheck.expired
+    # GenerateToken's expires wins over the default lifetime
+    assert jwtcheck.inspect(token, "2025-01-12T00:00:00.000Z", now=issued_at + 2 * day)["result"] == jwtcheck.expired
+    assert jwtcheck.inspect(token, now=issued_at + 6 * day, margin=2 * day)["result"] == jwtcheck.expired
+
+def test_token_of_another_user_and_from_the_future(token):
+    info = jwtcheck.inspect(token, username="PixelPusher22", now=issued_at)
+    assert info["result"] == jwtcheck.wrong_user
+    assert jwtcheck.inspect(token, now=issued_at - day)["result"] == jwtcheck.malformed
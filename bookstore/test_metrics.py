@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from bookstore import client, metrics
+
+base_url = "https://bookstore.toolsqa.com/Account/v1"
+
+@pytest.fixture
+def recorder():
+    active = metrics.enable()
+    yield active
+    metrics.disable()
+
+@pytest.mark.parametrize("method, url, expected", [
+    ("POST", f"{base_url}/Authorized", "POST /Account/v1/Authorized"),
+    ("GET", f"{base_url}/User/ef6c34e0-eaf7-4f58-ace9-49119396ef57", "GET /Account/v1/User/{userID}"),
+    ("POST", f"{base_url}/User", "POST /Account/v1/User"),
+])
+def test_endpoint_name(method, url, expected):
+    assert metrics.endpoint_name(method, url) == expected
+
+def test_requests_are_timed_per_endpoint_status_and_phase(local_api, recorder):
+    credentials = {"userName": "PixelPusher22", "password": "KucingMakanTuna22#"}
+    client.post(f"{base_url}/Authorized", json=credentials)
+    client.post(f"{base_url}/Authorized", json={"userName": "PixelPusher22", "password": "wrong"})
+
+    ok = recorder.durations[("POST /Account/v1/Authorized", "200", "total")]
+    assert ok.count == 1
+    assert ("POST /Account/v1/Authorized", "404", "server") in recorder.durations
+    assert recorder.sizes[("POST /Account/v1/Authorized", "200")].sum == len(b"true")
+
+def test_export_writes_prometheus_and_json(local_api, recorder, tmp_path):
+    client.post(f"{base_url}/Authorized", json={})
+    with metrics.timer("csv_write"):
+        pass
+
+    prom_path = tmp_path / "metrics.prom"
+    json_path = tmp_path / "metrics.json"
+    metrics.export(str(prom_path))
+    metrics.export(str(json_path))
+
+    text = prom_path.read_text()
+    assert "# TYPE bookstore_request_duration_seconds histogram" in text
+    assert 'endpoint="POST /Account/v1/Authorized",status="400",phase="total",le="+Inf"} 1' in text
+    assert 'bookstore_local_duration_seconds_count{phase="csv_write"} 1' in text
+
+    data = json.loads(json_path.read_text())
+    assert data["requests"][0]["endpoint"] == "POST /Account/v1/Authorized"
+    assert data["local"][0]["phase"] == "csv_write"
+
+def test_timer_is_a_no_op_while_disabled():
+    metrics.disable()
+    with metrics.timer("csv_write"):
+        pass
+    assert metrics.recorder is None
+
+@pytest.mark.parametrize("fraction, expected", [(0.50, 50), (0.95, 95), (0.99, 99), (1.0, 100)])
+def test_percentile(fraction, expected):
+    assert metrics.percentile(list(range(1, 101)), fraction) == expected
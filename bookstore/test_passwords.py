@@ -0,0 +1,63 @@
+import csv
+import re
+
+import pytest
+
+from bookstore import passwords
+
+def old_is_valid_password(password):
+    """The five-check version Registration used before."""
+    return bool(
+        len(password) >= 8
+        and re.search(r'[A-Z]', password)
+        and re.search(r'[a-z]', password)
+        and re.search(r'\d', password)
+        and re.search(r'[^a-zA-Z0-9]', password)
+    )
+
+@pytest.mark.parametrize("password, broken", [
+    ("KucingMakanTuna22#", []),
+    ("weakpass", ["uppercase", "digit", "special"]),
+    ("Sh0rt!", ["length"]),
+    ("NOLOWER1!", ["lowercase"]),
+    ("NoSpecial123", ["special"]),
+    ("Kucing Makan 22", []),
+    ("Kucingé22Makan", []),
+    ("", ["length", "uppercase", "lowercase", "digit", "special"]),
+])
+def test_broken_rules(password, broken):
+    assert passwords.broken_rules(password) == broken
+    assert passwords.is_valid_password(password) == (not broken)
+    assert old_is_valid_password(password) == (not broken)
+
+def test_rejection_message_matches_the_api():
+    assert passwords.rejection_message("", "KucingMakanTuna22#") == passwords.required_message
+    assert passwords.rejection_message("ZulvikaTest", "weakpass") == passwords.password_message
+    assert passwords.rejection_message("ZulvikaTest", "KucingMakanTuna22#") is None
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 100])
+def test_split_file_keeps_order_and_quoted_rows(tmp_path, chunk_size):
+    input_path = tmp_path / "users.csv"
+    input_path.write_text(
+        "userName,password\n"
+        "first,KucingMakanTuna22#\n"
+        "weak,weakpass\n"
+        ",KucingMakanTuna22#\n"
+        '"comma, user","Quoted,Pass1"\n'
+        '"quote ""user""",short\n'
+        "last,Another@Pass9\n"
+    )
+    valid_path, rejected_path = tmp_path / "valid.csv", tmp_path / "rejected.csv"
+
+    counts = passwords.split_file(str(input_path), str(valid_path), str(rejected_path), chunk_size=chunk_size)
+
+    assert counts == (3, 3)
+    with open(valid_path, newline="") as infile:
+        assert [row["userName"] for row in csv.DictReader(infile)] == ["first", "comma, user", "last"]
+    with open(rejected_path, newline="") as infile:
+        rejected = list(csv.DictReader(infile))
+    assert [(row["userName"], row["status_code"], row["message"]) for row in rejected] == [
+        ("weak", "400", passwords.password_message),
+        ("", "400", passwords.required_message),
+        ('quote "user"', "400", passwords.password_message),
+    ]
@@ -0,0 +1,56 @@
+import argparse
+
+import pytest
+
+from bookstore import ratelimit
+from bookstore.ratelimit import AdaptiveRateLimiter, parse_retry_after
+
+@pytest.fixture
+def make_limiter(fake_clock):
+    def make(**kwargs):
+        return AdaptiveRateLimiter(clock=fake_clock, sleep=fake_clock.sleep, **kwargs), fake_clock
+    return make
+
+def test_limiter_spaces_requests_at_configured_rate(make_limiter):
+    limiter, clock = make_limiter(rate=2.0, increase=0)
+    for _ in range(5):
+        limiter.acquire()
+    assert clock.now == pytest.approx(2.0)
+
+def test_limiter_ramps_up_while_healthy(make_limiter):
+    limiter, _ = make_limiter(rate=1.0, max_rate=5.0)
+    for _ in range(100):
+        limiter.record(200)
+    assert limiter.rate == 5.0
+
+@pytest.mark.parametrize("status_code", [429, 500, 503])
+def test_limiter_backs_off_multiplicatively(make_limiter, status_code):
+    limiter, _ = make_limiter(rate=8.0, min_rate=1.0, backoff=0.5)
+    limiter.record(status_code)
+    assert limiter.rate == 4.0
+
+def test_limiter_honours_retry_after(make_limiter):
+    limiter, clock = make_limiter(rate=10.0)
+    limiter.acquire()
+    limiter.record(429, "3")
+    limiter.acquire()
+    assert clock.now >= 3.0
+
+@pytest.mark.parametrize("value, expected", [
+    ("5", 5.0),
+    ("", None),
+    (None, None),
+    ("soon", None),
+    ("Wed, 21 Oct 2015 07:28:10 GMT", 10.0),
+])
+def test_parse_retry_after(value, expected):
+    now = 1445412480.0  # 07:28:00 GMT on the same day
+    assert parse_retry_after(value, now=now) == expected
+
+def test_max_rate_option_sets_the_ceiling():
+    parser = argparse.ArgumentParser()
+    ratelimit.add_arguments(parser, 1.0)
+    args = parser.parse_args(["--max-rate", "500"])
+    assert ratelimit.from_arguments(args.rate, args.max_rate).max_rate == 500.0
+    assert parser.parse_args([]).max_rate == ratelimit.default_max_rate
+    assert ratelimit.from_arguments(0) is None
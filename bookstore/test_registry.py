@@ -0,0 +1,59 @@
+from bookstore.registry import BloomFilter, RegisteredIndex
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"user{i}")
+
+    assert all(f"user{i}" in bloom for i in range(1000))
+    false_positives = sum(f"other{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+def test_saved_filter_is_restored_from_its_bits():
+    bloom = BloomFilter(10, error_rate=0.1)
+    bloom.add("PixelPusher22")
+
+    restored = BloomFilter(10, hashes=bloom.hashes, bits=bytes(bloom.bits))
+    assert "PixelPusher22" in restored
+
+def test_index_remembers_users_across_reopen(tmp_path):
+    path = str(tmp_path / "registered.sqlite3")
+    index = RegisteredIndex(path, expected=100)
+    index.add("PixelPusher22", "id-1")
+    index.add("existing")
+    # An empty userID never replaces a known one
+    index.add("PixelPusher22", "N/A")
+    index.close()
+
+    index = RegisteredIndex(path, expected=100)
+    assert index.get("PixelPusher22") == "id-1"
+    assert index.get("existing") == ""
+    assert index.get("newUser") is None
+    assert index.entries == 2
+
+def test_filter_is_rebuilt_when_the_table_changed(tmp_path):
+    path = str(tmp_path / "registered.sqlite3")
+    RegisteredIndex(path, expected=100).close()
+    # Another process adds a user but its saved filter is overwritten by a stale one
+    other = RegisteredIndex(path, expected=100)
+    other.add("fromShard", "id-9")
+    other._write_pending()
+    RegisteredIndex(path, expected=100).close()
+
+    assert RegisteredIndex(path, expected=100).get("fromShard") == "id-9"
+
+def test_import_results_reads_registered_rows_once(tmp_path):
+    results = tmp_path / "registration_results.csv"
+    results.write_text(
+        "userName,password,status_code,userID,message\n"
+        "created,P@ssw0rd!,201,id-1,Registration successful\n"
+        "exists,P@ssw0rd!,406,N/A,User  exists!\n"
+        "weak,weak,400,N/A,Passwords must have at least one non alphanumeric character\n"
+    )
+    index = RegisteredIndex(str(tmp_path / "registered.sqlite3"))
+
+    assert index.import_results(str(results)) == 2
+    assert index.import_results(str(results)) == 0
+    assert index.get("created") == "id-1"
+    assert "exists" in index
+    assert "weak" not in index
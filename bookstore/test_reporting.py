@@ -0,0 +1,60 @@
+import html
+import json
+import os
+import re
+import subprocess
+import sys
+
+from bookstore import parallel, reporting
+
+suite = '''
+import pytest
+from bookstore import api, client
+from bookstore.server import LocalBookstoreServer
+
+@pytest.fixture(scope="module")
+def server():
+    with LocalBookstoreServer() as server:
+        server.add_user("known", "Secret#1234")
+        client.base_url = server.base_url
+        yield server
+
+@pytest.mark.parametrize("username", ["known", "nobody"])
+def test_authorize(server, username):
+    assert api.authorize(username, "Secret#1234").status_code == 200
+
+@pytest.mark.skip(reason="not today")
+def test_skipped():
+    pass
+'''
+
+def test_results_are_streamed_and_aggregated(tmp_path):
+    (tmp_path / "test_suite.py").write_text(suite)
+    results = tmp_path / "results" / "worker-{worker}.jsonl"
+    env = dict(os.environ, PYTHONPATH=parallel.root)
+    subprocess.run([sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "-p", "bookstore.reporting",
+                    f"--results-jsonl={results}", "test_suite.py"], cwd=tmp_path, env=env, capture_output=True)
+
+    path = tmp_path / "results" / "worker-0.jsonl"
+    records = {record["id"]: record for record in reporting.read([path])}
+    passed, failed = records["test_suite.py::test_authorize[known]"], records["test_suite.py::test_authorize[nobody]"]
+    assert (passed["outcome"], passed["status_code"], passed["api_calls"], passed["params"]) == (
+        "passed", 200, 1, {"username": "known"})
+    assert (failed["outcome"], failed["status_code"]) == ("failed", 404)
+    assert "assert 404 == 200" in failed["message"]
+    assert records["test_suite.py::test_skipped"]["outcome"] == "skipped"
+
+    summary = reporting.summarize(reporting.read([path, path]))
+    assert summary["total"] == 6
+    assert summary["outcomes"] == {"passed": 2, "failed": 2, "skipped": 2}
+    assert summary["statuses"] == {200: 2, 404: 2, None: 2}
+
+    report = tmp_path / "report.html"
+    reporting.write_html(reporting.read([path]), report)
+    page = report.read_text(encoding="utf-8")
+    assert '<p class="run-count">3 tests took' in page
+    assert '<span class="failed">1 Failed,</span>' in page
+    assert 'data-test-result="failed" />' in page and 'data-test-result="error" disabled/>' in page
+    blob = json.loads(html.unescape(re.search(r'data-jsonblob="([^"]*)"', page).group(1)))
+    assert blob["tests"]["test_suite.py::test_authorize[nobody]"][0]["result"] == "Failed"
+    assert (tmp_path / "assets" / "style.css").exists()
@@ -0,0 +1,67 @@
+import pytest
+import requests
+
+from bookstore import client, resilience
+
+base_url = "https://bookstore.toolsqa.com/Account/v1"
+credentials = {"userName": "PixelPusher22", "password": "KucingMakanTuna22#"}
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(resilience, "retry_policy", resilience.RetryPolicy(max_attempts=3, backoff_base=0))
+
+def test_idempotent_calls_are_retried_on_server_errors(local_api):
+    local_api.fail_next(503, count=2)
+    response = client.post(f"{base_url}/Authorized", json=credentials, idempotent=True)
+    assert response.status_code == 200
+
+def test_non_idempotent_calls_are_not_retried_on_server_errors(local_api):
+    local_api.fail_next(500)
+    response = client.post(f"{base_url}/User", json={"userName": "retryTestUser", "password": "KucingMakanTuna22#"})
+    assert response.status_code == 500
+
+def test_rate_limited_calls_are_retried_even_when_not_idempotent(local_api):
+    local_api.retry_after = 0
+    local_api.fail_next(429)
+    response = client.post(f"{base_url}/User", json={"userName": "retryTestUser2", "password": "KucingMakanTuna22#"})
+    assert response.status_code == 201
+
+def test_read_timeout_is_applied(local_api):
+    local_api.latency = 0.5
+    with pytest.raises(requests.exceptions.Timeout):
+        client.post(f"{base_url}/Authorized", json=credentials, timeout=(1, 0.05))
+
+def test_circuit_opens_after_repeated_failures_and_fails_fast(local_api, monkeypatch):
+    monkeypatch.setattr(resilience, "breaker", resilience.CircuitBreaker(failure_threshold=3, reset_timeout=60))
+    local_api.error_rate = 1.0
+    local_api.error_statuses = (500,)
+    client.get(f"{base_url}/User/some-id")  # three failed attempts open the circuit
+
+    before = local_api.request_count
+    with pytest.raises(resilience.CircuitOpenError):
+        client.get(f"{base_url}/User/some-id")
+    assert local_api.request_count == before
+
+def test_half_open_circuit_closes_after_a_successful_trial():
+    now = [0.0]
+    breaker = resilience.CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    now[0] = 11.0
+    assert breaker.state == "half-open"
+    breaker.before_call()
+    with pytest.raises(resilience.CircuitOpenError):
+        breaker.before_call()  # only one trial at a time
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+@pytest.mark.parametrize("attempt, retry_after, expected", [
+    (0, None, 0.5),
+    (3, None, 4.0),
+    (10, None, 10.0),
+    (0, 3.0, 3.0),
+])
+def test_backoff_grows_exponentially_up_to_the_cap(attempt, retry_after, expected):
+    policy = resilience.RetryPolicy(backoff_base=0.5, backoff_cap=10.0, rng=lambda: 1.0)
+    assert policy.delay(attempt, retry_after) == expected
@@ -0,0 +1,71 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bookstore.responsecache import ResponseCache
+
+def test_concurrent_lookups_share_one_load():
+    cache = ResponseCache()
+    release = threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        release.wait(5)
+        return {"status_code": 200}
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(cache.get_or_load, "id:token", load) for _ in range(8)]
+        while cache.coalesced < 7:
+            threading.Event().wait(0.01)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert results == [{"status_code": 200}] * 8
+    assert cache.stats() == {"hits": 0, "misses": 1, "coalesced": 7}
+
+def test_failed_load_reaches_every_waiter_and_is_not_cached():
+    cache = ResponseCache()
+
+    def load():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        cache.get_or_load("key", load)
+    assert cache.get_or_load("key", lambda: {"ok": True}) == {"ok": True}
+
+def test_entries_expire_and_lru_is_bounded(fake_clock):
+    cache = ResponseCache(maxsize=2, ttl=60, clock=fake_clock)
+    cache.put("a", {"n": 1})
+    cache.put("b", {"n": 2})
+    cache.get("a")
+    cache.put("c", {"n": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"n": 1}
+    fake_clock.now += 61
+    assert cache.get("a") is None
+
+def test_uncacheable_answers_are_loaded_again():
+    cache = ResponseCache()
+    answers = iter([{"status_code": 500}, {"status_code": 200}])
+
+    def load():
+        return next(answers)
+
+    cacheable = lambda result: result["status_code"] != 500
+    assert cache.get_or_load("key", load, cacheable)["status_code"] == 500
+    assert cache.get_or_load("key", load, cacheable)["status_code"] == 200
+    assert cache.get_or_load("key", load, cacheable)["status_code"] == 200
+
+def test_cache_file_is_reused_by_the_next_run(tmp_path, fake_clock):
+    path = str(tmp_path / "responses.sqlite3")
+    cache = ResponseCache(ttl=60, path=path, clock=fake_clock)
+    cache.put("id:token", {"status_code": 200, "books": "No books found"})
+    cache.close()
+
+    assert ResponseCache(ttl=60, path=path, clock=fake_clock).get("id:token")["books"] == "No books found"
+    fake_clock.now += 61
+    assert ResponseCache(ttl=60, path=path, clock=fake_clock).get("id:token") is None
@@ -0,0 +1,63 @@
+import pytest
+
+from bookstore.checkpoint import CheckpointedWriter
+from bookstore.results import ResultStore
+
+fieldnames = ["username", "login_status", "token", "expires", "result", "status"]
+
+def login_row(username, status):
+    return {"username": username, "login_status": "", "token": "", "expires": "", "result": "", "status": status}
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "results.sqlite3")
+
+def test_failed_users_of_the_last_runs(db_path):
+    store = ResultStore(db_path, batch_size=2)
+    for failing in (["a"], ["a", "b"], ["c"]):
+        run_id = store.start_run("login")
+        for username in "abc":
+            store.add("login", run_id, login_row(username, "Unauthorized" if username in failing else "Success"))
+        store.finish_run(run_id)
+    store.close()
+
+    store = ResultStore(db_path)
+    assert [(row["run_id"], row["username"]) for row in store.failed("login", last_runs=2)] == [(3, "c"), (2, "a"), (2, "b")]
+    assert [run["run_id"] for run in store.runs("login")] == [3, 2, 1]
+    assert store.failed("registration") == []
+
+def test_unknown_endpoint_is_rejected(db_path):
+    with pytest.raises(ValueError):
+        ResultStore(db_path).start_run("books")
+
+def test_writer_sink_keeps_its_run_when_resumed(db_path, tmp_path):
+    input_path = tmp_path / "credentials.csv"
+    input_path.write_text("username,password\n")
+    output_path = str(tmp_path / "responses.csv")
+
+    with pytest.raises(RuntimeError):
+        with CheckpointedWriter(output_path, fieldnames, input_path=str(input_path), flush_every=2,
+                                sink=ResultStore(db_path).sink("login")) as writer:
+            writer.record(login_row("a", "Success"))
+            writer.record(login_row("b", "Unauthorized"))
+            raise RuntimeError("crash")
+
+    with CheckpointedWriter(output_path, fieldnames, input_path=str(input_path), flush_every=2,
+                            sink=ResultStore(db_path).sink("login")) as writer:
+        assert writer.resumed
+        writer.record(login_row("c", "Unauthorized"))
+
+    store = ResultStore(db_path)
+    runs = store.runs("login")
+    assert len(runs) == 1 and runs[0]["finished_at"]
+    assert [row["username"] for row in store.failed("login")] == ["b", "c"]
+
+def test_registered_users_are_not_failures(db_path):
+    store = ResultStore(db_path)
+    run_id = store.start_run("registration")
+    for username, status, message in [("new", 201, ""), ("exists", 406, "User  exists!"),
+                                      ("skipped", "N/A", "Already registered"), ("weak", 400, "Passwords must...")]:
+        store.add("registration", run_id, {"userName": username, "password": "", "status_code": status,
+                                           "userID": "N/A", "message": message})
+    store.finish_run(run_id)
+    assert [row["username"] for row in store.failed("registration")] == ["weak"]
@@ -0,0 +1,49 @@
+import pytest
+
+from bookstore import client, resilience
+
+base_url = "https://bookstore.toolsqa.com/Account/v1"
+
+@pytest.mark.parametrize("user_data, expected_status, expected_code", [
+    ({"userName": "", "password": "KucingMakanTuna22#"}, 400, "1200"),
+    ({"userName": "serverTestWeak", "password": "weakpass"}, 400, "1300"),
+    ({"userName": "PixelPusher22", "password": "KucingMakanTuna22#"}, 406, "1204"),
+])
+def test_stand_in_rejects_registrations_like_the_api(local_api, user_data, expected_status, expected_code):
+    response = client.post(f"{base_url}/User", json=user_data)
+    assert response.status_code == expected_status
+    assert response.json()["code"] == expected_code
+
+def test_stand_in_runs_the_account_lifecycle(local_api):
+    credentials = {"userName": "serverTestUser", "password": "KucingMakanTuna22#"}
+    user_id = client.post(f"{base_url}/User", json=credentials).json()["userID"]
+
+    authorized = client.post(f"{base_url}/Authorized", json=credentials)
+    assert authorized.status_code == 200 and authorized.text == "true"
+
+    token_data = client.post(f"{base_url}/GenerateToken", json=credentials).json()
+    assert token_data["status"] == "Success"
+    assert token_data["expires"].endswith("Z")
+
+    headers = {"Authorization": f"Bearer {token_data['token']}"}
+    details = client.get(f"{base_url}/User/{user_id}", headers=headers)
+    assert details.status_code == 200
+    assert details.json()["username"] == "serverTestUser"
+
+    wrong_id = client.get(f"{base_url}/User/invalid_user_id", headers=headers)
+    assert (wrong_id.status_code, wrong_id.json()["message"]) == (401, "User not found!")
+
+    bad_token = client.get(f"{base_url}/User/{user_id}", headers={"Authorization": "Bearer InvalidTokenExample"})
+    assert (bad_token.status_code, bad_token.json()["message"]) == (401, "User not authorized!")
+
+def test_stand_in_injects_errors(local_api, monkeypatch):
+    # See the injected answers themselves rather than the retried ones
+    monkeypatch.setattr(resilience.retry_policy, "max_attempts", 1)
+    local_api.fail_next(429)
+    response = client.post(f"{base_url}/Authorized", json={"userName": "PixelPusher22", "password": "x"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(local_api.retry_after)
+
+    local_api.error_rate = 1.0
+    local_api.error_statuses = (500,)
+    assert client.post(f"{base_url}/Authorized", json={}).status_code == 500
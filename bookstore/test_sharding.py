@@ -0,0 +1,64 @@
+import csv
+import os
+
+import pytest
+
+from bookstore import sharding
+
+fieldnames = ["username", "result"]
+
+def shout(row):
+    # Module level so spawned shard processes can import it
+    if row["username"] == "skip":
+        return None
+    return {"username": row["username"], "result": row["username"].upper()}
+
+def write_input(path, usernames):
+    with open(path, mode="w", newline="") as outfile:
+        writer = csv.DictWriter(outfile, fieldnames=["username"])
+        writer.writeheader()
+        writer.writerows({"username": name} for name in usernames)
+
+def read_rows(path):
+    with open(path, mode="r", newline="") as infile:
+        return list(csv.DictReader(infile))
+
+def test_shard_of_is_stable_and_in_range():
+    assert sharding.shard_of("PixelPusher22", 4) == sharding.shard_of("PixelPusher22", 4)
+    assert {sharding.shard_of(f"user{i}", 4) for i in range(100)} == {0, 1, 2, 3}
+    assert sharding.shard_of(None, 4) == sharding.shard_of("", 4)
+
+def test_shards_run_separately_merge_in_input_order(tmp_path):
+    input_path = str(tmp_path / "users.csv")
+    output_path = str(tmp_path / "out.csv")
+    usernames = [f"user{i}" for i in range(50)] + ["skip"]
+    write_input(input_path, usernames)
+
+    # As if each shard ran on its own machine
+    for index in range(3):
+        sharding.run_shard(shout, fieldnames, "username", input_path, output_path, index, 3, concurrency=4)
+    sharding.merge_shards(output_path, fieldnames, 3)
+
+    rows = read_rows(output_path)
+    assert [row["username"] for row in rows] == usernames[:-1]
+    assert rows[7] == {"username": "user7", "result": "USER7"}
+    assert not os.path.exists(sharding.shard_path(output_path, 0, 3))
+
+def test_merge_requires_every_shard(tmp_path):
+    input_path = str(tmp_path / "users.csv")
+    output_path = str(tmp_path / "out.csv")
+    write_input(input_path, ["a", "b"])
+    sharding.run_shard(shout, fieldnames, "username", input_path, output_path, 0, 2)
+
+    with pytest.raises(FileNotFoundError):
+        sharding.merge_shards(output_path, fieldnames, 2)
+
+def test_run_sharded_uses_a_process_pool(tmp_path):
+    input_path = str(tmp_path / "users.csv")
+    output_path = str(tmp_path / "out.csv")
+    usernames = [f"user{i}" for i in range(20)]
+    write_input(input_path, usernames)
+
+    sharding.run_sharded(shout, fieldnames, "username", input_path, output_path, processes=2, shard_count=4)
+
+    assert [row["result"] for row in read_rows(output_path)] == [name.upper() for name in usernames]
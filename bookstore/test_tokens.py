@@ -0,0 +1,56 @@
+import pytest
+
+from bookstore.tokens import TokenCache, parse_expires
+
+@pytest.fixture
+def clock(fake_clock):
+    fake_clock.now = parse_expires("2025-01-11T06:30:00.000Z")
+    return fake_clock
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "tokens.sqlite3")
+
+def test_cache_serves_unexpired_token_after_reopen(cache_path, clock):
+    TokenCache(cache_path, clock=clock).put("Testing11Januari", "token-1", "2025-01-18T06:30:00.967Z")
+
+    entry = TokenCache(cache_path, clock=clock).get("Testing11Januari")
+    assert entry["token"] == "token-1"
+    assert entry["expires"] == "2025-01-18T06:30:00.967Z"
+
+def test_cache_treats_tokens_close_to_expiry_as_missing(cache_path, clock):
+    cache = TokenCache(cache_path, refresh_margin=3600, clock=clock)
+    cache.put("soon", "token-1", "2025-01-11T07:00:00.000Z")
+    cache.put("later", "token-2", "2025-01-11T08:00:00.000Z")
+
+    assert cache.get("soon") is None
+    assert cache.get("later")["token"] == "token-2"
+
+def test_cache_finds_token_by_user_id(cache_path, clock):
+    cache = TokenCache(cache_path, clock=clock)
+    cache.set_user_id("Testing11Januari", "ef6c34e0")
+    assert cache.get_by_user_id("ef6c34e0") is None
+
+    cache.put("Testing11Januari", "token-1", "2025-01-18T06:30:00.967Z")
+    assert cache.get_by_user_id("ef6c34e0")["token"] == "token-1"
+
+    cache.invalidate("Testing11Januari")
+    assert cache.get_by_user_id("ef6c34e0") is None
+
+def test_lru_front_is_bounded(cache_path, clock):
+    cache = TokenCache(cache_path, lru_size=2, clock=clock)
+    for i in range(5):
+        cache.put(f"user{i}", f"token-{i}", "2025-01-18T06:30:00.967Z")
+
+    assert len(cache._lru) == 2
+    assert cache.get("user0")["token"] == "token-0"
+
+def test_token_is_only_served_for_its_password(cache_path, clock):
+    cache = TokenCache(cache_path, clock=clock)
+    cache.put("Testing11Januari", "token-1", "2025-01-18T06:30:00.967Z", password="KucinGmakanikan12##")
+
+    reopened = TokenCache(cache_path, clock=clock)
+    assert reopened.get("Testing11Januari", "KucinGmakanikan12##")["token"] == "token-1"
+    assert reopened.get("Testing11Januari", "wrong") is None
+    # Lookups that don't log in, e.g. GetUser's, don't need the password
+    assert reopened.get("Testing11Januari")["token"] == "token-1"
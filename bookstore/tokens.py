@@ -0,0 +1,201 @@
+"""Persistent token cache shared by the Login and GetUser scripts.
+
+GenerateToken returns tokens that stay valid for about a week, so there is no
+need to log every user in again on each run. Tokens are stored in a small
+SQLite file keyed by username, with an in-memory LRU in front of it. Entries
+that expire within `refresh_margin` seconds count as missing, so only those
+users go back to the API.
+
+Login stores a salted hash of the password with each token and only reuses
+the token for a row with the same password; any other password goes to the
+API, which decides whether it is right.
+"""
+import hashlib
+import hmac
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+def default_path():
+    """Where the cache lives: BOOKSTORE_TOKEN_CACHE, else ~/.bookstore/tokens.sqlite3, read at call time."""
+    return os.environ.get("BOOKSTORE_TOKEN_CACHE") or os.path.join(
+        os.path.expanduser("~"), ".bookstore", "tokens.sqlite3")
+
+# Refresh tokens that expire within this many seconds
+refresh_margin = 6 * 60 * 60
+
+# Number of entries kept in memory
+lru_size = 10000
+
+def password_hash(password, salt=None):
+    """Salted SHA-256 of a password as "salt$digest"; pass the stored value's salt to compare."""
+    salt = salt or secrets.token_hex(8)
+    return f"{salt}${hashlib.sha256(f'{salt}:{password}'.encode()).hexdigest()}"
+
+def password_matches(password, stored):
+    if not stored:
+        return False
+    salt = stored.split("$", 1)[0]
+    return hmac.compare_digest(password_hash(password, salt), stored)
+
+def parse_expires(value):
+    """Convert an `expires` value such as 2025-01-18T06:30:00.967Z to a Unix timestamp."""
+    if not value:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+class TokenCache:
+    """Username -> token cache backed by SQLite with an LRU in front."""
+
+    def __init__(self, path=None, lru_size=lru_size, refresh_margin=refresh_margin, clock=time.time):
+        self.path = path or default_path()
+        self.lru_size = lru_size
+        self.refresh_margin = refresh_margin
+        self._clock = clock
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tokens ("
+            " username TEXT PRIMARY KEY,"
+            " token TEXT NOT NULL,"
+            " expires TEXT NOT NULL,"
+            " expires_at REAL,"
+            " user_id TEXT,"
+            " password_hash TEXT)"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(tokens)")}
+        if "password_hash" not in columns:
+            # Caches written before passwords were checked; their tokens are never served to Login
+            self._db.execute("ALTER TABLE tokens ADD COLUMN password_hash TEXT")
+        self._db.execute("CREATE INDEX IF NOT EXISTS tokens_user_id ON tokens (user_id)")
+        self._db.commit()
+
+    def _remember(self, entry):
+        self._lru[entry["username"]] = entry
+        self._lru.move_to_end(entry["username"])
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def _load(self, username):
+        entry = self._lru.get(username)
+        if entry is not None:
+            self._lru.move_to_end(username)
+            return entry
+        row = self._db.execute(
+            "SELECT username, token, expires, expires_at, user_id, password_hash FROM tokens WHERE username = ?",
+            (username,)).fetchone()
+        if row is None:
+            return None
+        entry = dict(zip(("username", "token", "expires", "expires_at", "user_id", "password_hash"), row))
+        self._remember(entry)
+        return entry
+
+    def _is_fresh(self, entry):
+        expires_at = entry.get("expires_at")
+        return expires_at is not None and expires_at - self._clock() > self.refresh_margin
+
+    def get(self, username, password=None):
+        """Return the cached entry for username, or None if missing or close to expiry.
+
+        With a password, the entry is only returned if it was stored with the same password.
+        """
+        if not username:
+            return None
+        with self._lock:
+            entry = self._load(username)
+        if entry is None or not self._is_fresh(entry):
+            return None
+        if password is not None and not password_matches(password, entry["password_hash"]):
+            return None
+        return dict(entry)
+
+    def get_by_user_id(self, user_id):
+        """Return the fresh entry of the user with this userID, if any."""
+        if not user_id:
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT username FROM tokens WHERE user_id = ?", (user_id,)).fetchone()
+        return self.get(row[0]) if row else None
+
+    def put(self, username, token, expires, user_id=None, password=None):
+        """Store a token returned by GenerateToken, with a hash of the password it was issued for."""
+        entry = {
+            "username": username,
+            "token": token,
+            "expires": expires or "",
+            "expires_at": parse_expires(expires),
+            "user_id": user_id,
+            "password_hash": password_hash(password) if password is not None else None
+        }
+        with self._lock:
+            if user_id is None:
+                known = self._load(username)
+                entry["user_id"] = known["user_id"] if known else None
+            self._db.execute(
+                "INSERT OR REPLACE INTO tokens (username, token, expires, expires_at, user_id, password_hash)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (entry["username"], entry["token"], entry["expires"], entry["expires_at"], entry["user_id"],
+                 entry["password_hash"]))
+            self._db.commit()
+            self._remember(entry)
+
+    def set_user_id(self, username, user_id):
+        """Link a username to its userID so GetUser can find the token by userID."""
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO tokens (username, token, expires, expires_at, user_id) VALUES (?, '', '', NULL, ?)"
+                " ON CONFLICT (username) DO UPDATE SET user_id = excluded.user_id",
+                (username, user_id))
+            self._db.commit()
+            entry = self._lru.get(username)
+            if entry is not None:
+                entry["user_id"] = user_id
+
+    def invalidate(self, username):
+        """Forget the token of username, e.g. after the API rejected it."""
+        with self._lock:
+            self._db.execute("UPDATE tokens SET token = '', expires = '', expires_at = NULL WHERE username = ?",
+                             (username,))
+            self._db.commit()
+            self._lru.pop(username, None)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """Return the process-wide token cache, opening it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TokenCache()
+    return _cache
+
+def set_cache(cache):
+    """Replace the process-wide token cache (None reopens the default one on next use)."""
+    global _cache
+    _cache = cache
+
+def lookup(user_id=None, username=None):
+    """Return the cached entry with an unexpired token for the user, or None."""
+    cache = get_cache()
+    entry = cache.get(username) if username else cache.get_by_user_id(user_id)
+    return entry if entry and entry["token"] else None
@@ -0,0 +1,136 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from bookstore import client
+from bookstore.server import LocalBookstoreServer
+
+# CSV/JSONL-driven test cases (the `cases` marker, --cases and --case-shard), the per-run account
+# pool (the `account` fixture, --account-pool), test splitting across workers (--worker) and
+# streaming JSONL results (--results-jsonl)
+pytest_plugins = ["bookstore.datacases", "bookstore.accounts", "bookstore.parallel", "bookstore.reporting"]
+
+# Accounts the bookstore package tests expect on the stand-in
+seed_accounts = [
+    ("PixelPusher22", "KucingMakanTuna22#", None),
+    ("Testing11Januari", "KucinGmakanikan12##", "ef6c34e0-eaf7-4f58-ace9-49119396ef57"),
+]
+
+def pytest_addoption(parser):
+    parser.addoption("--local-api", action="store_true",
+                     help="run the API tests against the local stand-in server instead of bookstore.toolsqa.com")
+    parser.addoption("--cassette", metavar="PATH",
+                     help="replay API responses from this JSONL cassette instead of calling the API")
+    parser.addoption("--record", action="store_true",
+                     help="with --cassette, call the API and record every interaction into the cassette")
+
+@pytest.fixture(scope="session")
+def bookstore_server():
+    """Local Account API stand-in, seeded with the accounts the suites use."""
+    server = LocalBookstoreServer()
+    for username, password, user_id in seed_accounts:
+        server.add_user(username, password, user_id)
+    with server:
+        yield server
+
+@pytest.fixture
+def local_api(bookstore_server, monkeypatch):
+    """Send every bookstore.client request in this test to the local stand-in."""
+    from bookstore import resilience
+
+    monkeypatch.setattr(client, "base_url", bookstore_server.base_url)
+    bookstore_server.latency = 0.0
+    bookstore_server.error_rate = 0.0
+    resilience.breaker.reset()
+    yield bookstore_server
+    bookstore_server.latency = 0.0
+    bookstore_server.error_rate = 0.0
+    resilience.breaker.reset()
+
+@pytest.fixture(scope="session", autouse=True)
+def _local_api_for_session(request):
+    """With --local-api, point the whole session at the stand-in server."""
+    if not request.config.getoption("--local-api"):
+        yield
+        return
+    server = request.getfixturevalue("bookstore_server")
+    previous = client.base_url
+    client.base_url = server.base_url
+    yield
+    client.base_url = previous
+
+@pytest.fixture(scope="session", autouse=True)
+def _cassette_for_session(request):
+    """With --cassette, record or replay every API call of the session."""
+    path = request.config.getoption("--cassette")
+    if not path:
+        yield
+        return
+    from bookstore import cassette
+
+    cassette.use(path, "record" if request.config.getoption("--record") else "replay")
+    yield
+    cassette.eject()
+
+class FakeClock:
+    """Clock for code that takes a clock function; sleep just moves time forward."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def fake_clock():
+    return FakeClock()
+
+class FakeApi:
+    """Canned Account API answers for tests that mock bookstore.client.post and get.
+
+    Registered users get the userID "id-<userName>". Names in `existing` are
+    already registered, and names in `unknown` can't log in. Tokens are shaped
+    like the API's, so GetUser's local token check accepts them.
+    """
+
+    def __init__(self):
+        self.existing = {"existingUser"}
+        self.unknown = {"unknownUser"}
+        self._issuer = LocalBookstoreServer()
+
+    @staticmethod
+    def response(status_code, data):
+        response = MagicMock()
+        response.status_code = status_code
+        response.json.return_value = data
+        response.text = str(data)
+        return response
+
+    def post(self, url, json=None, **kwargs):
+        username = json["userName"]
+        if url.endswith("/User"):
+            if username in self.existing:
+                return self.response(406, {"code": "1204", "message": "User exists!"})
+            return self.response(201, {"userID": f"id-{username}", "username": username, "books": []})
+        if username in self.unknown:
+            return self.response(400, {"code": "1207", "message": "User not found!"})
+        if url.endswith("/Authorized"):
+            return self.response(200, True)
+        return self.response(200, {"token": self._issuer.make_token(username), "expires": "2999-01-01T00:00:00.000Z",
+                                   "status": "Success", "result": "User authorized successfully."})
+
+    def get(self, url, headers=None, **kwargs):
+        user_id = url.rsplit("/", 1)[-1]
+        return self.response(200, {"userId": user_id, "username": user_id[3:], "books": []})
+
+@pytest.fixture
+def fake_api():
+    """A FakeApi answering every bookstore.client POST and GET of the test; .post_mock/.get_mock count calls."""
+    api = FakeApi()
+    with patch("bookstore.client.post", side_effect=api.post) as post_mock, \
+            patch("bookstore.client.get", side_effect=api.get) as get_mock:
+        api.post_mock, api.get_mock = post_mock, get_mock
+        yield api